@@ -0,0 +1,463 @@
+"""
+Caching for scraped OTB data
+"""
+import hashlib
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time-to-live"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing or expired
+
+        Returns:
+            The cached value or default
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else default
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Get a cached value together with the time it was stored
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, stored_at) or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, stored_at
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None,
+            stored_at: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Optional TTL override for this entry
+            stored_at: When the value was first stored, if it was copied from another cache
+        """
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, now if stored_at is None else stored_at, now + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self) -> List[Hashable]:
+        """Get the keys of all unexpired entries"""
+        now = time.time()
+        with self._lock:
+            return [key for key, (_, _, expires_at) in self._entries.items() if expires_at > now]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get_entry(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+class SQLiteCache:
+    """
+    Cache shared by all processes on a host, backed by a SQLite file in WAL mode
+
+    Exposes the same interface as TTLCache, but eviction is first in, first
+    out rather than LRU: reads do not write, so entries are evicted by the time
+    they were stored. Values are pickled and each write is one atomic
+    transaction in which expired entries are purged and the earliest stored
+    entries are evicted once the namespace exceeds max_entries or max_bytes.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        namespace: str = "default",
+        max_entries: int = 1024,
+        ttl_seconds: float = 600.0,
+        max_bytes: Optional[int] = None
+    ):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_cache_entries_stored
+                ON cache_entries (namespace, stored_at)
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return key if isinstance(key, str) else repr(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value or default if missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else default
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Get (value, stored_at) or None if missing, expired or unreadable"""
+        record = self.get_record(key)
+        return record[:2] if record else None
+
+    def get_record(self, key: Hashable) -> Optional[Tuple[Any, float, float]]:
+        """Get (value, stored_at, expires_at) or None if missing, expired or unreadable"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT value, stored_at, expires_at FROM cache_entries
+                WHERE namespace = ? AND key = ? AND expires_at > ?
+            """, (self.namespace, self._encode_key(key), time.time())).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1], row[2]
+        except Exception as e:
+            logger.warning("Dropping unreadable shared cache entry %s: %s", key, e)
+            self.delete(key)
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value and evict expired or excess entries"""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("""
+                    INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, stored_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (self.namespace, self._encode_key(key), blob, len(blob), now, now + ttl))
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, now)
+        )
+        conn.execute("""
+            DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ?
+                ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.namespace, self.namespace, self.max_entries))
+        if self.max_bytes:
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                evict = []
+                for key, size in conn.execute("""
+                    SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY stored_at
+                """, (self.namespace,)):
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((self.namespace, key))
+                    total -= size
+                conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", evict)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present"""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, self._encode_key(key))
+            )
+
+    def clear(self) -> None:
+        """Remove all entries in this namespace"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def keys(self) -> List[Hashable]:
+        """Get the keys of all unexpired entries (string keys only round-trip exactly)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get_entry(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+class TieredCache:
+    """
+    In-process cache in front of a shared cache
+
+    Reads are served from the local tier when possible and fall back to the
+    shared tier, copying hits into the local tier for no longer than they have
+    left in the shared tier. Writes go to both tiers.
+    Keep the local TTL short so updates written by other processes are seen soon.
+    keys() lists the local tier only, so background jobs that walk the keys
+    (such as page refresh) cover the entries this process has served rather
+    than every worker covering the whole shared set.
+    """
+
+    def __init__(self, local: TTLCache, shared: SQLiteCache):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return entry[0] if entry else default
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        entry = self.local.get_entry(key)
+        if entry is not None:
+            return entry
+        record = self.shared.get_record(key)
+        if record is None:
+            return None
+        value, stored_at, expires_at = record
+        self.local.set(key, value, min(self.local.ttl_seconds, expires_at - time.time()), stored_at)
+        return value, stored_at
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self.shared.set(key, value, ttl_seconds)
+        local_ttl = self.local.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.local.ttl_seconds)
+        self.local.set(key, value, local_ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.shared.clear()
+
+    def keys(self) -> List[Hashable]:
+        return self.local.keys()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get_entry(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.shared)
+
+
+class ContentMemo:
+    """
+    Parse results keyed by URL and the hash of the body they were parsed from
+
+    Holds one entry per URL: a lookup only hits when the body just downloaded
+    is byte-identical to the one the stored result came from. Hits and misses
+    are counted for health reporting.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 6 * 3600.0):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        """BLAKE2b digest of a response body"""
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def get(self, key: Hashable, digest: str) -> Any:
+        """
+        Get the result stored for a key if it was parsed from a body with this digest
+
+        Args:
+            key: Cache key, e.g. the page URL
+            digest: Digest of the current body
+
+        Returns:
+            The stored result, or None on a miss
+        """
+        entry = self._cache.get(key)
+        hit = entry is not None and entry[0] == digest
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+        return entry[1] if hit else None
+
+    def set(self, key: Hashable, digest: str, value: Any) -> None:
+        """Store the result parsed from a body with this digest, replacing older bodies of the key"""
+        self._cache.set(key, (digest, value))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit and miss counts for health reporting"""
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "entries": len(self._cache),
+        }
+
+
+class SQLiteLease:
+    """
+    Named lease held by at most one process at a time, through a SQLite file
+
+    Lets one of several worker processes sharing a cache file run a background
+    job. The holder renews the lease by acquiring it again; if it stops doing
+    so, another process can take the lease over once ttl_seconds have passed.
+    """
+
+    def __init__(self, db_path: str, name: str, ttl_seconds: float = 600.0):
+        self.db_path = db_path
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def acquire(self) -> bool:
+        """
+        Take or renew the lease
+
+        Returns:
+            True if this process holds the lease for the next ttl_seconds
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+                held = row is None or row[0] == self.owner or row[1] <= now
+                if held:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                        (self.name, self.owner, now + self.ttl_seconds)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return held
+
+    def release(self) -> None:
+        """Give up the lease if this process holds it"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+
+
+def build_cache(
+    namespace: str,
+    max_entries: int,
+    ttl_seconds: float,
+    shared_path: Optional[str] = None,
+    local_ttl_seconds: float = 30.0,
+    shared_max_bytes: Optional[int] = None
+):
+    """
+    Build an in-process cache, tiered over a shared SQLite cache if a path is given
+
+    Args:
+        namespace: Name separating this cache's entries in the shared file
+        max_entries: Maximum number of entries per tier
+        ttl_seconds: Entry TTL
+        shared_path: Path of the shared cache file, or None for in-process only
+        local_ttl_seconds: TTL of the in-process tier when a shared tier is used
+        shared_max_bytes: Maximum pickled size of the shared tier's entries (None for no limit)
+
+    Returns:
+        TTLCache or TieredCache
+    """
+    if not shared_path:
+        return TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    return TieredCache(
+        TTLCache(max_entries=max_entries, ttl_seconds=min(local_ttl_seconds, ttl_seconds)),
+        SQLiteCache(
+            shared_path, namespace=namespace, max_entries=max_entries, ttl_seconds=ttl_seconds,
+            max_bytes=shared_max_bytes
+        )
+    )
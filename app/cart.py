@@ -0,0 +1,98 @@
+"""
+Bulk verification of cart items against current product pages
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .identity import variant_key
+from .models import CartItem, CartItemStatus, CartVerifyResponse, Disc, StockStatus
+from .tracing import bind
+
+logger = logging.getLogger(__name__)
+
+
+def _match(item: CartItem, discs: List[Disc]) -> Optional[Disc]:
+    """Find the variant of a cart item by disc ID, falling back to its variant attributes"""
+    if item.disc_id:
+        for disc in discs:
+            if disc.id == item.disc_id:
+                return disc
+    key = variant_key(item)
+    for disc in discs:
+        if variant_key(disc) == key:
+            return disc
+    return None
+
+
+def verify_cart(scraper, items: List[CartItem], max_age_seconds: float = 120.0) -> CartVerifyResponse:
+    """
+    Look up the current price and stock of every cart item
+
+    Each product page is fetched once, concurrently, and recently cached pages
+    are reused. Items whose page is not on the scraper's site are not fetched.
+
+    Args:
+        scraper: OTBDiscsScraper used to fetch product pages
+        items: Cart items to verify
+        max_age_seconds: Reuse cached pages fetched at most this long ago
+
+    Returns:
+        CartVerifyResponse with one status per item, in request order
+    """
+    urls = list(dict.fromkeys(item.product_url for item in items))
+    pages: Dict[str, List[Disc]] = {}
+    # Pages on other hosts are never fetched and are reported as failed
+    failed_pages = [url for url in urls if not scraper.is_site_url(url)]
+    if failed_pages:
+        logger.warning("Skipping %s cart pages that are not on %s", len(failed_pages), scraper.base_url)
+    fetch_urls = [url for url in urls if url not in failed_pages]
+
+    if fetch_urls:
+        with ThreadPoolExecutor(max_workers=min(len(fetch_urls), scraper.max_concurrent_requests)) as executor:
+            futures = {
+                url: executor.submit(bind(scraper.get_product_snapshot), url, max_age_seconds)
+                for url in fetch_urls
+            }
+            for url, future in futures.items():
+                try:
+                    snapshot = future.result()
+                    pages[url] = list(snapshot.discs) if snapshot is not None else []
+                except Exception as e:
+                    logger.warning("Could not verify cart items on %s: %s", url, e)
+                    failed_pages.append(url)
+
+    statuses = []
+    for index, item in enumerate(items):
+        disc = _match(item, pages.get(item.product_url, []))
+        if disc is None:
+            statuses.append(CartItemStatus(
+                index=index,
+                disc_id=item.disc_id,
+                product_url=item.product_url,
+                found=False,
+                available=False,
+                old_price=item.price
+            ))
+            continue
+        statuses.append(CartItemStatus(
+            index=index,
+            disc_id=disc.id,
+            product_url=item.product_url,
+            found=True,
+            available=disc.stock != StockStatus.OUT_OF_STOCK,
+            price=disc.price,
+            old_price=item.price,
+            price_changed=item.price is not None and disc.price is not None and item.price != disc.price,
+            stock=disc.stock,
+            disc=disc
+        ))
+
+    logger.info("Verified %s cart items on %s pages (%s failed)", len(items), len(urls), len(failed_pages))
+    return CartVerifyResponse(
+        items=statuses,
+        pages_checked=len(urls) - len(failed_pages),
+        failed_pages=failed_pages,
+        verified_at=time.time()
+    )
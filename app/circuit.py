@@ -0,0 +1,102 @@
+"""
+Circuit breaker for requests to OTB
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream until it has had time to recover
+
+    The circuit opens after failure_threshold consecutive failures. While open,
+    calls are rejected immediately. After recovery_seconds one trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0, name: str = "upstream"):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.name = name
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the recovery time has passed"""
+        with self._lock:
+            if self._state == OPEN and time.time() - self._opened_at >= self.recovery_seconds:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected"""
+        return self.state == OPEN
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may be made now
+
+        Returns:
+            True if closed, or if half-open and no trial call is running yet
+        """
+        state = self.state
+        with self._lock:
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit when the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit %s opened after %s failures", self.name, self._failures)
+                self._state = OPEN
+                self._opened_at = time.time()
+                self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a call that neither succeeded nor failed, letting another half-open trial through"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the state for health reporting"""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "opened_at": self._opened_at if state != CLOSED else None,
+            }
@@ -1,81 +1,150 @@
 """
 Database module for managing brand/plastic relationships
 """
+import os
 import sqlite3
 import logging
 from typing import Dict, List, Tuple, Optional
 from contextlib import contextmanager
-import os
+import threading
 
 logger = logging.getLogger(__name__)
 
 class BrandPlasticDatabase:
     """Database manager for brand/plastic relationships"""
     
+    # Ordered (version, description, method name) steps; each runs once per database file
+    MIGRATIONS = [
+        (1, "create brand/plastic tables", "_create_tables"),
+        (2, "seed initial brand/plastic data", "_seed_initial_data"),
+    ]
+    
     def __init__(self, db_path: str = "brand_plastics.db"):
         self.db_path = db_path
-        self.init_database()
-        self.seed_initial_data()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        return conn
     
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+        """Context manager for database connections, initializing the database on first use"""
+        self._ensure_initialized()
+        conn = self._connect()
         try:
             yield conn
         finally:
             conn.close()
     
+    def _ensure_initialized(self):
+        """Apply pending migrations the first time the database is used"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self.init_database()
+                self._initialized = True
+    
+    @property
+    def schema_version(self) -> int:
+        """Highest migration version applied to the database file"""
+        conn = self._connect()
+        try:
+            return self._current_version(conn)
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _current_version(conn: sqlite3.Connection) -> int:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        row = conn.execute("SELECT MAX(version) AS version FROM schema_migrations").fetchone()
+        return row['version'] or 0
+    
     def init_database(self):
-        """Initialize database tables"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Create brands table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS brands (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create plastics table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS plastics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    brand_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (brand_id) REFERENCES brands (id),
-                    UNIQUE(name, brand_id)
-                )
-            """)
-            
-            # Create brand_plastics relationship table with confidence scoring
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS brand_plastics (
-                    brand_id INTEGER NOT NULL,
-                    plastic_id INTEGER NOT NULL,
-                    confidence_score REAL DEFAULT 1.0,
-                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (brand_id, plastic_id),
-                    FOREIGN KEY (brand_id) REFERENCES brands (id),
-                    FOREIGN KEY (plastic_id) REFERENCES plastics (id)
-                )
-            """)
-            
-            # Create index for faster lookups
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_brand_plastics_confidence 
-                ON brand_plastics (confidence_score DESC)
-            """)
+        """Initialize database tables and apply any pending migrations"""
+        conn = self._connect()
+        conn.isolation_level = None  # Manage the transaction explicitly
+        try:
+            # Cheap check without taking the write lock
+            latest = self.MIGRATIONS[-1][0]
+            if self._current_version(conn) >= latest:
+                return
             
-            conn.commit()
+            # BEGIN IMMEDIATE takes the write lock, so concurrent workers
+            # wait here and then see the migrations as already applied
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._current_version(conn)
+                cursor = conn.cursor()
+                for version, description, method_name in self.MIGRATIONS:
+                    if version <= current:
+                        continue
+                    getattr(self, method_name)(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                        (version, description)
+                    )
+                    logger.info("Applied database migration %s: %s", version, description)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
             logger.info("Database initialized successfully")
+        finally:
+            conn.close()
+    
+    def _create_tables(self, cursor):
+        """Create brand/plastic tables"""
+        # Create brands table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS brands (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Create plastics table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS plastics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                brand_id INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (brand_id) REFERENCES brands (id),
+                UNIQUE(name, brand_id)
+            )
+        """)
+        
+        # Create brand_plastics relationship table with confidence scoring
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS brand_plastics (
+                brand_id INTEGER NOT NULL,
+                plastic_id INTEGER NOT NULL,
+                confidence_score REAL DEFAULT 1.0,
+                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (brand_id, plastic_id),
+                FOREIGN KEY (brand_id) REFERENCES brands (id),
+                FOREIGN KEY (plastic_id) REFERENCES plastics (id)
+            )
+        """)
+        
+        # Create index for faster lookups
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_brand_plastics_confidence 
+            ON brand_plastics (confidence_score DESC)
+        """)
     
-    def seed_initial_data(self):
+    def _seed_initial_data(self, cursor):
         """Seed database with initial brand/plastic relationships"""
         initial_data = {
             'Innova': ['Champion', 'Star', 'DX', 'Pro', 'XT', 'Metal Flake', 'Glow', 'Halo Star'],
@@ -93,35 +162,31 @@ class BrandPlasticDatabase:
             'Millennium': ['Standard', 'Quantum', 'Sirius']
         }
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        for brand_name, plastics in initial_data.items():
+            # Insert or get brand
+            cursor.execute("INSERT OR IGNORE INTO brands (name) VALUES (?)", (brand_name,))
+            cursor.execute("SELECT id FROM brands WHERE name = ?", (brand_name,))
+            brand_id = cursor.fetchone()['id']
             
-            for brand_name, plastics in initial_data.items():
-                # Insert or get brand
-                cursor.execute("INSERT OR IGNORE INTO brands (name) VALUES (?)", (brand_name,))
-                cursor.execute("SELECT id FROM brands WHERE name = ?", (brand_name,))
-                brand_id = cursor.fetchone()['id']
+            for plastic_name in plastics:
+                # Insert or get plastic
+                cursor.execute("""
+                    INSERT OR IGNORE INTO plastics (name, brand_id) 
+                    VALUES (?, ?)
+                """, (plastic_name, brand_id))
                 
-                for plastic_name in plastics:
-                    # Insert or get plastic
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO plastics (name, brand_id) 
-                        VALUES (?, ?)
-                    """, (plastic_name, brand_id))
-                    
-                    cursor.execute("""
-                        SELECT id FROM plastics WHERE name = ? AND brand_id = ?
-                    """, (plastic_name, brand_id))
-                    plastic_id = cursor.fetchone()['id']
-                    
-                    # Insert or update brand_plastics relationship
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO brand_plastics (brand_id, plastic_id, confidence_score)
-                        VALUES (?, ?, 1.0)
-                    """, (brand_id, plastic_id))
-            
-            conn.commit()
-            logger.info("Initial data seeded successfully")
+                cursor.execute("""
+                    SELECT id FROM plastics WHERE name = ? AND brand_id = ?
+                """, (plastic_name, brand_id))
+                plastic_id = cursor.fetchone()['id']
+                
+                # Insert or update brand_plastics relationship
+                cursor.execute("""
+                    INSERT OR IGNORE INTO brand_plastics (brand_id, plastic_id, confidence_score)
+                    VALUES (?, ?, 1.0)
+                """, (brand_id, plastic_id))
+        
+        logger.info("Initial data seeded successfully")
     
     def get_brand_plastics_map(self, min_confidence: float = 0.5) -> Dict[str, List[str]]:
         """Get brand to plastics mapping from database"""
@@ -178,7 +243,7 @@ class BrandPlasticDatabase:
             """, (brand_id, plastic_id, confidence_boost, confidence_boost))
             
             conn.commit()
-            logger.debug(f"Learned relationship: {brand_name} + {plastic_name} (confidence: {confidence_boost})")
+            logger.debug("Learned relationship: %s + %s (confidence: %s)", brand_name, plastic_name, confidence_boost)
     
     def get_brand_for_plastic(self, plastic_name: str) -> Optional[str]:
         """Get the most likely brand for a given plastic name"""
@@ -226,5 +291,5 @@ class BrandPlasticDatabase:
             cursor.execute("SELECT DISTINCT name FROM plastics ORDER BY name")
             return [row['name'] for row in cursor.fetchall()]
 
-# Global database instance
-db = BrandPlasticDatabase()
+# Global database instance (initialized lazily on first query)
+db = BrandPlasticDatabase(os.environ.get("BRAND_DB_PATH", "brand_plastics.db"))
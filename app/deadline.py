@@ -0,0 +1,87 @@
+"""
+Per-request latency budgets for searches
+
+A deadline is bound to the current context like the request trace, so every
+upstream request made for a search (including those made from worker threads
+started through tracing.bind) can shorten its timeout to the remaining budget.
+Work that cannot finish in time is recorded as incomplete.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("otb_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the latency budget of the current request is used up"""
+
+
+class Deadline:
+    """Latency budget of one request and the pages it could not complete"""
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+        self._incomplete: List[str] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Seconds left in the budget, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """
+        Shorten a timeout to the remaining budget
+
+        Raises:
+            DeadlineExceeded: If no budget is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.budget_ms:.0f}ms exceeded")
+        return min(default, remaining)
+
+    def mark_incomplete(self, url: str) -> None:
+        """Record a page that could not be fetched within the budget"""
+        with self._lock:
+            if url not in self._incomplete:
+                self._incomplete.append(url)
+
+    @property
+    def incomplete(self) -> List[str]:
+        with self._lock:
+            return list(self._incomplete)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline bound to the current context, if any"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(budget_ms: Optional[float]):
+    """
+    Bind a deadline to the current context
+
+    Args:
+        budget_ms: Latency budget in milliseconds, or None/0 for no deadline
+
+    Yields:
+        The Deadline, or None if no budget was given
+    """
+    if not budget_ms:
+        yield None
+        return
+    deadline = Deadline(budget_ms)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
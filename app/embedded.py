@@ -0,0 +1,162 @@
+"""
+Variation data embedded in WooCommerce product pages
+
+Variable products carry their variations as JSON in the
+`data-product_variations` attribute of the add-to-cart form, and some themes
+also assign it to a variable in an inline script. Both are found with a byte
+scan of the raw page, so a page with embedded variations is parsed without
+building a DOM.
+"""
+import html
+import json
+import re
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+_DATA_ATTRIBUTE = re.compile(rb'data-product_variations\s*=\s*(["\'])(.*?)\1', re.DOTALL)
+_SCRIPT_ASSIGNMENT = re.compile(rb'product_variations\s*[=:]\s*\[')
+_TITLE = re.compile(rb'<h1[^>]*>(.*?)</h1>', re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r'<[^>]+>')
+_SELECT = re.compile(rb'<select[^>]*\bname\s*=\s*["\'](attribute_[^"\']+)["\'][^>]*>(.*?)</select>', re.DOTALL | re.IGNORECASE)
+_OPTION = re.compile(rb'<option[^>]*\bvalue\s*=\s*["\']([^"\']*)["\'][^>]*>(.*?)</option>', re.DOTALL | re.IGNORECASE)
+
+
+def find_variations(content: bytes) -> Optional[List[dict]]:
+    """
+    Find and decode the variation JSON embedded in a product page
+
+    Args:
+        content: Raw HTML of the product page
+
+    Returns:
+        List of WooCommerce variation dicts, or None if the page embeds none
+        (WooCommerce writes "false" when variations are loaded over AJAX)
+    """
+    match = _DATA_ATTRIBUTE.search(content)
+    if match:
+        try:
+            variations = json.loads(html.unescape(match.group(2).decode('utf-8', errors='replace')))
+        except ValueError:
+            variations = None
+        if isinstance(variations, list) and variations:
+            return variations
+
+    match = _SCRIPT_ASSIGNMENT.search(content)
+    if match:
+        text = content[match.end() - 1:].decode('utf-8', errors='replace')
+        try:
+            variations, _ = json.JSONDecoder().raw_decode(text)
+        except ValueError:
+            return None
+        if isinstance(variations, list) and variations:
+            return variations
+    return None
+
+
+def find_title(content: bytes) -> Optional[str]:
+    """Get the text of the first <h1> of a page"""
+    match = _TITLE.search(content)
+    if not match:
+        return None
+    text = _TAG.sub('', match.group(1).decode('utf-8', errors='replace'))
+    return html.unescape(text).strip() or None
+
+
+def find_attribute_terms(content: bytes) -> Dict[str, Dict[str, str]]:
+    """
+    Map the slugs of taxonomy attributes to their term names
+
+    Global attributes (attribute_pa_*) carry term slugs like "flat-3" in the
+    variation JSON, while the variants table shows the term name "Flat (3)".
+    The add-to-cart form lists every term as an option of the attribute's select.
+
+    Args:
+        content: Raw HTML of the product page
+
+    Returns:
+        Dict of attribute key -> {slug: term name}
+    """
+    terms: Dict[str, Dict[str, str]] = {}
+    for select in _SELECT.finditer(content):
+        key = select.group(1).decode('utf-8', errors='replace')
+        options = terms.setdefault(key, {})
+        for option in _OPTION.finditer(select.group(2)):
+            slug = html.unescape(option.group(1).decode('utf-8', errors='replace'))
+            if slug:
+                text = _TAG.sub('', option.group(2).decode('utf-8', errors='replace'))
+                options[slug] = html.unescape(text).strip()
+    return terms
+
+
+def attribute_header(key: str) -> str:
+    """Turn a variation attribute key like "attribute_pa_stamp-foil" into a column header"""
+    if key.startswith('attribute_'):
+        key = key[len('attribute_'):]
+    if key.startswith('pa_'):
+        key = key[len('pa_'):]
+    return key.replace('-', ' ').replace('_', ' ').lower().strip()
+
+
+def variation_row(variation: dict, attribute_keys: List[str], terms: Optional[Dict[str, Dict[str, str]]] = None) -> List[str]:
+    """
+    Present a variation as the cell texts of a variants table row
+
+    Args:
+        variation: WooCommerce variation dict
+        attribute_keys: Attribute keys in column order
+        terms: Term names by slug per attribute key, from find_attribute_terms
+
+    Returns:
+        Cell texts: one per attribute, then price and stock
+    """
+    attributes = variation.get('attributes') or {}
+    terms = terms or {}
+    cells = []
+    for key in attribute_keys:
+        value = html.unescape(str(attributes.get(key) or ''))
+        cells.append(terms.get(key, {}).get(value, value))
+
+    price = variation.get('display_price')
+    cells.append(f"${Decimal(str(price)):.2f}" if price not in (None, '') else '')
+
+    if not variation.get('is_in_stock', True) or variation.get('is_purchasable') is False:
+        cells.append('Out of stock')
+    elif variation.get('max_qty') == 1:
+        cells.append('Just 1 left')
+    else:
+        cells.append('In stock')
+    return cells
+
+
+def variation_table(
+    variations: List[dict],
+    terms: Optional[Dict[str, Dict[str, str]]] = None
+) -> Optional[Tuple[List[str], List[List[str]]]]:
+    """
+    Lay out variations as a variants table
+
+    Args:
+        variations: WooCommerce variation dicts
+        terms: Term names by slug per attribute key, from find_attribute_terms
+
+    Returns:
+        Tuple of (lowercase headers, cell texts per row), or None if a taxonomy
+        attribute value has no known term name, since its slug would not parse
+        like the table text does
+    """
+    terms = terms or {}
+    attribute_keys = list((variations[0].get('attributes') or {}).keys())
+    for variation in variations:
+        attributes = variation.get('attributes') or {}
+        for key in attribute_keys:
+            value = html.unescape(str(attributes.get(key) or ''))
+            if key.startswith('attribute_pa_') and value and value not in terms.get(key, {}):
+                return None
+    headers = [attribute_header(key) for key in attribute_keys] + ['price', 'stock']
+    return headers, [variation_row(v, attribute_keys, terms) for v in variations]
+
+
+def variation_image(variation: dict) -> Optional[str]:
+    """Get the image URL of a variation"""
+    image = variation.get('image') or {}
+    return image.get('thumb_src') or image.get('src') or None
@@ -0,0 +1,200 @@
+"""
+Streaming export of search results as CSV, JSONL or Parquet
+
+Rows are serialized in batches by generators, so an export is written to the
+response as it is produced instead of being built in memory first. Parquet
+export needs the optional pyarrow package.
+"""
+import csv
+import io
+import logging
+from typing import Callable, Iterable, Iterator, List
+
+from .models import Disc
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Raw row text is only served by /api/disc/{id}/raw
+EXPORT_FIELDS = [name for name in Disc.model_fields if name != "raw_row_text"]
+
+_NUMERIC_FIELDS = ("weight", "scaled_weight", "flatness", "stiffness")
+
+
+class ExportUnavailable(Exception):
+    """Raised when the dependency of an export format is not installed"""
+
+
+def _batches(discs: Iterable[Disc], size: int) -> Iterator[List[Disc]]:
+    batch = []
+    for disc in discs:
+        batch.append(disc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _row(disc: Disc) -> dict:
+    row = {field: getattr(disc, field) for field in EXPORT_FIELDS}
+    row["stock"] = disc.stock.value
+    return row
+
+
+def iter_csv(discs: Iterable[Disc], batch_size: int = 500) -> Iterator[bytes]:
+    """
+    Serialize discs as CSV with a header row
+
+    Args:
+        discs: Discs to export
+        batch_size: Number of rows per yielded chunk
+
+    Yields:
+        UTF-8 encoded CSV chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for batch in _batches(discs, batch_size):
+        writer.writerows(_row(disc) for disc in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_jsonl(discs: Iterable[Disc], batch_size: int = 500) -> Iterator[bytes]:
+    """
+    Serialize discs as JSON Lines, one disc per line
+
+    Args:
+        discs: Discs to export
+        batch_size: Number of lines per yielded chunk
+
+    Yields:
+        UTF-8 encoded JSONL chunks
+    """
+    for batch in _batches(discs, batch_size):
+        lines = [disc.model_dump_json(include=set(EXPORT_FIELDS)) for disc in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the caller"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_available() -> bool:
+    """Whether pyarrow is installed for Parquet export"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_parquet(discs: Iterable[Disc], batch_size: int = 1000) -> Iterator[bytes]:
+    """
+    Serialize discs as a Parquet file with one row group per batch
+
+    Args:
+        discs: Discs to export
+        batch_size: Number of rows per row group
+
+    Yields:
+        Chunks of the Parquet file
+
+    Raises:
+        ExportUnavailable: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportUnavailable("Parquet export requires pyarrow") from e
+
+    schema = pa.schema([
+        (field, pa.float64() if field in _NUMERIC_FIELDS else pa.decimal128(12, 2) if field == "price" else pa.string())
+        for field in EXPORT_FIELDS
+    ])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(discs, batch_size):
+            writer.write_table(pa.Table.from_pylist([_row(disc) for disc in batch], schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def tap_batches(discs: Iterable[Disc], consume: Callable[[List[Disc]], object], batch_size: int = 200) -> Iterator[Disc]:
+    """
+    Pass discs through while handing them to a second consumer in batches
+
+    Lets a stream feed both an export and e.g. the price history without
+    collecting it first.
+
+    Args:
+        discs: Discs to pass through
+        consume: Called with each batch once its discs have been yielded
+        batch_size: Discs per batch
+
+    Yields:
+        The discs, unchanged
+    """
+    for batch in _batches(discs, batch_size):
+        yield from batch
+        consume(batch)
+
+
+def iter_export(discs: Iterable[Disc], export_format: str) -> Iterator[bytes]:
+    """
+    Serialize discs in the given export format
+
+    Args:
+        discs: Discs to export
+        export_format: One of EXPORT_FORMATS
+
+    Returns:
+        Iterator over chunks of the exported file
+    """
+    if export_format == "csv":
+        return iter_csv(discs)
+    if export_format == "jsonl":
+        return iter_jsonl(discs)
+    if export_format == "parquet":
+        return iter_parquet(discs)
+    raise ValueError(f"Unknown export format: {export_format}")
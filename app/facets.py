@@ -0,0 +1,65 @@
+"""
+Facet aggregation for search result sets
+"""
+from collections import Counter
+from typing import Dict, List
+
+from .models import Disc, FacetValue, HistogramBin, RangeFacet, SearchFacets
+
+TEXT_FACET_FIELDS = ('mold', 'plastic_type', 'plastic_color', 'rim_color', 'stamp_foil')
+RANGE_FACET_FIELDS = ('weight', 'scaled_weight', 'flatness', 'stiffness', 'price')
+
+
+def compute_facets(discs: List[Disc], bins: int = 10) -> SearchFacets:
+    """
+    Compute value counts and histograms for the filter UI in one pass over the discs
+
+    Args:
+        discs: Discs of a search result set
+        bins: Number of equal-width histogram bins per range field
+
+    Returns:
+        SearchFacets with value counts per text field and a histogram per range field
+    """
+    counters: Dict[str, Counter] = {field: Counter() for field in TEXT_FACET_FIELDS}
+    numbers: Dict[str, List[float]] = {field: [] for field in RANGE_FACET_FIELDS}
+
+    for disc in discs:
+        for field in TEXT_FACET_FIELDS:
+            value = getattr(disc, field)
+            if value:
+                counters[field][value] += 1
+        for field in RANGE_FACET_FIELDS:
+            value = getattr(disc, field)
+            if value is not None:
+                numbers[field].append(float(value))
+
+    values = {
+        field: [FacetValue(value=value, count=count) for value, count in sorted(counter.items())]
+        for field, counter in counters.items()
+    }
+    ranges = {field: _range_facet(field_values, bins) for field, field_values in numbers.items()}
+    return SearchFacets(values=values, ranges=ranges)
+
+
+def _range_facet(values: List[float], bins: int) -> RangeFacet:
+    if not values:
+        return RangeFacet(count=0)
+
+    low, high = min(values), max(values)
+    if high == low:
+        return RangeFacet(min=low, max=high, count=len(values), histogram=[
+            HistogramBin(start=low, end=high, count=len(values))
+        ])
+
+    width = (high - low) / bins
+    counts = [0] * bins
+    for value in values:
+        # The maximum falls into the last bin
+        counts[min(int((value - low) / width), bins - 1)] += 1
+
+    histogram = [
+        HistogramBin(start=round(low + i * width, 4), end=round(low + (i + 1) * width, 4), count=count)
+        for i, count in enumerate(counts)
+    ]
+    return RangeFacet(min=low, max=high, count=len(values), histogram=histogram)
@@ -1,6 +1,217 @@
-from typing import List
+import hashlib
+import heapq
+import json
+from enum import Enum
+from typing import Callable, List, NamedTuple, Optional
+from .cache import TTLCache
 from .models import Disc, DiscFilter
 
+TEXT_FILTER_FIELDS = ('mold', 'plastic_type', 'plastic_color', 'rim_color', 'stamp_foil')
+RANGE_FILTER_FIELDS = ('weight', 'scaled_weight', 'flatness', 'stiffness', 'price')
+SORT_FILTER_FIELDS = {'sort_by', 'sort_order', 'nulls', 'limit'}
+
+
+def filter_hash(filters: DiscFilter, include_sort: bool = True) -> str:
+    """
+    Compute a canonical hash of a filter
+    
+    Filters that select the same discs hash the same however they were built
+    (defaults, field order).
+    
+    Args:
+        filters: Filter to hash
+        include_sort: Include sorting and limit, not only the predicates
+        
+    Returns:
+        16-character hex hash
+    """
+    exclude = None if include_sort else SORT_FILTER_FIELDS
+    canonical = json.dumps(
+        filters.model_dump(mode='json', exclude_none=True, exclude=exclude), sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class FilterClause(NamedTuple):
+    """One active condition of a filter plan"""
+    field: str
+    predicate: Callable[[Disc], bool]
+    # Estimated fraction of discs passing; clauses run from most to least selective
+    selectivity: float
+
+
+def _needles(filter_value) -> Optional[tuple]:
+    if filter_value is None:
+        return None
+    return tuple(v.lower() for v in filter_value) if isinstance(filter_value, list) else (filter_value.lower(),)
+
+
+def _bounds(filters: DiscFilter, field: str) -> tuple:
+    min_val, max_val = getattr(filters, f"{field}_min"), getattr(filters, f"{field}_max")
+    if field == 'price':
+        # A zero price bound has always meant no bound
+        min_val, max_val = min_val or None, max_val or None
+    return min_val, max_val
+
+
+def _stock_set(stock) -> Optional[frozenset]:
+    if stock is None:
+        return None
+    return frozenset(stock) if isinstance(stock, list) else frozenset((stock,))
+
+
+def filter_narrows(narrow: DiscFilter, wide: DiscFilter) -> bool:
+    """
+    Check whether every disc passing one filter also passes another
+    
+    Only the predicates are compared, not sorting or limits. The check is
+    conservative: False means the filters could not be shown to nest.
+    
+    Args:
+        narrow: Filter that may be stricter
+        wide: Filter that may be looser
+        
+    Returns:
+        True if the discs matching narrow are a subset of those matching wide
+    """
+    for field in TEXT_FILTER_FIELDS:
+        wide_needles = _needles(getattr(wide, field))
+        if wide_needles is None:
+            continue
+        narrow_needles = _needles(getattr(narrow, field))
+        # A value containing a narrow needle also contains any needle inside it
+        if narrow_needles is None or not all(any(w in n for w in wide_needles) for n in narrow_needles):
+            return False
+    for field in RANGE_FILTER_FIELDS:
+        wide_min, wide_max = _bounds(wide, field)
+        narrow_min, narrow_max = _bounds(narrow, field)
+        if wide_min is not None and (narrow_min is None or narrow_min < wide_min):
+            return False
+        if wide_max is not None and (narrow_max is None or narrow_max > wide_max):
+            return False
+    wide_stock = _stock_set(wide.stock)
+    if wide_stock is not None:
+        narrow_stock = _stock_set(narrow.stock)
+        if narrow_stock is None or not narrow_stock <= wide_stock:
+            return False
+    return True
+
+
+def _text_clause(field: str, filter_value) -> FilterClause:
+    needles = _needles(filter_value)
+    
+    def predicate(disc: Disc) -> bool:
+        value = getattr(disc, field)
+        if value is None:
+            return False
+        value = value.lower()
+        return any(needle in value for needle in needles)
+    
+    return FilterClause(field, predicate, min(1.0, 0.2 * len(needles)))
+
+
+def _range_clause(field: str, min_val, max_val) -> FilterClause:
+    if field == 'price':
+        # Disc prices are Decimals too, so bounds compare without converting each disc
+        get = lambda disc: disc.price or None  # noqa: E731
+    else:
+        get = lambda disc: getattr(disc, field)  # noqa: E731
+    
+    if min_val is not None and max_val is not None:
+        def predicate(disc: Disc) -> bool:
+            value = get(disc)
+            return value is not None and min_val <= value <= max_val
+        selectivity = 0.3
+    elif min_val is not None:
+        def predicate(disc: Disc) -> bool:
+            value = get(disc)
+            return value is not None and value >= min_val
+        selectivity = 0.6
+    else:
+        def predicate(disc: Disc) -> bool:
+            value = get(disc)
+            return value is not None and value <= max_val
+        selectivity = 0.6
+    return FilterClause(field, predicate, selectivity)
+
+
+def _stock_clause(stock) -> FilterClause:
+    if isinstance(stock, list):
+        allowed = frozenset(stock)
+        return FilterClause('stock', lambda disc: disc.stock in allowed, min(1.0, 0.5 * len(allowed)))
+    return FilterClause('stock', lambda disc: disc.stock == stock, 0.5)
+
+
+class FilterPlan:
+    """
+    A DiscFilter compiled to only its active clauses
+    
+    Filter values are lowercased and bounds resolved once at compile time, and
+    clauses are ordered by estimated selectivity so most discs are rejected by
+    the first check.
+    """
+    
+    def __init__(self, clauses: List[FilterClause]):
+        self.clauses = sorted(clauses, key=lambda clause: clause.selectivity)
+        self._predicates = tuple(clause.predicate for clause in self.clauses)
+    
+    @classmethod
+    def compile(cls, filters: DiscFilter) -> 'FilterPlan':
+        """Build the plan of a filter"""
+        clauses = []
+        for field in TEXT_FILTER_FIELDS:
+            filter_value = getattr(filters, field)
+            if filter_value is not None:
+                clauses.append(_text_clause(field, filter_value))
+        for field in RANGE_FILTER_FIELDS:
+            min_val, max_val = _bounds(filters, field)
+            if min_val is not None or max_val is not None:
+                clauses.append(_range_clause(field, min_val, max_val))
+        if filters.stock is not None:
+            clauses.append(_stock_clause(filters.stock))
+        return cls(clauses)
+    
+    def matches(self, disc: Disc) -> bool:
+        """Check whether a disc passes every clause"""
+        for predicate in self._predicates:
+            if not predicate(disc):
+                return False
+        return True
+    
+    def filter(self, discs: List[Disc]) -> List[Disc]:
+        """Get the discs passing every clause, in their original order"""
+        if not self._predicates:
+            return list(discs)
+        return [disc for disc in discs if self.matches(disc)]
+    
+    def __len__(self) -> int:
+        return len(self.clauses)
+
+
+class SortKey(NamedTuple):
+    """One field of a sort spec"""
+    field: str
+    descending: bool
+
+
+class _Descending:
+    """Inverts the order of a value that cannot be negated, such as a string"""
+    __slots__ = ('value',)
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def __lt__(self, other):
+        return other.value < self.value
+    
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+# Compiled plans by filter hash; filters repeat across searches and pages
+_plan_cache = TTLCache(max_entries=256, ttl_seconds=3600.0)
+
+
 class DiscFilterService:
     """Service for filtering disc search results"""
     
@@ -18,26 +229,111 @@ class DiscFilterService:
         """
         if not filters:
             return discs
+        
+        filtered_discs = DiscFilterService.compile(filters).filter(discs)
+        
+        sort_keys = DiscFilterService.parse_sort_spec(filters.sort_by, filters.sort_order)
+        return DiscFilterService.sort_discs(filtered_discs, sort_keys, filters.nulls == 'first', filters.limit)
+    
+    @staticmethod
+    def parse_sort_spec(sort_by: Optional[str], default_order: Optional[str] = 'asc') -> List[SortKey]:
+        """
+        Parse a sort spec like "price asc, weight desc"
+        
+        Args:
+            sort_by: Comma-separated fields, each optionally followed by asc or desc
+            default_order: Direction of fields given without one
+            
+        Returns:
+            List of SortKey; fields that discs do not have are skipped
+        """
+        sort_keys = []
+        for part in (sort_by or '').split(','):
+            words = part.split()
+            if not words or words[0] not in Disc.model_fields:
+                continue
+            order = words[1].lower() if len(words) > 1 else (default_order or 'asc')
+            sort_keys.append(SortKey(words[0], order == 'desc'))
+        return sort_keys
+    
+    @staticmethod
+    def sort_key(sort_keys: List[SortKey], nulls_first: bool = False) -> Callable[[Disc], tuple]:
+        """
+        Build a key function ordering discs by several fields at once
+        
+        Each disc's key is computed once: a (missing, value) pair per field,
+        with descending numbers negated and descending strings wrapped so a
+        single ascending sort or heap orders every field correctly.
+        
+        Args:
+            sort_keys: Fields to sort by, most significant first
+            nulls_first: Put discs missing a value before the others
+            
+        Returns:
+            Function mapping a disc to its sort key
+        """
+        missing, present = (0, 1) if nulls_first else (1, 0)
+        
+        def key(disc: Disc) -> tuple:
+            parts = []
+            for field, descending in sort_keys:
+                value = getattr(disc, field)
+                if value is None:
+                    parts.append((missing, 0))
+                    continue
+                if isinstance(value, Enum):
+                    value = value.value
+                if isinstance(value, str):
+                    value = value.casefold()
+                    parts.append((present, _Descending(value) if descending else value))
+                else:
+                    parts.append((present, -value if descending else value))
+            return tuple(parts)
+        
+        return key
+    
+    @staticmethod
+    def sort_discs(discs: List[Disc], sort_keys: List[SortKey], nulls_first: bool = False,
+                   limit: Optional[int] = None) -> List[Disc]:
+        """
+        Sort discs by several fields, selecting only the top results when limited
+        
+        With a limit smaller than the input a heap selects the first discs
+        without sorting the rest. Ties keep their input order either way.
+        
+        Args:
+            discs: Discs to sort
+            sort_keys: Fields to sort by, most significant first
+            nulls_first: Put discs missing a value before the others
+            limit: Maximum number of discs to return
             
-        filtered_discs = []
-        
-        for disc in discs:
-            if DiscFilterService._matches_filters(disc, filters):
-                filtered_discs.append(disc)
-        
-        # Apply sorting
-        if filters.sort_by and hasattr(Disc, filters.sort_by):
-            reverse = filters.sort_order == 'desc'
-            try:
-                filtered_discs.sort(
-                    key=lambda d: getattr(d, filters.sort_by) or 0,
-                    reverse=reverse
-                )
-            except (TypeError, AttributeError):
-                # If sorting fails, just return unsorted results
-                pass
-        
-        return filtered_discs
+        Returns:
+            Sorted discs
+        """
+        if not sort_keys:
+            return discs[:limit] if limit else discs
+        key = DiscFilterService.sort_key(sort_keys, nulls_first)
+        if limit and limit < len(discs):
+            return heapq.nsmallest(limit, discs, key=key)
+        return sorted(discs, key=key)
+    
+    @staticmethod
+    def compile(filters: DiscFilter) -> FilterPlan:
+        """
+        Get the compiled plan of a filter, reusing plans of equal filters
+        
+        Args:
+            filters: DiscFilter object containing filter criteria
+            
+        Returns:
+            FilterPlan with the active clauses of the filter
+        """
+        key = filter_hash(filters, include_sort=False)
+        plan = _plan_cache.get(key)
+        if plan is None:
+            plan = FilterPlan.compile(filters)
+            _plan_cache.set(key, plan)
+        return plan
     
     @staticmethod
     def _matches_filters(disc: Disc, filters: DiscFilter) -> bool:
@@ -51,53 +347,7 @@ class DiscFilterService:
         Returns:
             True if disc matches all filters, False otherwise
         """
-        
-        # Text filters (exact match or list)
-        if not DiscFilterService._check_text_filter(disc.mold, filters.mold):
-            return False
-        if not DiscFilterService._check_text_filter(disc.plastic_type, filters.plastic_type):
-            return False
-        if not DiscFilterService._check_text_filter(disc.plastic_color, filters.plastic_color):
-            return False
-        if not DiscFilterService._check_text_filter(disc.rim_color, filters.rim_color):
-            return False
-        if not DiscFilterService._check_text_filter(disc.stamp_foil, filters.stamp_foil):
-            return False
-        
-        # Range filters
-        if not DiscFilterService._check_range_filter(
-            disc.weight, filters.weight_min, filters.weight_max
-        ):
-            return False
-        if not DiscFilterService._check_range_filter(
-            disc.scaled_weight, filters.scaled_weight_min, filters.scaled_weight_max
-        ):
-            return False
-        if not DiscFilterService._check_range_filter(
-            disc.flatness, filters.flatness_min, filters.flatness_max
-        ):
-            return False
-        if not DiscFilterService._check_range_filter(
-            disc.stiffness, filters.stiffness_min, filters.stiffness_max
-        ):
-            return False
-        if not DiscFilterService._check_range_filter(
-            float(disc.price) if disc.price else None,
-            float(filters.price_min) if filters.price_min else None,
-            float(filters.price_max) if filters.price_max else None
-        ):
-            return False
-        
-        # Stock filter
-        if filters.stock is not None:
-            if isinstance(filters.stock, list):
-                if disc.stock not in filters.stock:
-                    return False
-            else:
-                if disc.stock != filters.stock:
-                    return False
-        
-        return True
+        return DiscFilterService.compile(filters).matches(disc)
     
     @staticmethod
     def _check_text_filter(value: str, filter_value) -> bool:
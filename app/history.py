@@ -0,0 +1,345 @@
+"""
+Price and stock history for disc variants
+
+Only transitions are stored: a row is appended when the price or stock of a
+variant differs from its last recorded state. Prices are stored as integer
+cents and stock as a small integer code so each event costs a few bytes.
+"""
+import sqlite3
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Disc, StockStatus, HistoryPoint, VariantHistory
+from .identity import disc_id as make_disc_id, is_variant, keyed_disc_id
+
+logger = logging.getLogger(__name__)
+
+STOCK_CODES = {
+    StockStatus.UNKNOWN: 0,
+    StockStatus.IN_STOCK: 1,
+    StockStatus.OUT_OF_STOCK: 2,
+    StockStatus.LIMITED: 3,
+}
+STOCK_BY_CODE = {code: status for status, code in STOCK_CODES.items()}
+
+
+def _price_to_cents(price: Optional[Decimal]) -> Optional[int]:
+    return None if price is None else int((price * 100).to_integral_value())
+
+
+def _cents_to_price(cents: Optional[int]) -> Optional[Decimal]:
+    return None if cents is None else Decimal(cents) / 100
+
+
+class PriceHistoryStore:
+    """
+    Append-only store of per-variant price and stock transitions
+
+    Args:
+        db_path: Path of the SQLite file
+        max_cached_states: Variants whose last state is kept in memory, least recently seen dropped first
+    """
+
+    def __init__(self, db_path: str = "price_history.db", max_cached_states: int = 50_000):
+        self.db_path = db_path
+        self.max_cached_states = max_cached_states
+        self._initialized = False
+        self._lock = threading.Lock()
+        # variant (product_url, disc ID) -> (variant_id, price_cents, stock_code)
+        self._last_state: "OrderedDict[Tuple[str, str], Tuple[int, Optional[int], int]]" = OrderedDict()
+
+    @contextmanager
+    def get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self, conn) -> None:
+        if self._initialized:
+            return
+        columns = [row['name'] for row in conn.execute("PRAGMA table_info(variant_events)")]
+        if columns and 'id' not in columns:
+            # Files keyed by (variant_id, ts) replaced a transition when another came in the same second
+            conn.executescript("""
+                ALTER TABLE variant_events RENAME TO variant_events_by_second;
+                CREATE TABLE variant_events (
+                    id INTEGER PRIMARY KEY,
+                    variant_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    price_cents INTEGER,
+                    stock INTEGER NOT NULL
+                );
+                INSERT INTO variant_events (variant_id, ts, price_cents, stock)
+                SELECT variant_id, ts, price_cents, stock FROM variant_events_by_second ORDER BY variant_id, ts;
+                DROP TABLE variant_events_by_second;
+            """)
+            logger.info("Migrated price history events of %s to per-event keys", self.db_path)
+        variant_columns = [row['name'] for row in conn.execute("PRAGMA table_info(variants)")]
+        if 'variant_key' in variant_columns:
+            # Files keyed by variant key: the disc ID of each variant follows from its URL and key
+            conn.execute("ALTER TABLE variants RENAME COLUMN variant_key TO disc_id")
+            rows = conn.execute("SELECT id, product_url, disc_id FROM variants").fetchall()
+            conn.executemany("UPDATE variants SET disc_id = ? WHERE id = ?", [
+                (keyed_disc_id(row['product_url'], row['disc_id']), row['id']) for row in rows
+            ])
+            conn.commit()
+            logger.info("Migrated %s price history variants of %s to disc IDs", len(rows), self.db_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS variants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_url TEXT NOT NULL,
+                disc_id TEXT NOT NULL,
+                mold TEXT,
+                plastic_type TEXT,
+                plastic_color TEXT,
+                weight REAL,
+                UNIQUE(product_url, disc_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_variants_mold ON variants (mold COLLATE NOCASE);
+            CREATE TABLE IF NOT EXISTS variant_events (
+                id INTEGER PRIMARY KEY,
+                variant_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                price_cents INTEGER,
+                stock INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_variant_events_variant_ts ON variant_events (variant_id, ts);
+        """)
+        self._initialized = True
+
+    def _load_state(self, conn, product_url: str, key: str, disc: Disc) -> Tuple[int, Optional[int], Optional[int]]:
+        """Get (variant_id, last_price_cents, last_stock_code), creating the variant if needed"""
+        cached = self._last_state.get((product_url, key))
+        if cached is not None:
+            self._last_state.move_to_end((product_url, key))
+            return cached
+        conn.execute("""
+            INSERT OR IGNORE INTO variants (product_url, disc_id, mold, plastic_type, plastic_color, weight)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (product_url, key, disc.mold, disc.plastic_type, disc.plastic_color, disc.weight))
+        variant_id = conn.execute(
+            "SELECT id FROM variants WHERE product_url = ? AND disc_id = ?", (product_url, key)
+        ).fetchone()['id']
+        last = conn.execute("""
+            SELECT price_cents, stock FROM variant_events
+            WHERE variant_id = ? ORDER BY ts DESC, id DESC LIMIT 1
+        """, (variant_id,)).fetchone()
+        if last is None:
+            return variant_id, None, None
+        return variant_id, last['price_cents'], last['stock']
+
+    def _remember(self, variant: Tuple[str, str], state: Tuple[int, Optional[int], int]) -> None:
+        self._last_state[variant] = state
+        self._last_state.move_to_end(variant)
+        while len(self._last_state) > self.max_cached_states:
+            self._last_state.popitem(last=False)
+
+    def record_discs(self, discs: Iterable[Disc], timestamp: Optional[float] = None) -> int:
+        """
+        Record the current price and stock of scraped variants
+
+        Variants are keyed by Disc.id, which numbers identical rows of a page,
+        so any subset of a page's discs can be recorded.
+
+        Args:
+            discs: Discs parsed from product pages; search summaries are ignored
+            timestamp: Observation time (defaults to now)
+
+        Returns:
+            Number of transitions appended
+        """
+        variants = [disc for disc in discs if is_variant(disc)]
+        if not variants:
+            return 0
+
+        ts = int(time.time() if timestamp is None else timestamp)
+        appended = 0
+        with self._lock, self.get_connection() as conn:
+            self._ensure_schema(conn)
+            events = []
+            for disc in variants:
+                key = disc.id or make_disc_id(disc)
+                variant_id, last_price, last_stock = self._load_state(conn, disc.product_url, key, disc)
+                price_cents = _price_to_cents(disc.price)
+                stock_code = STOCK_CODES[disc.stock]
+                self._remember((disc.product_url, key), (variant_id, price_cents, stock_code))
+                if last_stock is not None and (last_price, last_stock) == (price_cents, stock_code):
+                    continue
+                events.append((variant_id, ts, price_cents, stock_code))
+            if events:
+                conn.executemany("""
+                    INSERT INTO variant_events (variant_id, ts, price_cents, stock)
+                    VALUES (?, ?, ?, ?)
+                """, events)
+                appended = len(events)
+            conn.commit()
+        if appended:
+            logger.debug("Recorded %s price/stock transitions", appended)
+        return appended
+
+    def get_series(
+        self,
+        product_url: Optional[str] = None,
+        disc_id: Optional[str] = None,
+        mold: Optional[str] = None,
+        since: Optional[float] = None,
+        bucket_seconds: Optional[int] = None,
+        limit: int = 200
+    ) -> List[VariantHistory]:
+        """
+        Get price and stock series for matching variants
+
+        Args:
+            product_url: Restrict to one product page
+            disc_id: Restrict to one variant by its Disc.id
+            mold: Restrict to a mold name (case-insensitive)
+            since: Only return transitions at or after this Unix time
+            bucket_seconds: Downsample to the last transition per time bucket
+            limit: Maximum number of variants returned
+
+        Returns:
+            List of VariantHistory, one per variant
+        """
+        clauses, params = [], []
+        if product_url:
+            clauses.append("v.product_url = ?")
+            params.append(product_url)
+        if disc_id:
+            clauses.append("v.disc_id = ?")
+            params.append(disc_id)
+        if mold:
+            clauses.append("v.mold = ? COLLATE NOCASE")
+            params.append(mold)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self.get_connection() as conn:
+            self._ensure_schema(conn)
+            variants = conn.execute(f"""
+                SELECT v.* FROM variants v {where} ORDER BY v.id LIMIT ?
+            """, (*params, limit)).fetchall()
+            if not variants:
+                return []
+
+            ids = [row['id'] for row in variants]
+            placeholders = ','.join('?' * len(ids))
+            event_params = list(ids)
+            since_clause = ""
+            if since is not None:
+                since_clause = "AND ts >= ?"
+                event_params.append(int(since))
+            events = conn.execute(f"""
+                SELECT variant_id, ts, price_cents, stock FROM variant_events
+                WHERE variant_id IN ({placeholders}) {since_clause}
+                ORDER BY variant_id, ts, id
+            """, event_params).fetchall()
+
+        points_by_variant: Dict[int, List[HistoryPoint]] = {}
+        for event in events:
+            points = points_by_variant.setdefault(event['variant_id'], [])
+            if bucket_seconds and points and points[-1].timestamp // bucket_seconds == event['ts'] // bucket_seconds:
+                points.pop()
+            points.append(HistoryPoint(
+                timestamp=event['ts'],
+                price=_cents_to_price(event['price_cents']),
+                stock=STOCK_BY_CODE.get(event['stock'], StockStatus.UNKNOWN)
+            ))
+
+        return [
+            VariantHistory(
+                product_url=row['product_url'],
+                disc_id=row['disc_id'],
+                mold=row['mold'],
+                plastic_type=row['plastic_type'],
+                plastic_color=row['plastic_color'],
+                weight=row['weight'],
+                points=points_by_variant.get(row['id'], [])
+            )
+            for row in variants
+        ]
+
+    def change_count(self, product_url: str, since_seconds: float = 7 * 86400) -> int:
+        """
+        Count recent transitions on a product page, used as a volatility signal
+
+        Args:
+            product_url: Product page URL
+            since_seconds: Look-back window
+
+        Returns:
+            Number of transitions recorded in the window
+        """
+        cutoff = int(time.time() - since_seconds)
+        with self.get_connection() as conn:
+            self._ensure_schema(conn)
+            row = conn.execute("""
+                SELECT COUNT(*) AS n FROM variant_events e
+                JOIN variants v ON v.id = e.variant_id
+                WHERE v.product_url = ? AND e.ts >= ?
+            """, (product_url, cutoff)).fetchone()
+            return row['n']
+
+    def known_molds(self) -> Dict[str, int]:
+        """Get the number of recorded variants per mold"""
+        with self.get_connection() as conn:
+            self._ensure_schema(conn)
+            rows = conn.execute("""
+                SELECT mold, COUNT(*) AS n FROM variants
+                WHERE mold IS NOT NULL GROUP BY mold
+            """).fetchall()
+            return {row['mold']: row['n'] for row in rows}
+
+    def apply_retention(
+        self,
+        max_age_days: float = 365,
+        downsample_after_days: float = 30,
+        downsample_bucket_seconds: int = 86400
+    ) -> int:
+        """
+        Downsample old transitions and drop expired ones
+
+        Transitions older than downsample_after_days are reduced to the last one
+        per variant and bucket. Transitions older than max_age_days are removed,
+        except the latest one per variant so its state stays known.
+
+        Args:
+            max_age_days: Age after which transitions are deleted
+            downsample_after_days: Age after which transitions are downsampled
+            downsample_bucket_seconds: Bucket size used for downsampling
+
+        Returns:
+            Number of rows removed
+        """
+        now = time.time()
+        expire_cutoff = int(now - max_age_days * 86400)
+        downsample_cutoff = int(now - downsample_after_days * 86400)
+        with self._lock, self.get_connection() as conn:
+            self._ensure_schema(conn)
+            before = conn.total_changes
+            conn.execute("""
+                DELETE FROM variant_events
+                WHERE ts < ? AND ts < (
+                    SELECT MAX(ts) FROM variant_events latest
+                    WHERE latest.variant_id = variant_events.variant_id
+                )
+            """, (expire_cutoff,))
+            conn.execute("""
+                DELETE FROM variant_events
+                WHERE ts < ? AND ts < (
+                    SELECT MAX(ts) FROM variant_events bucket
+                    WHERE bucket.variant_id = variant_events.variant_id
+                    AND bucket.ts / ? = variant_events.ts / ?
+                )
+            """, (downsample_cutoff, downsample_bucket_seconds, downsample_bucket_seconds))
+            conn.commit()
+            removed = conn.total_changes - before
+        logger.info("History retention removed %s transitions", removed)
+        return removed
@@ -0,0 +1,129 @@
+"""
+Stable identity for disc variants
+"""
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Set
+
+from .models import Disc
+
+# Row attributes that identify a physical disc; price and stock are excluded
+# because they change over the lifetime of the same disc.
+VARIANT_KEY_FIELDS = (
+    'plastic_color', 'rim_color', 'stamp_foil',
+    'weight', 'scaled_weight', 'flatness', 'stiffness'
+)
+
+
+def variant_key(disc: Disc) -> str:
+    """
+    Compute a deterministic key for a disc variant within its product page
+
+    Args:
+        disc: Disc parsed from a product page row
+
+    Returns:
+        16-character hex key that is stable across scrapes of the same row
+    """
+    parts = []
+    for field in VARIANT_KEY_FIELDS:
+        value = getattr(disc, field)
+        parts.append('' if value is None else str(value).strip().lower())
+    return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def disc_id(disc: Disc, occurrence: int = 0) -> str:
+    """
+    Compute a globally unique, deterministic ID for a disc variant
+
+    Search summaries (no variant attributes) are identified by their product
+    page, or by brand, mold and plastic when they have none.
+
+    Args:
+        disc: Disc parsed from a product page row or a search result
+        occurrence: How many identical rows precede this one on its page
+
+    Returns:
+        16-character hex ID combining the product URL and the variant key
+    """
+    if is_variant(disc):
+        key = variant_key(disc)
+    else:
+        name = '|'.join(str(value).strip().lower() for value in (disc.brand, disc.mold, disc.plastic_type))
+        key = f"summary#{'' if disc.product_url else name}"
+    if occurrence:
+        key = f"{key}#{occurrence}"
+    return keyed_disc_id(disc.product_url or '', key)
+
+
+def keyed_disc_id(product_url: str, key: str) -> str:
+    """
+    Compute a disc ID from its product URL and key
+
+    Args:
+        product_url: Product page of the disc
+        key: Key returned by variant_key, followed by "#<occurrence>" for the
+            second and later identical rows of a page
+
+    Returns:
+        16-character hex ID, the same disc_id returns for that row
+    """
+    return hashlib.blake2b(f"{product_url}#{key}".encode('utf-8'), digest_size=8).hexdigest()
+
+
+def unique_ids(discs: Iterable[Disc]) -> Iterator[Disc]:
+    """
+    Give every disc of one page an ID, numbering rows that repeat the same attributes
+
+    Two discs with identical rows are still two discs, so the second and later
+    copies get an ID derived from their occurrence instead of sharing one.
+    These IDs are positional: if an earlier identical row leaves the page, the
+    later copies are renumbered and take over its ID. Price history is keyed
+    by these IDs, and cart lookups fall back to the variant attributes when an
+    ID no longer matches.
+
+    Args:
+        discs: Discs of a single product page, in page order
+
+    Yields:
+        The same discs with their ID set
+    """
+    seen: Dict[str, int] = {}
+    for disc in discs:
+        base = disc_id(disc)
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        disc.id = disc_id(disc, occurrence) if occurrence else base
+        yield disc
+
+
+def dedupe_discs(discs: Iterable[Disc]) -> List[Disc]:
+    """
+    Remove discs that describe the same physical disc more than once
+
+    Discs with an ID already seen are dropped, as are search summaries of
+    product pages whose variants are in the results.
+
+    Args:
+        discs: Discs collected from one or more pages or sources
+
+    Returns:
+        Discs in their original order without duplicates
+    """
+    discs = list(discs)
+    detailed_pages = {disc.product_url for disc in discs if disc.product_url and is_variant(disc)}
+    seen: Set[str] = set()
+    unique = []
+    for disc in discs:
+        if not is_variant(disc) and disc.product_url in detailed_pages:
+            continue
+        key = disc.id or disc_id(disc)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(disc)
+    return unique
+
+
+def is_variant(disc: Disc) -> bool:
+    """Check whether a disc describes a single product page row rather than a search summary"""
+    return bool(disc.product_url) and any(getattr(disc, field) is not None for field in VARIANT_KEY_FIELDS)
@@ -1,21 +1,44 @@
 from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from typing import Optional
 import time
 import asyncio
+import itertools
 import logging
+import os
 
-from .models import SearchRequest, SearchResponse, DiscFilter, Disc
+from .models import SearchRequest, SearchResponse, DiscFilter, Disc, ChangeSet, HistoryResponse, RawRowText, SuggestResponse, CartVerifyRequest, CartVerifyResponse
 from .scraper import OTBDiscsScraper
-from .filters import DiscFilterService
+from .circuit import CircuitOpenError
+from .refresh import RefreshScheduler
+from .history import PriceHistoryStore
+from .querylog import QueryLog
+from .warmup import CacheWarmer
+from .suggest import SuggestIndex, SUGGEST_KINDS
+from .cart import verify_cart
+from .export import EXPORT_FORMATS, MEDIA_TYPES, iter_export, parquet_available, tap_batches
+from . import tracing
+from .tracing import configure_logging
+from .results import FilteredResultCache
+from .cache import SQLiteLease
 from .database import db
 
 # Setup logging
-logging.basicConfig(level=logging.DEBUG)
+configure_logging(
+    level=os.environ.get("LOG_LEVEL", "INFO"),
+    structured=os.environ.get("LOG_FORMAT", "plain") == "structured"
+)
 logger = logging.getLogger(__name__)
 
+# Requests slower than this dump their buffered debug trace
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 5000))
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 500))
+
+# Default latency budget of a search in milliseconds (0 waits for every page)
+SEARCH_DEADLINE_MS = float(os.environ.get("SEARCH_DEADLINE_MS", 25000))
+
 app = FastAPI(
     title="OTB Helper - Disc Golf Disc Finder",
     description="Search and filter disc golf discs from OTB Discs",
@@ -29,7 +52,103 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # Global scraper instance
-scraper = OTBDiscsScraper()
+scraper = OTBDiscsScraper(
+    page_cache_ttl=float(os.environ.get("PAGE_CACHE_TTL", 900)),
+    page_cache_size=int(os.environ.get("PAGE_CACHE_SIZE", 256)),
+    search_cache_ttl=float(os.environ.get("SEARCH_CACHE_TTL", 300)),
+    search_cache_size=int(os.environ.get("SEARCH_CACHE_SIZE", 128)),
+    search_stale_ttl=float(os.environ.get("SEARCH_STALE_TTL", 900)),
+    shared_cache_path=os.environ.get("SHARED_CACHE_PATH") or None,
+    page_cache_max_bytes=int(os.environ.get("PAGE_CACHE_MAX_BYTES", 64_000_000)) or None,
+    search_cache_max_bytes=int(os.environ.get("SEARCH_CACHE_MAX_BYTES", 32_000_000)) or None,
+    max_concurrent_requests=int(os.environ.get("OTB_MAX_CONCURRENT_REQUESTS", 5)),
+    max_search_pages=int(os.environ.get("SEARCH_MAX_PAGES", 5)),
+    use_store_api=os.environ.get("USE_STORE_API", "false").lower() == "true",
+    circuit_failure_threshold=int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5)),
+    circuit_recovery_seconds=float(os.environ.get("CIRCUIT_RECOVERY_SECONDS", 30)),
+    base_url=os.environ.get("OTB_BASE_URL", "https://otbdiscs.com"),
+    parse_workers=int(os.environ.get("PARSE_WORKERS", 0)),
+    parse_warm=os.environ.get("PARSE_WARM", "true").lower() == "true",
+    parse_memo_size=int(os.environ.get("PARSE_MEMO_SIZE", 512))
+)
+
+# Price and stock history of scraped variants
+history_store = PriceHistoryStore(os.environ.get("HISTORY_DB_PATH", "price_history.db"))
+
+# Background refresh of cached product pages (disabled when interval is 0)
+refresh_scheduler = RefreshScheduler(
+    scraper,
+    interval_seconds=float(os.environ.get("REFRESH_INTERVAL", 300)),
+    batch_size=int(os.environ.get("REFRESH_BATCH_SIZE", 3)),
+    volatility=history_store.change_count
+)
+refresh_scheduler.add_listener(lambda change_set: history_store.record_discs(c.disc for c in change_set.changes))
+
+# Search popularity and cache warm-up of the most popular searches (WARMUP_TOP_N=0 disables)
+query_log = QueryLog(
+    os.environ.get("QUERY_LOG_PATH", "query_log.jsonl"),
+    max_bytes=int(os.environ.get("QUERY_LOG_MAX_BYTES", 1_000_000)),
+    backup_count=int(os.environ.get("QUERY_LOG_BACKUPS", 3))
+)
+cache_warmer = CacheWarmer(
+    scraper,
+    query_log,
+    top_n=int(os.environ.get("WARMUP_TOP_N", 10)),
+    concurrency=int(os.environ.get("WARMUP_CONCURRENCY", 2)),
+    interval_seconds=float(os.environ.get("WARMUP_INTERVAL", 3600)),
+    # With a shared cache one worker warms it for all of them
+    lease=SQLiteLease(
+        scraper.shared_cache_path, "warmup", ttl_seconds=2 * float(os.environ.get("WARMUP_INTERVAL", 3600)) or 600
+    ) if scraper.shared_cache_path else None
+)
+
+# Autocomplete index of known molds, brands and plastics
+suggest_index = SuggestIndex()
+
+# Filtered and sorted results per cached search, reused as filters are adjusted
+filtered_results = FilteredResultCache(
+    max_versions=int(os.environ.get("FILTER_CACHE_SEARCHES", 64)),
+    max_filters=int(os.environ.get("FILTER_CACHE_FILTERS", 32))
+)
+
+def seed_suggest_index() -> None:
+    """Fill the autocomplete and mold relevance indexes from the database, history and query log"""
+    for brand in db.get_all_brands():
+        suggest_index.add(brand, 'brand')
+    for plastic in db.get_all_plastics():
+        suggest_index.add(plastic, 'plastic')
+    for mold, variants in history_store.known_molds().items():
+        suggest_index.add(mold, 'mold', variants)
+        scraper.relevance.add(mold)
+    suggest_index.record_searches(query_log.counts())
+    logger.info("Autocomplete index seeded with %s names", len(suggest_index))
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Buffer debug events per API request and dump them if the request is slow or fails"""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    
+    token = tracing.start_trace(f"{request.method} {request.url.path}", TRACE_BUFFER_SIZE)
+    trace = tracing.current_trace()
+    try:
+        response = await call_next(request)
+    except Exception:
+        trace.dump(logger, "failed")
+        raise
+    finally:
+        tracing.end_trace(token)
+    
+    if response.status_code >= 500:
+        trace.dump(logger, f"status {response.status_code}")
+    elif trace.elapsed_ms > SLOW_REQUEST_MS:
+        trace.dump(logger, "slow")
+    return response
+
+def require_site_url(url: str) -> None:
+    """Reject client-supplied URLs that are not on the OTB site before anything fetches them"""
+    if not scraper.is_site_url(url):
+        raise HTTPException(status_code=400, detail=f"URL must be on {scraper.base_url}")
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -39,7 +158,14 @@ async def read_root(request: Request):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "message": "OTB Helper is running!"}
+    return {
+        "status": "healthy",
+        "message": "OTB Helper is running!",
+        "warmup": cache_warmer.status(),
+        "upstream": scraper.breaker.snapshot(),
+        "parse_memo": scraper.parse_memo.stats(),
+        "filter_cache": filtered_results.stats()
+    }
 
 @app.get("/api/info")
 async def get_info():
@@ -50,48 +176,80 @@ async def get_info():
         "description": "Search and filter disc golf discs from OTB Discs"
     }
 
+@app.get("/api/suggest", response_model=SuggestResponse)
+async def suggest(q: str, limit: int = 10, kind: Optional[str] = None):
+    """
+    Suggest molds, brands and plastics starting with a partial name
+    """
+    if kind is not None and kind not in SUGGEST_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(SUGGEST_KINDS)}")
+    limit = max(1, min(limit, 50))
+    return SuggestResponse(query=q, suggestions=suggest_index.suggest(q, limit, kind))
+
 @app.post("/api/search", response_model=SearchResponse)
-async def search_discs(search_request: SearchRequest):
+async def search_discs(search_request: SearchRequest, background_tasks: BackgroundTasks):
     """
     Search for disc golf discs and apply filters
     """
     start_time = time.time()
     
     try:
-        logger.info(f"Searching for discs: {search_request.product_name}")
+        logger.info("Searching for discs: %s", search_request.product_name)
         
         # Perform the search
-        discs = await asyncio.get_event_loop().run_in_executor(
+        result_set = await asyncio.get_event_loop().run_in_executor(
             None, 
-            scraper.search_discs, 
+            tracing.bind(scraper.search_result_set), 
             search_request.product_name, 
-            search_request.max_results
+            search_request.max_results,
+            search_request.deadline_ms or SEARCH_DEADLINE_MS
         )
+        discs = result_set.discs
         
-        # Apply filters if provided
-        if search_request.filters:
-            discs = DiscFilterService.apply_filters(discs, search_request.filters)
+        # Track which product pages are popular so they are refreshed first
+        refresh_scheduler.record_pages({d.product_url for d in discs if d.product_url})
+        if not result_set.stale:
+            background_tasks.add_task(history_store.record_discs, discs)
+        background_tasks.add_task(suggest_index.add_discs, discs)
+        background_tasks.add_task(suggest_index.record_searches, {search_request.product_name: 1})
+        background_tasks.add_task(
+            query_log.record,
+            search_request.product_name,
+            search_request.max_results,
+            search_request.filters.model_dump(exclude_defaults=True) if search_request.filters else None
+        )
+        
+        # Apply filters if provided; the total counts matches beyond the filter's limit
+        discs, total_found = filtered_results.apply(result_set, search_request.filters)
         
         search_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         
         response = SearchResponse(
             query=search_request.product_name,
-            total_found=len(discs),
+            total_found=total_found,
             results=discs,
             filters_applied=search_request.filters,
-            search_time_ms=round(search_time, 2)
+            search_time_ms=round(search_time, 2),
+            facets=result_set.facets if search_request.include_facets else None,
+            stale=result_set.stale,
+            partial=bool(result_set.incomplete_pages),
+            incomplete_pages=result_set.incomplete_pages,
+            corrected_query=result_set.corrected_query
         )
         
-        logger.info(f"Search completed in {search_time:.2f}ms, found {len(discs)} discs")
+        logger.info("Search completed in %.2fms, found %s discs", search_time, len(discs))
         return response
         
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="OTB Discs is currently unavailable, please try again shortly")
     except Exception as e:
-        logger.error(f"Error during search: {e}")
+        logger.error("Error during search: %s", e)
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 @app.get("/api/search", response_model=SearchResponse)
 async def search_discs_get(
     product_name: str,
+    background_tasks: BackgroundTasks,
     max_results: Optional[int] = 50,
     # Filter parameters
     mold: Optional[str] = None,
@@ -110,7 +268,11 @@ async def search_discs_get(
     price_min: Optional[float] = None,
     price_max: Optional[float] = None,
     sort_by: Optional[str] = "price",
-    sort_order: Optional[str] = "asc"
+    sort_order: Optional[str] = "asc",
+    nulls: str = "last",
+    limit: Optional[int] = None,
+    include_facets: bool = False,
+    deadline_ms: Optional[int] = None
 ):
     """
     Search for disc golf discs with URL parameters (GET version)
@@ -134,17 +296,84 @@ async def search_discs_get(
         price_min=price_min,
         price_max=price_max,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        nulls=nulls,
+        limit=limit
     )
     
     # Create search request
     search_request = SearchRequest(
         product_name=product_name,
         filters=filters,
-        max_results=max_results
+        max_results=max_results,
+        include_facets=include_facets,
+        deadline_ms=deadline_ms
+    )
+    
+    return await search_discs(search_request, background_tasks)
+
+@app.post("/api/export")
+async def export_discs(search_request: SearchRequest, format: str = "csv"):
+    """
+    Stream search results as CSV, JSONL or Parquet, reusing cached result sets
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    
+    try:
+        result_set = await asyncio.get_event_loop().run_in_executor(
+            None,
+            tracing.bind(scraper.search_result_set),
+            search_request.product_name,
+            search_request.max_results,
+            search_request.deadline_ms or SEARCH_DEADLINE_MS
+        )
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="OTB Discs is currently unavailable, please try again shortly")
+    except Exception as e:
+        logger.error("Error during export search: %s", e)
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    
+    discs, _ = filtered_results.apply(result_set, search_request.filters)
+    logger.info("Exporting %s discs for %s as %s", len(discs), search_request.product_name, format)
+    
+    filename = "-".join("".join(c if c.isalnum() else " " for c in search_request.product_name.lower()).split()) or "discs"
+    return StreamingResponse(
+        iter_export(discs, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
     )
+
+@app.get("/api/export/page")
+async def export_product_page(url: str, format: str = "csv"):
+    """
+    Stream the variants of one product page as they are parsed, recording them in the price history
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    
+    require_site_url(url)
     
-    return await search_discs(search_request)
+    # Read up to the first variant before responding, so fetch errors get a status code
+    variants = scraper.iter_product_page(url)
+    try:
+        first = await asyncio.get_event_loop().run_in_executor(None, tracing.bind(next), variants, None)
+    except Exception as e:
+        logger.error("Error streaming %s: %s", url, e)
+        raise HTTPException(status_code=502, detail=f"Export failed: {str(e)}")
+    
+    discs = tap_batches(itertools.chain([first] if first is not None else [], variants), history_store.record_discs)
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    filename = "".join(c if c.isalnum() or c == "-" else "-" for c in slug) or "product"
+    return StreamingResponse(
+        iter_export(discs, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
 
 @app.post("/api/test-url", response_model=SearchResponse)
 async def test_specific_url(url_request: dict):
@@ -157,13 +386,14 @@ async def test_specific_url(url_request: dict):
         url = url_request.get("url")
         if not url:
             raise HTTPException(status_code=400, detail="URL is required")
+        require_site_url(url)
         
-        logger.info(f"Testing URL: {url}")
+        logger.info("Testing URL: %s", url)
         
         # Parse the specific product page
         discs = await asyncio.get_event_loop().run_in_executor(
             None, 
-            scraper.parse_product_page, 
+            tracing.bind(scraper.parse_product_page), 
             url
         )
         
@@ -177,21 +407,125 @@ async def test_specific_url(url_request: dict):
             search_time_ms=round(search_time, 2)
         )
         
-        logger.info(f"URL test completed in {search_time:.2f}ms, found {len(discs)} discs")
+        logger.info("URL test completed in %.2fms, found %s discs", search_time, len(discs))
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error during URL test: {e}")
+        logger.error("Error during URL test: %s", e)
         raise HTTPException(status_code=500, detail=f"URL test failed: {str(e)}")
 
+@app.post("/api/refresh", response_model=ChangeSet)
+async def refresh_product_page(url_request: dict):
+    """
+    Refresh stock and price of a cached OTB Discs product page
+    """
+    url = url_request.get("url")
+    if not url:
+        raise HTTPException(status_code=400, detail="URL is required")
+    require_site_url(url)
+    
+    try:
+        return await asyncio.get_event_loop().run_in_executor(
+            None,
+            tracing.bind(scraper.refresh_product_page),
+            url
+        )
+    except Exception as e:
+        logger.error("Error refreshing %s: %s", url, e)
+        raise HTTPException(status_code=502, detail=f"Refresh failed: {str(e)}")
+
+@app.post("/api/cart/verify", response_model=CartVerifyResponse)
+async def verify_cart_items(verify_request: CartVerifyRequest):
+    """
+    Check the current price and stock of cart items before checkout
+    """
+    return await asyncio.get_event_loop().run_in_executor(
+        None,
+        tracing.bind(verify_cart),
+        scraper,
+        verify_request.items,
+        verify_request.max_age_seconds
+    )
+
+@app.get("/api/disc/{disc_id}/raw", response_model=RawRowText)
+async def get_disc_raw_row_text(disc_id: str, product_url: Optional[str] = None):
+    """
+    Get the raw OTB table row text of a disc, used to find it on the product page
+    """
+    if product_url:
+        require_site_url(product_url)
+    raw_row_text = await asyncio.get_event_loop().run_in_executor(
+        None,
+        tracing.bind(scraper.get_raw_row_text),
+        disc_id,
+        product_url
+    )
+    if raw_row_text is None:
+        raise HTTPException(status_code=404, detail="Disc not found")
+    return RawRowText(id=disc_id, raw_row_text=raw_row_text)
+
+@app.get("/api/history", response_model=HistoryResponse)
+async def get_history(
+    product_url: Optional[str] = None,
+    disc_id: Optional[str] = None,
+    mold: Optional[str] = None,
+    since: Optional[float] = None,
+    bucket_seconds: Optional[int] = None,
+    limit: int = 200
+):
+    """
+    Get price and stock history for a mold, product page or single variant
+    
+    A single variant is selected by disc_id, the id of a disc in search or
+    export results.
+    """
+    if not (product_url or disc_id or mold):
+        raise HTTPException(status_code=400, detail="product_url, disc_id or mold is required")
+    
+    series = await asyncio.get_event_loop().run_in_executor(
+        None,
+        lambda: history_store.get_series(
+            product_url=product_url,
+            disc_id=disc_id,
+            mold=mold,
+            since=since,
+            bucket_seconds=bucket_seconds,
+            limit=limit
+        )
+    )
+    return HistoryResponse(total_variants=len(series), series=series)
+
+
+def apply_history_retention() -> None:
+    """Downsample and expire old price history; runs in the background at startup"""
+    try:
+        history_store.apply_retention(
+            max_age_days=float(os.environ.get("HISTORY_RETENTION_DAYS", 365)),
+            downsample_after_days=float(os.environ.get("HISTORY_DOWNSAMPLE_AFTER_DAYS", 30))
+        )
+    except Exception as e:
+        logger.error("History retention failed: %s", e)
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background jobs"""
+    if refresh_scheduler.interval_seconds > 0:
+        refresh_scheduler.start()
+    if cache_warmer.top_n > 0:
+        cache_warmer.start()
+    asyncio.get_event_loop().run_in_executor(None, seed_suggest_index)
+    asyncio.get_event_loop().run_in_executor(None, apply_history_retention)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    refresh_scheduler.stop()
+    cache_warmer.stop()
     scraper.close()
 
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
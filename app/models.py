@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict
 from enum import Enum
 from decimal import Decimal
 
@@ -12,6 +12,9 @@ class StockStatus(str, Enum):
 class Disc(BaseModel):
     """Model representing a disc golf disc from OTB Discs"""
     
+    # Stable ID from the product URL and row attributes, set at parse time for variants and search summaries
+    id: Optional[str] = None
+    
     # Basic product info
     brand: str
     mold: str
@@ -35,7 +38,7 @@ class Disc(BaseModel):
     image_url: Optional[str] = None
     sku: Optional[str] = None
     description: Optional[str] = None
-    raw_row_text: Optional[str] = Field(None, description="Raw text from the OTB product table row for exact matching")
+    raw_row_text: Optional[str] = Field(None, description="Raw text from the OTB product table row for exact matching; fetch via /api/disc/{id}/raw")
     
     @field_validator('weight', 'scaled_weight', 'flatness', 'stiffness')
     @classmethod
@@ -77,19 +80,172 @@ class DiscFilter(BaseModel):
     stock: Optional[Union[StockStatus, List[StockStatus]]] = None
     
     # Sorting options
-    sort_by: Optional[str] = Field("price", description="Field to sort by")
-    sort_order: Optional[str] = Field("asc", pattern="^(asc|desc)$", description="Sort order")
+    sort_by: Optional[str] = Field(
+        "price", description="Field to sort by, or several with directions like 'price asc, weight desc'"
+    )
+    sort_order: Optional[str] = Field("asc", pattern="^(asc|desc)$", description="Sort order of fields without a direction")
+    nulls: str = Field("last", pattern="^(first|last)$", description="Place discs missing a sort value first or last")
+    limit: Optional[int] = Field(None, ge=1, description="Return only the first results after sorting")
+    
+    @field_validator('sort_by')
+    @classmethod
+    def validate_sort_by(cls, v):
+        if not v or not v.strip():
+            return v
+        for part in v.split(','):
+            words = part.split()
+            if not words or len(words) > 2 or (len(words) == 2 and words[1].lower() not in ('asc', 'desc')):
+                raise ValueError(f"Invalid sort spec '{part.strip()}', expected 'field [asc|desc]'")
+        return v
+
+class FacetValue(BaseModel):
+    """Count of discs with one value of a text field"""
+    value: str
+    count: int
+
+class HistogramBin(BaseModel):
+    """Count of discs with a numeric value in [start, end)"""
+    start: float
+    end: float
+    count: int
+
+class RangeFacet(BaseModel):
+    """Value range and histogram of a numeric field"""
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int = 0
+    histogram: List[HistogramBin] = []
+
+class SearchFacets(BaseModel):
+    """Precomputed filter options for a search result set"""
+    values: Dict[str, List[FacetValue]] = {}
+    ranges: Dict[str, RangeFacet] = {}
 
 class SearchRequest(BaseModel):
     """Model for disc search requests"""
     product_name: str = Field(..., description="Name of the disc to search for")
     filters: Optional[DiscFilter] = None
     max_results: Optional[int] = Field(50, ge=1, le=200, description="Maximum number of results")
+    include_facets: bool = Field(False, description="Return value counts and histograms of the unfiltered results")
+    deadline_ms: Optional[int] = Field(None, ge=100, le=120000, description="Latency budget; pages not fetched in time are summarized")
 
 class SearchResponse(BaseModel):
     """Model for search response"""
     query: str
-    total_found: int
+    total_found: int = Field(..., description="Discs matching the filters, including any beyond the filter's limit")
     results: List[Disc]
     filters_applied: Optional[DiscFilter] = None
-    search_time_ms: Optional[float] = None
\ No newline at end of file
+    search_time_ms: Optional[float] = None
+    facets: Optional[SearchFacets] = None
+    stale: bool = Field(False, description="Results were served from cache past their freshness window")
+    partial: bool = Field(False, description="Some pages were not fetched within the deadline")
+    incomplete_pages: List[str] = Field([], description="Pages that were summarized or skipped because of the deadline")
+    corrected_query: Optional[str] = Field(None, description="Misspelling-corrected term the results are for, when the query as typed found nothing")
+
+class ProductPageSnapshot(BaseModel):
+    """Parsed product page kept in the page cache"""
+    url: str
+    brand: str
+    mold: str
+    plastic_type: str
+    headers: List[str] = []
+    column_map: Dict[str, int] = {}
+    discs: List[Disc] = []
+    row_cells: List[List[str]] = Field([], description="Stripped cell texts of each disc's table row")
+    row_indexes: List[int] = Field([], description="Position of each disc's row among the table's variant rows")
+    table_rows: Optional[int] = Field(None, description="Variant rows in the table, including rows that did not parse")
+    fetched_at: float = Field(..., description="Unix time the page was last fetched")
+
+class DiscChange(BaseModel):
+    """Stock or price change detected for a cached disc variant"""
+    row_index: int
+    old_price: Optional[Decimal] = None
+    new_price: Optional[Decimal] = None
+    old_stock: StockStatus = StockStatus.UNKNOWN
+    new_stock: StockStatus = StockStatus.UNKNOWN
+    disc: Disc
+
+class ChangeSet(BaseModel):
+    """Result of refreshing a cached product page"""
+    product_url: str
+    changes: List[DiscChange] = []
+    rows_checked: int = 0
+    full_rescrape: bool = Field(False, description="True if the page layout changed and was fully reparsed")
+    refreshed_at: float
+
+class HistoryPoint(BaseModel):
+    """Price and stock of a disc variant from a point in time onwards"""
+    timestamp: int = Field(..., description="Unix time of the change")
+    price: Optional[Decimal] = None
+    stock: StockStatus = StockStatus.UNKNOWN
+
+class VariantHistory(BaseModel):
+    """Price and stock transitions recorded for one disc variant"""
+    product_url: str
+    disc_id: str = Field(..., description="Disc.id of the variant, as returned by search and export")
+    mold: Optional[str] = None
+    plastic_type: Optional[str] = None
+    plastic_color: Optional[str] = None
+    weight: Optional[float] = None
+    points: List[HistoryPoint] = []
+
+class HistoryResponse(BaseModel):
+    """Model for history response"""
+    total_variants: int
+    series: List[VariantHistory]
+
+class RawRowText(BaseModel):
+    """Raw OTB table row text of a disc variant"""
+    id: str
+    raw_row_text: Optional[str] = None
+
+class Suggestion(BaseModel):
+    """Autocomplete suggestion for the search box"""
+    value: str
+    kind: str = Field(..., description="mold, brand or plastic")
+    searches: int = Field(0, description="Number of times the name was searched")
+    seen: int = Field(0, description="Number of scraped results the name appeared in")
+
+class SuggestResponse(BaseModel):
+    """Model for autocomplete responses"""
+    query: str
+    suggestions: List[Suggestion]
+
+class CartItem(BaseModel):
+    """Cart item as saved by the frontend, identified by its disc ID or variant attributes"""
+    disc_id: Optional[str] = Field(None, description="Disc ID returned by search")
+    product_url: str
+    plastic_color: Optional[str] = None
+    rim_color: Optional[str] = None
+    stamp_foil: Optional[str] = None
+    weight: Optional[float] = None
+    scaled_weight: Optional[float] = None
+    flatness: Optional[float] = None
+    stiffness: Optional[float] = None
+    price: Optional[Decimal] = Field(None, description="Price when the item was added")
+    stock: Optional[StockStatus] = None
+
+class CartVerifyRequest(BaseModel):
+    """Model for cart verification requests"""
+    items: List[CartItem] = Field(..., max_length=200)
+    max_age_seconds: float = Field(120, ge=0, description="Reuse cached product pages fetched at most this long ago")
+
+class CartItemStatus(BaseModel):
+    """Current state of one cart item"""
+    index: int = Field(..., description="Position of the item in the request")
+    disc_id: Optional[str] = None
+    product_url: str
+    found: bool = Field(..., description="The variant is still listed on its product page")
+    available: bool = Field(..., description="Found and not out of stock")
+    price: Optional[Decimal] = None
+    old_price: Optional[Decimal] = None
+    price_changed: bool = False
+    stock: StockStatus = StockStatus.UNKNOWN
+    disc: Optional[Disc] = None
+
+class CartVerifyResponse(BaseModel):
+    """Model for cart verification responses"""
+    items: List[CartItemStatus]
+    pages_checked: int
+    failed_pages: List[str] = []
+    verified_at: float
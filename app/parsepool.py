@@ -0,0 +1,135 @@
+"""
+Product page parsing in worker processes
+
+Parsing a product page (BeautifulSoup and the row parser) is pure-Python CPU
+work, so concurrent searches serialize on the GIL once their pages have
+arrived. A ParsePool sends raw page bytes to worker processes and gets back a
+compact record per page: the snapshot fields with each disc as a tuple of
+field values, which is cheaper to pickle than the models.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Iterable, List, Optional, Tuple
+
+from .deadline import DeadlineExceeded, current_deadline
+from .models import Disc, ProductPageSnapshot
+
+logger = logging.getLogger(__name__)
+
+DISC_FIELDS = tuple(Disc.model_fields)
+
+# Scraper used for parsing inside each worker process
+_worker_scraper = None
+
+
+def _init_worker() -> None:
+    global _worker_scraper
+    from .scraper import OTBDiscsScraper
+    _worker_scraper = OTBDiscsScraper(page_cache_size=1, search_cache_size=1)
+
+
+def _ping(_: int) -> int:
+    return os.getpid()
+
+
+def _parse_record(content: bytes, url: str, use_embedded: bool = True) -> Optional[tuple]:
+    """Parse a page in a worker and pack the snapshot as a compact record"""
+    snapshot = _worker_scraper._parse_product_html(content, url, use_embedded)
+    if snapshot is None:
+        return None
+    discs = [tuple(getattr(disc, field) for field in DISC_FIELDS) for disc in snapshot.discs]
+    return (snapshot.url, snapshot.brand, snapshot.mold, snapshot.plastic_type, snapshot.headers,
+            snapshot.column_map, discs, snapshot.row_cells, snapshot.row_indexes, snapshot.table_rows,
+            snapshot.fetched_at)
+
+
+def _parse_record_args(page: Tuple[bytes, str]) -> Optional[tuple]:
+    return _parse_record(*page)
+
+
+def _unpack(record: Optional[tuple]) -> Optional[ProductPageSnapshot]:
+    """Rebuild a snapshot from a worker record; the values were validated in the worker"""
+    if record is None:
+        return None
+    url, brand, mold, plastic_type, headers, column_map, discs, row_cells, row_indexes, table_rows, fetched_at = record
+    return ProductPageSnapshot.model_construct(
+        url=url, brand=brand, mold=mold, plastic_type=plastic_type, headers=headers, column_map=column_map,
+        discs=[Disc.model_construct(**dict(zip(DISC_FIELDS, values))) for values in discs],
+        row_cells=row_cells, row_indexes=row_indexes, table_rows=table_rows, fetched_at=fetched_at
+    )
+
+
+class ParsePool:
+    """
+    Pool of worker processes parsing product pages
+
+    Workers are started with the spawn method, since forking a process that
+    runs request threads can copy locks in a held state.
+
+    Args:
+        workers: Number of worker processes (defaults to the CPU count)
+        chunk_size: Pages sent to a worker per task by parse_many
+        warm: Start every worker now instead of on the first parse
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 4, warm: bool = True):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        if warm:
+            self.warm()
+
+    def warm(self) -> None:
+        """Start the worker processes and import the parser in each of them"""
+        pids = set(self._executor.map(_ping, range(self.workers)))
+        logger.info("Started %s parse workers", len(pids))
+
+    def parse(self, content: bytes, url: str, use_embedded: bool = True) -> Optional[ProductPageSnapshot]:
+        """
+        Parse one product page in a worker
+
+        Waits at most until the deadline of the current search, if there is one.
+
+        Args:
+            content: Raw HTML of the product page
+            url: URL of the product page
+            use_embedded: Try the embedded variation JSON first
+
+        Returns:
+            ProductPageSnapshot or None if the page has no product title
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the page is parsed
+        """
+        future = self._executor.submit(_parse_record, content, url, use_embedded)
+        deadline = current_deadline()
+        try:
+            record = future.result(timeout=deadline.remaining() if deadline else None)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise DeadlineExceeded(f"Parsing {url} did not finish within the deadline")
+        return _unpack(record)
+
+    def parse_many(self, pages: Iterable[Tuple[bytes, str]]) -> List[Optional[ProductPageSnapshot]]:
+        """
+        Parse several product pages, chunk_size pages per worker task
+
+        Args:
+            pages: (content, url) pairs
+
+        Returns:
+            Snapshots in the order of the pages
+        """
+        records = self._executor.map(_parse_record_args, pages, chunksize=self.chunk_size)
+        return [_unpack(record) for record in records]
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
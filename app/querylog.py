@@ -0,0 +1,121 @@
+"""
+Rotated log of normalized search queries and their popularity
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a search term so equivalent searches are counted together"""
+    return " ".join(term.lower().split())
+
+
+class QueryLog:
+    """
+    Append-only JSON lines log of searches with aggregated popularity counts
+
+    The log file is rotated like logging.handlers.RotatingFileHandler
+    (query_log.jsonl -> query_log.jsonl.1 -> ...). Counts are loaded from the
+    current file and its backups on first use after startup and then include
+    every search recorded since, even once its file has been rotated out;
+    after a restart only the files still present are counted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 1_000_000, backup_count: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._counts: Counter = Counter()
+        self._loaded = not path
+        self._lock = threading.Lock()
+
+    def record(self, product_name: str, max_results: Optional[int] = None, filters: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record one search
+
+        Args:
+            product_name: Search term as entered
+            max_results: Maximum number of results requested
+            filters: Filters applied to the search, if any
+        """
+        term = normalize_term(product_name)
+        if not term:
+            return
+        entry = {"ts": round(time.time(), 3), "term": term, "max_results": max_results}
+        if filters:
+            entry["filters"] = filters
+
+        with self._lock:
+            self._ensure_loaded()
+            self._counts[(term, max_results)] += 1
+            if not self.path:
+                return
+            try:
+                self._rotate_if_needed()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            except OSError as e:
+                logger.warning("Could not write query log %s: %s", self.path, e)
+
+    def top(self, n: int) -> List[Tuple[str, Optional[int]]]:
+        """
+        Get the most popular searches
+
+        Args:
+            n: Number of searches to return
+
+        Returns:
+            List of (term, max_results) tuples, most popular first
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return [key for key, _ in self._counts.most_common(n)]
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of searches per normalized term"""
+        with self._lock:
+            self._ensure_loaded()
+            totals: Counter = Counter()
+            for (term, _), count in self._counts.items():
+                totals[term] += count
+            return dict(totals)
+
+    def _files(self) -> List[str]:
+        """Log files from oldest to newest"""
+        backups = [f"{self.path}.{i}" for i in range(self.backup_count, 0, -1)]
+        return [p for p in backups + [self.path] if os.path.exists(p)]
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        for file_path in self._files():
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            self._counts[(entry["term"], entry.get("max_results"))] += 1
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except OSError as e:
+                logger.warning("Could not read query log %s: %s", file_path, e)
+
+    def _rotate_if_needed(self) -> None:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.max_bytes:
+            return
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
@@ -0,0 +1,148 @@
+"""
+Background refresh of cached product pages
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .models import ChangeSet
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Keeps popular cached product pages fresh by refreshing their stock and price"""
+
+    def __init__(
+        self,
+        scraper,
+        interval_seconds: float = 300.0,
+        batch_size: int = 3,
+        min_age_seconds: float = 120.0,
+        popularity_half_life: float = 3600.0,
+        volatility: Optional[Callable[[str], float]] = None
+    ):
+        self.scraper = scraper
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.min_age_seconds = min_age_seconds
+        self.popularity_half_life = popularity_half_life
+        self.volatility = volatility
+        self._popularity: Dict[str, float] = {}
+        self._popularity_updated: Dict[str, float] = {}
+        self._listeners: List[Callable[[ChangeSet], None]] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_pages(self, urls: Iterable[str]) -> None:
+        """
+        Record that product pages were part of a search result
+
+        Args:
+            urls: Product page URLs returned by a search
+        """
+        now = time.time()
+        with self._lock:
+            for url in urls:
+                self._popularity[url] = self._decayed_popularity(url, now) + 1.0
+                self._popularity_updated[url] = now
+
+    def add_listener(self, listener: Callable[[ChangeSet], None]) -> None:
+        """Register a callback that receives every non-empty ChangeSet"""
+        self._listeners.append(listener)
+
+    def _decayed_popularity(self, url: str, now: float) -> float:
+        popularity = self._popularity.get(url, 0.0)
+        if not popularity:
+            return 0.0
+        elapsed = now - self._popularity_updated.get(url, now)
+        return popularity * 0.5 ** (elapsed / self.popularity_half_life)
+
+    def priority(self, url: str, fetched_at: float, now: Optional[float] = None) -> float:
+        """
+        Score a cached page for refresh; higher scores are refreshed first
+
+        Args:
+            url: Product page URL
+            fetched_at: Unix time the page was last fetched
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Priority score, 0 if the page is too young to refresh
+        """
+        now = time.time() if now is None else now
+        age = now - fetched_at
+        if age < self.min_age_seconds:
+            return 0.0
+        with self._lock:
+            popularity = self._decayed_popularity(url, now)
+        score = (1.0 + popularity) * age
+        if self.volatility:
+            # Pages whose discs change often go stale sooner
+            try:
+                score *= 1.0 + self.volatility(url)
+            except Exception as e:
+                logger.warning("Could not get volatility for %s: %s", url, e)
+        return score
+
+    def select_pages(self, now: Optional[float] = None) -> List[str]:
+        """Pick the highest-priority cached pages for the next refresh batch"""
+        now = time.time() if now is None else now
+        scored = []
+        for url in self.scraper.page_cache.keys():
+            entry = self.scraper.page_cache.get_entry(url)
+            if entry is None:
+                continue
+            score = self.priority(url, entry[0].fetched_at, now)
+            if score > 0:
+                scored.append((score, url))
+        scored.sort(reverse=True)
+        return [url for _, url in scored[:self.batch_size]]
+
+    def run_once(self) -> List[ChangeSet]:
+        """
+        Refresh one batch of cached pages and notify listeners
+
+        Returns:
+            List of ChangeSet objects, one per refreshed page
+        """
+        change_sets = []
+        for url in self.select_pages():
+            try:
+                change_set = self.scraper.refresh_product_page(url)
+            except Exception as e:
+                logger.error("Error refreshing %s: %s", url, e)
+                continue
+            change_sets.append(change_set)
+            if change_set.changes:
+                for listener in self._listeners:
+                    try:
+                        listener(change_set)
+                    except Exception as e:
+                        logger.error("Refresh listener failed for %s: %s", url, e)
+        return change_sets
+
+    def start(self) -> None:
+        """Start refreshing in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="otb-refresh", daemon=True)
+        self._thread.start()
+        logger.info("Refresh scheduler started (interval %ss)", self.interval_seconds)
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            change_sets = self.run_once()
+            if change_sets:
+                changed = sum(len(cs.changes) for cs in change_sets)
+                logger.info("Refreshed %s cached pages, %s discs changed", len(change_sets), changed)
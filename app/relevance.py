@@ -0,0 +1,213 @@
+"""
+Fuzzy relevance of product molds to search terms
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .querylog import normalize_term
+
+
+@lru_cache(maxsize=4096)
+def trigrams(word: str) -> FrozenSet[str]:
+    """Get the padded character trigrams of a lowercase word"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the trigram sets of two lowercase words"""
+    ta, tb = trigrams(a), trigrams(b)
+    shared = len(ta & tb)
+    return shared / (len(ta) + len(tb) - shared) if shared else 0.0
+
+
+def word_matches(search_word: str, word: str) -> bool:
+    """Exact, prefix or suffix word match used before falling back to fuzzy matching"""
+    return search_word == word or word.startswith(search_word) or word.endswith(search_word)
+
+
+class MoldMatcher:
+    """
+    Trigram index over the words of known mold names
+
+    Used to decide whether a product's mold is relevant to a search and to
+    correct misspelled search terms before they are sent to OTB. Trigram sets
+    are cached per word, so repeated comparisons never re-split strings.
+
+    Short words share most of their few trigrams after a single changed letter
+    ("heal" and "heat" score 0.43), so search words of up to short_word_length
+    characters need short_word_threshold to match fuzzily.
+
+    Args:
+        molds: Known mold names
+        threshold: Minimum similarity for a fuzzy word match
+        short_word_length: Search words up to this length are short
+        short_word_threshold: Minimum similarity for a fuzzy match of a short word
+    """
+
+    def __init__(
+        self,
+        molds: Iterable[str] = (),
+        threshold: float = 0.4,
+        short_word_length: int = 4,
+        short_word_threshold: float = 0.5
+    ):
+        self.threshold = threshold
+        self.short_word_length = short_word_length
+        self.short_word_threshold = short_word_threshold
+        self._molds: Dict[str, str] = {}
+        self._words: List[str] = []
+        self._word_set: Set[str] = set()
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._molds_by_word: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self.add_many(molds)
+
+    def add(self, mold: Optional[str]) -> None:
+        """Add a known mold name"""
+        normalized = normalize_term(mold or '')
+        if not normalized or normalized in self._molds:
+            return
+        with self._lock:
+            self._molds[normalized] = mold.strip()
+            for word in normalized.split():
+                self._molds_by_word[word].add(normalized)
+                if word in self._word_set:
+                    continue
+                self._word_set.add(word)
+                self._words.insert(bisect_left(self._words, word), word)
+                for gram in trigrams(word):
+                    self._index[gram].add(word)
+
+    def add_many(self, molds: Iterable[str]) -> None:
+        """Add several known mold names"""
+        for mold in molds:
+            self.add(mold)
+
+    def _is_known_prefix(self, word: str) -> bool:
+        i = bisect_left(self._words, word)
+        return i < len(self._words) and self._words[i].startswith(word)
+
+    def min_similarity(self, word: str) -> float:
+        """Get the similarity a search word needs to match a different mold word"""
+        return self.short_word_threshold if len(word) <= self.short_word_length else self.threshold
+
+    def word_candidates(self, word: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Get known mold words similar to a search word
+
+        Args:
+            word: Lowercase search word
+            limit: Maximum number of candidates
+
+        Returns:
+            List of (word, score) tuples, best first
+        """
+        query_grams = trigrams(word)
+        shared: Dict[str, int] = defaultdict(int)
+        with self._lock:
+            for gram in query_grams:
+                for candidate in self._index.get(gram, ()):
+                    shared[candidate] += 1
+        scored = [
+            (candidate, count / (len(query_grams) + len(trigrams(candidate)) - count))
+            for candidate, count in shared.items()
+        ]
+        scored.sort(key=lambda c: (-c[1], c[0]))
+        return scored[:limit]
+
+    def candidates(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Get known molds scored against a search term
+
+        Args:
+            query: Search term as entered
+            limit: Maximum number of candidates
+
+        Returns:
+            List of (mold name, score) tuples, best first
+        """
+        words = normalize_term(query).split()
+        if not words:
+            return []
+        pool: Set[str] = set()
+        with self._lock:
+            for word in words:
+                start = bisect_left(self._words, word)
+                end = bisect_left(self._words, word + '\uffff', start)
+                matched = self._words[start:end]
+                for known_word in matched:
+                    pool |= self._molds_by_word[known_word]
+                if not matched:
+                    for known_word, _ in self.word_candidates(word, limit=limit):
+                        pool |= self._molds_by_word[known_word]
+        scored = []
+        for normalized in pool:
+            score = self._score_words(words, normalized.split())
+            if score > 0:
+                scored.append((self._molds[normalized], score))
+        scored.sort(key=lambda c: (-c[1], len(c[0]), c[0]))
+        return scored[:limit]
+
+    def rewrite(self, query: str) -> str:
+        """
+        Correct misspelled words of a search term against known mold words
+
+        Words that are known, or a prefix of a known word, are kept as typed.
+
+        Args:
+            query: Search term as entered
+
+        Returns:
+            Corrected search term, or the normalized term if nothing changed
+        """
+        words = normalize_term(query).split()
+        rewritten = []
+        for word in words:
+            if word in self._word_set or self._is_known_prefix(word):
+                rewritten.append(word)
+                continue
+            best = self.word_candidates(word, limit=1)
+            rewritten.append(best[0][0] if best and best[0][1] >= self.min_similarity(word) else word)
+        return ' '.join(rewritten)
+
+    def score(self, mold_name: str, search_term: str) -> float:
+        """
+        Score how relevant a product mold is to a search term
+
+        Args:
+            mold_name: Mold name parsed from a product
+            search_term: Search term as entered
+
+        Returns:
+            Score of the worst-matching search word: 1.0 for exact, prefix or
+            suffix matches, otherwise its trigram similarity to the closest mold
+            word, or 0.0 if that is below min_similarity for the word
+        """
+        if not mold_name or not search_term:
+            return 0.0
+        return self._score_words(normalize_term(search_term).split(), normalize_term(mold_name).split())
+
+    def _score_words(self, search_words: List[str], mold_words: List[str]) -> float:
+        if not search_words or not mold_words:
+            return 0.0
+        mold_text = ' '.join(mold_words)
+        worst = 1.0
+        for search_word in search_words:
+            if len(search_words) > 1 and search_word in mold_text:
+                continue
+            if any(word_matches(search_word, word) for word in mold_words):
+                continue
+            best = max(similarity(search_word, word) for word in mold_words)
+            worst = min(worst, best if best >= self.min_similarity(search_word) else 0.0)
+        return worst
+
+    def is_relevant(self, mold_name: str, search_term: str) -> bool:
+        """Check whether a product mold is relevant to a search term"""
+        return self.score(mold_name, search_term) >= self.threshold
+
+    def __len__(self) -> int:
+        return len(self._molds)
@@ -0,0 +1,174 @@
+"""
+Search result sets and data derived from them
+"""
+import copy
+import heapq
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .models import Disc, DiscFilter, SearchFacets
+from .facets import compute_facets
+from .filters import DiscFilterService, filter_hash, filter_narrows
+
+
+class ResultSet:
+    """Discs returned for one search, cached together with data derived from them"""
+
+    # Term the discs were searched for when the query as typed found nothing;
+    # a class default so result sets pickled before it existed still have it
+    corrected_query: Optional[str] = None
+
+    def __init__(self, query: str, discs: List[Disc], created_at: Optional[float] = None):
+        self.query = query
+        self.discs = discs
+        self.created_at = time.time() if created_at is None else created_at
+        # Changes whenever the search is re-scraped, so derived caches can key on it
+        self.version = uuid.uuid4().hex[:12]
+        self._facets: Optional[SearchFacets] = None
+        # Set on copies served past their freshness window
+        self.stale = False
+        # Pages that could not be fetched within the request's deadline
+        self.incomplete_pages: List[str] = []
+
+    @property
+    def facets(self) -> SearchFacets:
+        """Facets of the full result set, computed on first use"""
+        if self._facets is None:
+            self._facets = compute_facets(self.discs)
+        return self._facets
+
+    def as_stale(self) -> 'ResultSet':
+        """Get a copy marked as stale that shares the discs, version and facets"""
+        stale = copy.copy(self)
+        stale.stale = True
+        return stale
+
+    def __len__(self) -> int:
+        return len(self.discs)
+
+
+class FilteredResultCache:
+    """
+    Filtered and sorted disc positions per result set version and filter
+
+    Entries are keyed by ResultSet.version and filter_hash, so a re-scraped
+    search never gets positions computed on its previous discs; versions that
+    are no longer served fall out as the least recently used. A filter that
+    only narrows one already matched on the same version is answered by
+    refining that filter's matches instead of scanning every disc.
+
+    Args:
+        max_versions: Result set versions to keep entries for
+        max_filters: Filters kept per version
+    """
+
+    def __init__(self, max_versions: int = 64, max_filters: int = 32):
+        self.max_versions = max_versions
+        self.max_filters = max_filters
+        # version -> {'results': filter hash -> (sorted positions, match count), 'matches': predicate hash -> (filter, positions)}
+        self._versions: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._refined = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def apply(self, result_set: ResultSet, filters: Optional[DiscFilter]) -> Tuple[List[Disc], int]:
+        """
+        Filter and sort the discs of a result set, like DiscFilterService.apply_filters
+
+        Args:
+            result_set: Result set to filter
+            filters: DiscFilter object containing filter criteria
+
+        Returns:
+            Matching discs in sorted order, cut to the filter's limit, and the
+            number of matching discs before the limit
+        """
+        discs = result_set.discs
+        if not filters:
+            return discs, len(discs)
+        if self.max_versions <= 0:
+            matches = DiscFilterService.compile(filters).filter(discs)
+            sort_keys = DiscFilterService.parse_sort_spec(filters.sort_by, filters.sort_order)
+            return DiscFilterService.sort_discs(matches, sort_keys, filters.nulls == 'first', filters.limit), len(matches)
+
+        key = filter_hash(filters)
+        predicate_key = filter_hash(filters, include_sort=False)
+        with self._lock:
+            entries = self._entries(result_set.version)
+            cached = entries['results'].get(key)
+            if cached is not None:
+                entries['results'].move_to_end(key)
+                self._hits += 1
+                positions, total = cached
+                return [discs[i] for i in positions], total
+            same = entries['matches'].get(predicate_key)
+            candidates = list(entries['matches'].values()) if same is None else []
+
+        base = None
+        if same is not None:
+            # Same predicates with another sort or limit
+            matches = same[1]
+        else:
+            wider = [positions for cached, positions in candidates if filter_narrows(filters, cached)]
+            if wider:
+                base = min(wider, key=len)
+            plan = DiscFilterService.compile(filters)
+            matches = tuple(i for i in (range(len(discs)) if base is None else base) if plan.matches(discs[i]))
+        positions = self._sort(discs, matches, filters)
+
+        with self._lock:
+            if same is None and base is None:
+                self._misses += 1
+            else:
+                self._refined += 1
+            entries = self._entries(result_set.version)
+            self._put(entries['matches'], predicate_key, (filters, matches))
+            self._put(entries['results'], key, (positions, len(matches)))
+        return [discs[i] for i in positions], len(matches)
+
+    @staticmethod
+    def _sort(discs: List[Disc], positions: Sequence[int], filters: DiscFilter) -> tuple:
+        """Order positions as DiscFilterService.sort_discs orders the discs at them"""
+        sort_keys = DiscFilterService.parse_sort_spec(filters.sort_by, filters.sort_order)
+        limit = filters.limit
+        if not sort_keys:
+            return tuple(positions[:limit] if limit else positions)
+        disc_key = DiscFilterService.sort_key(sort_keys, filters.nulls == 'first')
+        key = lambda i: disc_key(discs[i])  # noqa: E731
+        if limit and limit < len(positions):
+            return tuple(heapq.nsmallest(limit, positions, key=key))
+        return tuple(sorted(positions, key=key))
+
+    def _entries(self, version: str) -> Dict[str, OrderedDict]:
+        entries = self._versions.get(version)
+        if entries is None:
+            entries = self._versions[version] = {'results': OrderedDict(), 'matches': OrderedDict()}
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+        else:
+            self._versions.move_to_end(version)
+        return entries
+
+    def _put(self, entries: OrderedDict, key: str, value: Any) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_filters:
+            entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit, refinement and miss counts for health reporting"""
+        with self._lock:
+            hits, refined, misses = self._hits, self._refined, self._misses
+            versions = len(self._versions)
+        lookups = hits + refined + misses
+        return {
+            "hits": hits,
+            "refined": refined,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "versions": versions,
+        }
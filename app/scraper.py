@@ -1,24 +1,97 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Iterator, List, Optional
 import re
+import threading
 import time
-from urllib.parse import urljoin, quote_plus
+from urllib.parse import urljoin, urlparse, quote_plus
 from fake_useragent import UserAgent
 from decimal import Decimal
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
-from .models import Disc, StockStatus
+from .models import Disc, StockStatus, ProductPageSnapshot, DiscChange, ChangeSet
+from .cache import ContentMemo, build_cache
+from .tracing import trace_debug, bind
+from .identity import dedupe_discs, disc_id, unique_ids
+from .results import ResultSet
+from .relevance import MoldMatcher
+from .storeapi import StoreAPISource
+from . import embedded, streaming
+from .circuit import CircuitBreaker, CircuitOpenError
+from .deadline import DeadlineExceeded, current_deadline, deadline_scope
+from .parsepool import ParsePool
+from .querylog import normalize_term
 from .database import db
 
 logger = logging.getLogger(__name__)
 
+# Upstream responses that count as failures for the circuit breaker
+UPSTREAM_FAILURE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamBusyError(Exception):
+    """Raised when no upstream request slot frees up in time and no deadline is bound"""
+
+# Cells containing these phrases are buttons or stock messages, not disc attributes
+RAW_ROW_SKIP_PHRASES = (
+    'add to cart', 'just 1 left', 'in stock', 'out of stock',
+    'limited', 'button', 'click', 'buy now'
+)
+
 class OTBDiscsScraper:
     """Scraper for OTB Discs website"""
     
-    def __init__(self):
-        self.base_url = "https://otbdiscs.com"
+    def __init__(
+        self,
+        page_cache_ttl: float = 900.0,
+        page_cache_size: int = 256,
+        search_cache_ttl: float = 300.0,
+        search_cache_size: int = 128,
+        search_stale_ttl: float = 900.0,
+        shared_cache_path: Optional[str] = None,
+        page_cache_max_bytes: Optional[int] = None,
+        search_cache_max_bytes: Optional[int] = None,
+        max_concurrent_requests: int = 5,
+        max_search_pages: int = 5,
+        use_store_api: bool = False,
+        circuit_failure_threshold: int = 5,
+        circuit_recovery_seconds: float = 30.0,
+        base_url: str = "https://otbdiscs.com",
+        parse_workers: int = 0,
+        parse_warm: bool = True,
+        parse_memo_size: int = 512
+    ):
+        self.base_url = base_url.rstrip("/")
+        # Parsed product pages and search results; shared across worker processes
+        # through a SQLite file when shared_cache_path is set
+        self.shared_cache_path = shared_cache_path
+        self.page_cache = build_cache(
+            "pages", page_cache_size, page_cache_ttl, shared_cache_path, shared_max_bytes=page_cache_max_bytes
+        )
+        # Searches are fresh for search_cache_ttl and served stale while revalidating
+        # (or while OTB is down) for search_stale_ttl after that
+        self.search_fresh_seconds = search_cache_ttl
+        self.search_cache = build_cache(
+            "searches", search_cache_size, search_cache_ttl + search_stale_ttl, shared_cache_path,
+            shared_max_bytes=search_cache_max_bytes
+        )
+        self._revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="otb-revalidate")
+        self._revalidating = set()
+        self._revalidate_lock = threading.Lock()
+        self.breaker = CircuitBreaker(circuit_failure_threshold, circuit_recovery_seconds, name="otbdiscs.com")
+        # All requests to OTB share this budget, however many searches run at once
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_search_pages = max_search_pages
+        self._upstream = threading.BoundedSemaphore(max_concurrent_requests)
+        # JSON product source tried before HTML search pages when enabled
+        self.store_api = StoreAPISource(self, max_pages=max_search_pages) if use_store_api else None
+        # Known molds, used to match misspelled searches
+        self.relevance = MoldMatcher()
+        # Parsed product pages by body hash, so unchanged pages are not parsed again
+        self.parse_memo = ContentMemo(max_entries=parse_memo_size)
+        # Product pages are parsed in worker processes when parse_workers > 0
+        self.parse_pool = ParsePool(parse_workers, warm=parse_warm) if parse_workers > 0 else None
         self.session = requests.Session()
         self.ua = UserAgent()
         self.session.headers.update({
@@ -41,71 +114,305 @@ class OTBDiscsScraper:
             List of Disc objects
         """
         try:
-            search_url = f"{self.base_url}/?s={quote_plus(product_name)}&post_type=product"
-            logger.info(f"Searching for '{product_name}' at {search_url}")
+            if self.store_api is not None:
+                discs = self.store_api.search(product_name, max_results)
+                if discs is not None:
+                    return dedupe_discs(discs)
             
-            response = self.session.get(search_url, timeout=10)
+            search_url = self._search_page_url(product_name, 1)
+            logger.info("Searching for '%s' at %s", product_name, search_url)
+            
+            response = self._get(search_url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
-            # Find product containers - OTB uses li elements with class 'product'
-            products = soup.find_all('li', class_='product')[:max_results]
-            
             all_discs = []
             relevant_products = []
             
-            # First pass: filter relevant products
-            for product in products:
-                disc = self._parse_product(product)
-                if disc:
-                    logger.debug(f"🔍 Parsed product: brand='{disc.brand}', mold='{disc.mold}', plastic='{disc.plastic_type}'")
-                    if self._is_relevant_match(disc.mold, product_name):
-                        logger.debug(f"✅ Relevant match found: '{disc.mold}' matches '{product_name}'")
-                        relevant_products.append(disc)
-                    else:
-                        logger.debug(f"❌ Not relevant: '{disc.mold}' doesn't match '{product_name}'")
+            # First pass: filter relevant products, stopping once max_results are collected
+            scanned = self._collect_relevant_products(soup, product_name, relevant_products, max_results)
             
-            logger.info(f"Found {len(relevant_products)} relevant product pages (filtered from {len(products)} total results)")
+            page_count = min(self._search_page_count(soup), self.max_search_pages)
+            if len(relevant_products) < max_results and page_count > 1:
+                scanned += self._collect_search_pages(product_name, range(2, page_count + 1), relevant_products, max_results)
+            
+            logger.info("Found %s relevant product pages (filtered from %s total results)", len(relevant_products), scanned)
             
             # Second pass: get detailed disc variants from each relevant product page (concurrent)
             products_with_urls = [p for p in relevant_products if p.product_url]
             products_without_urls = [p for p in relevant_products if not p.product_url]
             
             if products_with_urls:
-                logger.info(f"Fetching detailed variants concurrently for {len(products_with_urls)} product pages...")
+                logger.info("Fetching detailed variants concurrently for %s product pages...", len(products_with_urls))
                 
                 # Use ThreadPoolExecutor for concurrent fetching
-                max_workers = min(len(products_with_urls), 5)  # Limit to 5 concurrent requests max
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                max_workers = min(len(products_with_urls), self.max_concurrent_requests)
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+                deadline = current_deadline()
+                try:
                     # Submit all tasks
                     future_to_product = {
-                        executor.submit(self._fetch_product_variants, product.product_url, product): product
+                        executor.submit(bind(self._fetch_product_variants), product.product_url, product): product
                         for product in products_with_urls
                     }
                     
-                    # Collect results as they complete
-                    for future in as_completed(future_to_product):
-                        product = future_to_product[future]
-                        try:
-                            detailed_discs = future.result()
-                            all_discs.extend(detailed_discs)
-                            logger.info(f"✓ Completed fetching variants for {product.mold} ({len(detailed_discs)} discs)")
-                        except Exception as e:
-                            logger.error(f"✗ Error fetching variants for {product.mold}: {e}")
-                            # If individual page fails, add the summary disc as fallback
+                    # Collect results as they complete, until the deadline if there is one
+                    pending = set(future_to_product)
+                    try:
+                        for future in as_completed(future_to_product, timeout=deadline.remaining() if deadline else None):
+                            pending.discard(future)
+                            product = future_to_product[future]
+                            try:
+                                detailed_discs = future.result()
+                                all_discs.extend(detailed_discs)
+                                logger.info("✓ Completed fetching variants for %s (%s discs)", product.mold, len(detailed_discs))
+                            except DeadlineExceeded:
+                                if deadline is not None:
+                                    deadline.mark_incomplete(product.product_url)
+                                all_discs.append(product)
+                            except Exception as e:
+                                logger.error("✗ Error fetching variants for %s: %s", product.mold, e)
+                                # If individual page fails, add the summary disc as fallback
+                                all_discs.append(product)
+                    except FuturesTimeoutError:
+                        # Out of time: pages still loading are represented by their summary disc
+                        logger.warning("Deadline reached with %s product pages pending for '%s'", len(pending), product_name)
+                        for future in pending:
+                            product = future_to_product[future]
+                            if deadline is not None:
+                                deadline.mark_incomplete(product.product_url)
                             all_discs.append(product)
+                finally:
+                    # Without a deadline wait for every page. With one, queued pages are
+                    # cancelled, and fetches in flight fail with DeadlineExceeded once _get's
+                    # timeout (capped at the deadline) runs out, so nothing is left to wait for
+                    executor.shutdown(wait=deadline is None, cancel_futures=deadline is not None)
             
             # Add products without URLs as summary discs
             all_discs.extend(products_without_urls)
                     
-            logger.info(f"Found {len(all_discs)} total individual discs for '{product_name}'")
-            return all_discs
+            unique_discs = dedupe_discs(all_discs)
+            if len(unique_discs) < len(all_discs):
+                logger.info("Dropped %s duplicate discs for '%s'", len(all_discs) - len(unique_discs), product_name)
+            logger.info("Found %s total individual discs for '%s'", len(unique_discs), product_name)
+            return unique_discs
             
+        except DeadlineExceeded as e:
+            logger.warning("Search for '%s' ran out of time: %s", product_name, e)
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.mark_incomplete(self._search_page_url(product_name, 1))
+            return []
         except Exception as e:
-            logger.error(f"Error searching for discs: {e}")
+            logger.error("Error searching for discs: %s", e)
             return []
     
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request to OTB through the circuit breaker and shared upstream budget
+        
+        The timeout is shortened to the remaining budget of the current deadline.
+        
+        Raises:
+            CircuitOpenError: If OTB has been failing and is not called right now
+            DeadlineExceeded: If the current deadline runs out first
+            UpstreamBusyError: If no upstream slot frees up within the timeout and no deadline is bound
+        """
+        deadline = current_deadline()
+        timeout = kwargs.pop('timeout', 10)
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+        if not self._upstream.acquire(timeout=timeout):
+            if deadline is not None:
+                raise DeadlineExceeded(f"No upstream slot free within {timeout:.1f}s for {url}")
+            raise UpstreamBusyError(f"No upstream slot free within {timeout:.1f}s for {url}")
+        try:
+            if deadline is not None:
+                # Time spent waiting for the slot counts against the budget
+                timeout = deadline.timeout(timeout)
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(f"Circuit open, not requesting {url}")
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except requests.Timeout:
+                if deadline is not None and deadline.expired:
+                    # Cut short by our own budget, which says nothing about OTB's health
+                    self.breaker.release_trial()
+                    raise DeadlineExceeded(f"Deadline reached while requesting {url}")
+                self.breaker.record_failure()
+                raise
+            except requests.RequestException:
+                self.breaker.record_failure()
+                raise
+        finally:
+            self._upstream.release()
+        if response.status_code in UPSTREAM_FAILURE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+    
+    def _search_page_url(self, product_name: str, page: int) -> str:
+        """Build the URL of one WooCommerce search result page"""
+        query = f"?s={quote_plus(product_name)}&post_type=product"
+        if page <= 1:
+            return f"{self.base_url}/{query}"
+        return f"{self.base_url}/page/{page}/{query}"
+    
+    @staticmethod
+    def _search_page_count(soup) -> int:
+        """Get the number of search result pages from the WooCommerce pagination links"""
+        pages = [1]
+        for link in soup.select('.woocommerce-pagination .page-numbers'):
+            text = link.get_text(strip=True)
+            if text.isdigit():
+                pages.append(int(text))
+        return max(pages)
+    
+    def _collect_relevant_products(self, soup, product_name: str, relevant_products: List[Disc], max_results: int) -> int:
+        """
+        Parse the products of one search result page and keep the relevant ones
+        
+        Args:
+            soup: Parsed search result page
+            product_name: Search term
+            relevant_products: List the relevant summary discs are appended to
+            max_results: Stop once this many relevant products are collected
+            
+        Returns:
+            Number of products scanned
+        """
+        # Find product containers - OTB uses li elements with class 'product'
+        scanned = 0
+        for product in soup.find_all('li', class_='product'):
+            if len(relevant_products) >= max_results:
+                break
+            scanned += 1
+            disc = self._parse_product(product)
+            if disc:
+                trace_debug(logger, "🔍 Parsed product: brand='%s', mold='%s', plastic='%s'", disc.brand, disc.mold, disc.plastic_type)
+                self.relevance.add(disc.mold)
+                if self._is_relevant_match(disc.mold, product_name):
+                    trace_debug(logger, "✅ Relevant match found: '%s' matches '%s'", disc.mold, product_name)
+                    relevant_products.append(disc)
+                else:
+                    trace_debug(logger, "❌ Not relevant: '%s' doesn't match '%s'", disc.mold, product_name)
+        return scanned
+    
+    def _fetch_search_page(self, product_name: str, page: int) -> BeautifulSoup:
+        """Fetch and parse one search result page"""
+        response = self._get(self._search_page_url(product_name, page))
+        response.raise_for_status()
+        return BeautifulSoup(response.content, 'html.parser')
+    
+    def _collect_search_pages(self, product_name: str, pages, relevant_products: List[Disc], max_results: int) -> int:
+        """
+        Fetch further search result pages concurrently and collect their relevant products
+        
+        Pages are processed in order so results keep OTB's ranking. Pages that
+        have not started yet are cancelled once max_results products are collected.
+        
+        Returns:
+            Number of products scanned
+        """
+        pages = list(pages)
+        logger.info("Fetching %s more search result pages for '%s'", len(pages), product_name)
+        scanned = 0
+        with ThreadPoolExecutor(max_workers=min(len(pages), self.max_concurrent_requests)) as executor:
+            futures = [executor.submit(bind(self._fetch_search_page), product_name, page) for page in pages]
+            deadline = current_deadline()
+            for page, future in zip(pages, futures):
+                try:
+                    soup = future.result(timeout=deadline.remaining() if deadline else None)
+                except (FuturesTimeoutError, DeadlineExceeded):
+                    # Out of time: this and all later pages are skipped
+                    index = pages.index(page)
+                    for skipped_page, skipped in zip(pages[index:], futures[index:]):
+                        skipped.cancel()
+                        if deadline is not None:
+                            deadline.mark_incomplete(self._search_page_url(product_name, skipped_page))
+                    break
+                except Exception as e:
+                    logger.warning("Error fetching search page %s for '%s': %s", page, product_name, e)
+                    continue
+                scanned += self._collect_relevant_products(soup, product_name, relevant_products, max_results)
+                if len(relevant_products) >= max_results:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        return scanned
+    
+    def search_result_set(self, product_name: str, max_results: int = 50, deadline_ms: Optional[float] = None) -> ResultSet:
+        """
+        Search for discs, serving repeated searches from the search cache
+        
+        Args:
+            product_name: Name of the disc to search for
+            max_results: Maximum number of results to return
+            deadline_ms: Latency budget; pages not fetched in time are listed
+                in the result's incomplete_pages and summarized instead
+            
+        Returns:
+            ResultSet holding the discs and data derived from them
+        """
+        cache_key = f"{product_name.strip().lower()}|{max_results}"
+        entry = self.search_cache.get_entry(cache_key)
+        if entry is not None:
+            cached, stored_at = entry
+            if time.time() - stored_at < self.search_fresh_seconds:
+                logger.info("Using cached search results for '%s'", product_name)
+                return cached
+            # Serve stale results immediately; refresh them unless OTB is failing
+            if not self.breaker.is_open:
+                self._revalidate(cache_key, product_name, max_results)
+            logger.info("Serving stale search results for '%s'", product_name)
+            return cached.as_stale()
+        
+        if self.breaker.is_open:
+            raise CircuitOpenError("OTB is unavailable and no cached results exist")
+        with deadline_scope(deadline_ms):
+            return self._search_and_cache(cache_key, product_name, max_results)
+    
+    def _search_and_cache(self, cache_key: str, product_name: str, max_results: int) -> ResultSet:
+        discs = self.search_discs(product_name, max_results)
+        corrected_query = None
+        deadline = current_deadline()
+        # Only a search that completed and found nothing is retried with a corrected term
+        if not discs and (deadline is None or not (deadline.expired or deadline.incomplete)):
+            corrected = self.relevance.rewrite(product_name)
+            if corrected and corrected != normalize_term(product_name):
+                logger.info("No results for '%s', searching for '%s' instead", product_name, corrected)
+                discs = self.search_discs(corrected, max_results)
+                corrected_query = corrected if discs else None
+        result_set = ResultSet(product_name, discs)
+        result_set.corrected_query = corrected_query
+        if deadline is not None:
+            result_set.incomplete_pages = deadline.incomplete
+        # Empty results may come from an upstream error and partial results from
+        # running out of time, so neither is cached
+        if result_set.discs and not result_set.incomplete_pages:
+            self.search_cache.set(cache_key, result_set)
+        return result_set
+    
+    def _revalidate(self, cache_key: str, product_name: str, max_results: int) -> None:
+        """Refresh a stale search in the background, at most once at a time per search"""
+        with self._revalidate_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+        
+        def run():
+            try:
+                self._search_and_cache(cache_key, product_name, max_results)
+            except Exception as e:
+                logger.warning("Background revalidation of '%s' failed: %s", product_name, e)
+            finally:
+                with self._revalidate_lock:
+                    self._revalidating.discard(cache_key)
+        
+        self._revalidate_executor.submit(run)
+    
     def _fetch_product_variants(self, url: str, product_summary: 'Disc') -> List[Disc]:
         """
         Fetch detailed variants for a single product page (used by ThreadPoolExecutor)
@@ -118,82 +425,597 @@ class OTBDiscsScraper:
             List of detailed Disc objects from the product page
         """
         try:
-            logger.info(f"Fetching detailed variants for: {product_summary.mold} ({product_summary.plastic_type})")
-            return self.parse_product_page(url)
+            logger.info("Fetching detailed variants for: %s (%s)", product_summary.mold, product_summary.plastic_type)
+            snapshot = self.get_product_snapshot(url)
+            return list(snapshot.discs) if snapshot is not None else []
+        except (DeadlineExceeded, UpstreamBusyError):
+            # The caller represents the page by its summary disc
+            raise
         except Exception as e:
-            logger.error(f"Error fetching variants from {url}: {e}")
+            logger.error("Error fetching variants from %s: %s", url, e)
             return []
     
-    def parse_product_page(self, url: str) -> List[Disc]:
+    def parse_product_page(self, url: str, use_cache: bool = True) -> List[Disc]:
         """
         Parse a specific OTB Discs product page for all disc variants
         
         Args:
             url: URL of the product page to parse
+            use_cache: Serve the page from the page cache when it is fresh
             
         Returns:
             List of Disc objects found on the page
         """
         try:
-            logger.info(f"Parsing product page: {url}")
+            snapshot = self.get_product_snapshot(url, max_age_seconds=None if use_cache else 0)
+            return list(snapshot.discs) if snapshot is not None else []
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Error parsing product page %s: %s", url, e)
+            return []
+    
+    def iter_product_page(self, url: str, chunk_size: int = 16384) -> Iterator[Disc]:
+        """
+        Stream the disc variants of a product page row by row as it downloads
+        
+        Rows are parsed and discarded one at a time, so memory use does not grow
+        with the number of variants. Nothing is cached. Pages without a variants
+        table (e.g. only embedded variation JSON) fall back to parse_product_page.
+        
+        Args:
+            url: URL of the product page
+            chunk_size: Bytes read from the response at a time
+            
+        Yields:
+            Disc for each variant, in page order
             
-            response = self.session.get(url, timeout=10)
+        Raises:
+            requests.RequestException: If the page could not be fetched
+        """
+        logger.info("Streaming product page: %s", url)
+        response = self._get(url, stream=True)
+        rows = 0
+        try:
             response.raise_for_status()
+            for disc in unique_ids(self._stream_table_discs(response.iter_content(chunk_size), url)):
+                rows += 1
+                yield disc
+        finally:
+            response.close()
+        
+        if rows == 0:
+            logger.info("No variants table streamed from %s, parsing full page", url)
+            yield from self.parse_product_page(url)
+    
+    def _stream_table_discs(self, chunks, url: str) -> Iterator[Disc]:
+        """Parse streamed variants table rows into discs"""
+        column_map = None
+        for row in streaming.iter_table_rows(chunks):
+            if column_map is None:
+                column_map = self._build_column_map(row.headers)
+                brand, mold, plastic_type = self._parse_product_name(row.title or '')
+            disc = self._parse_table_row([], row.headers, brand, mold, plastic_type, url, column_map, row.cell_texts)
+            if disc:
+                disc.image_url = row.image_url
+                yield disc
+    
+    def is_site_url(self, url: str) -> bool:
+        """
+        Check that a URL points at the site this scraper fetches from
+        
+        URLs from clients must pass this before they are fetched: failures of
+        any fetch count towards the upstream circuit breaker, so requests to
+        another host could open it for every search.
+        
+        Args:
+            url: URL to check
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+        Returns:
+            True for http(s) URLs on the host of base_url, with or without www.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return False
+        site = urlparse(self.base_url)
+        return (parsed.hostname.removeprefix('www.') == (site.hostname or '').removeprefix('www.')
+                and parsed.port == site.port)
+    
+    def get_product_snapshot(self, url: str, max_age_seconds: Optional[float] = None) -> Optional[ProductPageSnapshot]:
+        """
+        Get a parsed product page, from the page cache when it is recent enough
+        
+        Args:
+            url: URL of the product page
+            max_age_seconds: Refetch cached pages older than this (None accepts any cached page)
+            
+        Returns:
+            ProductPageSnapshot or None if the page has no product title
+            
+        Raises:
+            requests.RequestException: If the page could not be fetched
+        """
+        entry = self.page_cache.get_entry(url)
+        if entry is not None and (max_age_seconds is None or time.time() - entry[0].fetched_at < max_age_seconds):
+            logger.info("Using cached product page: %s", url)
+            return entry[0]
+        
+        logger.info("Parsing product page: %s", url)
+        
+        response = self._get(url)
+        response.raise_for_status()
+        
+        snapshot = self._parse_page_content(response.content, url)
+        if snapshot is not None:
+            self.page_cache.set(url, snapshot)
+        return snapshot
+    
+    def _parse_page_content(self, content: bytes, url: str) -> Optional[ProductPageSnapshot]:
+        """
+        Parse a downloaded product page, reusing the last result if the body is unchanged
+        
+        Args:
+            content: Raw HTML of the product page
+            url: URL of the product page
+            
+        Returns:
+            ProductPageSnapshot or None if the page has no product title
+        """
+        digest = self.parse_memo.digest(content)
+        snapshot = self.parse_memo.get(url, digest)
+        if snapshot is not None:
+            logger.info("Product page unchanged, reusing parse: %s", url)
+            return snapshot.model_copy(update={'fetched_at': time.time()})
+        
+        if self.parse_pool is not None:
+            snapshot = self.parse_pool.parse(content, url)
+        else:
+            snapshot = self._parse_product_html(content, url)
+        if snapshot is not None:
+            self.parse_memo.set(url, digest, snapshot)
+        return snapshot
+    
+    def _parse_product_html(self, content: bytes, url: str, use_embedded: bool = True) -> Optional[ProductPageSnapshot]:
+        """
+        Parse the HTML of a product page into a cacheable snapshot
+        
+        Variation JSON embedded in the page is used when present; otherwise
+        the variants table is parsed from the DOM.
+        
+        Args:
+            content: Raw HTML of the product page
+            url: URL of the product page
+            use_embedded: Try the embedded variation JSON first
+            
+        Returns:
+            ProductPageSnapshot or None if the page has no product title
+        """
+        if use_embedded:
+            snapshot = self._parse_embedded_variations(content, url)
+            if snapshot is not None:
+                return snapshot
+        
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Extract basic product info
+        title_element = soup.find('h1')
+        if not title_element:
+            logger.error("Could not find product title")
+            return None
+        
+        title = title_element.get_text(strip=True)
+        brand, mold, plastic_type = self._parse_product_name(title)
+        
+        # Find the product variants table (the one with actual disc data)
+        discs = []
+        variants_table, headers = self._find_variants_table(soup)
+        column_map = self._build_column_map(headers) if variants_table else {}
+        
+        trace_debug(logger, "Column mapping for %s: %s", mold, column_map)
+        
+        # Log missing columns for debugging
+        missing_columns = [col for col in ['stiffness', 'price'] if variants_table and col not in column_map]
+        if missing_columns:
+            logger.warning("Missing columns for %s: %s", mold, missing_columns)
+        
+        row_cells = []
+        row_indexes = []
+        rows = self._variant_rows(variants_table) if variants_table else []
+        if variants_table:
+            for row_index, cells in enumerate(rows):
+                try:
+                    cell_texts = self._cell_texts(cells)
+                    disc = self._parse_table_row(cells, headers, brand, mold, plastic_type, url, column_map, cell_texts)
+                    if disc:
+                        discs.append(disc)
+                        row_cells.append(cell_texts)
+                        row_indexes.append(row_index)
+                except Exception as e:
+                    logger.error("Error parsing table row: %s", e)
+                    continue
+        else:
+            logger.warning("Could not find variants table with expected columns")
+        
+        logger.info("Found %s disc variants", len(discs))
+        return ProductPageSnapshot(
+            url=url,
+            brand=brand,
+            mold=mold,
+            plastic_type=plastic_type,
+            headers=headers,
+            column_map=column_map,
+            discs=list(unique_ids(discs)),
+            row_cells=row_cells,
+            row_indexes=row_indexes,
+            table_rows=len(rows),
+            fetched_at=time.time()
+        )
+    
+    def _parse_embedded_variations(self, content: bytes, url: str) -> Optional[ProductPageSnapshot]:
+        """
+        Parse a product page from its embedded variation JSON without building a DOM
+        
+        Args:
+            content: Raw HTML of the product page
+            url: URL of the product page
             
-            # Extract basic product info
-            title_element = soup.find('h1')
-            if not title_element:
-                logger.error("Could not find product title")
-                return []
-            
-            title = title_element.get_text(strip=True)
-            brand, mold, plastic_type = self._parse_product_name(title)
-            
-            # Find the product variants table (the one with actual disc data)
-            discs = []
-            tables = soup.find_all('table')
-            
-            # Look for the table with disc variants (should have columns like Color, Weight, Price, Stock)
-            variants_table = None
-            for table in tables:
-                header_row = table.find('tr')
-                if header_row:
-                    headers = [th.get_text(strip=True).lower() for th in header_row.find_all(['th', 'td'])]
-                    # Check if this table has the columns we need
-                    if any('weight' in h for h in headers) and any('price' in h for h in headers):
-                        variants_table = table
-                        logger.info(f"Found variants table with headers: {headers}")
-                        break
-            
-            if variants_table:
-                # Get the headers for column mapping
-                header_row = variants_table.find('tr')
+        Returns:
+            ProductPageSnapshot, or None if the page embeds no usable variations
+        """
+        variations = embedded.find_variations(content)
+        if not variations:
+            return None
+        title = embedded.find_title(content)
+        if not title:
+            return None
+        
+        table = embedded.variation_table(variations, embedded.find_attribute_terms(content))
+        if table is None:
+            trace_debug(logger, "Embedded variations of %s use attribute slugs without term names", url)
+            return None
+        headers, rows = table
+        column_map = self._build_column_map(headers)
+        if 'weight' not in column_map:
+            trace_debug(logger, "Embedded variations of %s have no weight attribute: %s", url, headers)
+            return None
+        
+        brand, mold, plastic_type = self._parse_product_name(title)
+        discs = []
+        row_cells = []
+        for variation, cell_texts in zip(variations, rows):
+            disc = self._parse_table_row([], headers, brand, mold, plastic_type, url, column_map, cell_texts)
+            if disc:
+                disc.image_url = embedded.variation_image(variation)
+                discs.append(disc)
+                row_cells.append(cell_texts)
+        
+        logger.info("Found %s disc variants in embedded variation data", len(discs))
+        return ProductPageSnapshot(
+            url=url,
+            brand=brand,
+            mold=mold,
+            plastic_type=plastic_type,
+            headers=headers,
+            column_map=column_map,
+            discs=list(unique_ids(discs)),
+            row_cells=row_cells,
+            fetched_at=time.time()
+        )
+    
+    def _find_variants_table(self, soup) -> tuple:
+        """
+        Find the table with disc variants (columns like Color, Weight, Price, Stock)
+        
+        Args:
+            soup: Parsed product page
+            
+        Returns:
+            Tuple of (table element or None, lowercase header list)
+        """
+        for table in soup.find_all('table'):
+            header_row = table.find('tr')
+            if header_row:
                 headers = [th.get_text(strip=True).lower() for th in header_row.find_all(['th', 'td'])]
-                
-                rows = variants_table.find_all('tr')[1:]  # Skip header row
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 8:  # Make sure we have enough columns for essential data
-                        try:
-                            disc = self._parse_table_row(cells, headers, brand, mold, plastic_type, url)
-                            if disc:
-                                discs.append(disc)
-                        except Exception as e:
-                            logger.error(f"Error parsing table row: {e}")
-                            continue
-            else:
-                logger.warning("Could not find variants table with expected columns")
+                # Check if this table has the columns we need
+                if any('weight' in h for h in headers) and any('price' in h for h in headers):
+                    logger.info("Found variants table with headers: %s", headers)
+                    return table, headers
+        return None, []
+    
+    def _variant_rows(self, variants_table) -> List[list]:
+        """
+        Get the cell lists of all data rows in a variants table
+        
+        Args:
+            variants_table: Table element returned by _find_variants_table
             
-            logger.info(f"Found {len(discs)} disc variants")
-            return discs
+        Returns:
+            List of cell lists, one per row with enough columns for essential data
+        """
+        rows = []
+        for row in variants_table.find_all('tr')[1:]:  # Skip header row
+            cells = row.find_all('td')
+            if len(cells) >= 8:  # Make sure we have enough columns for essential data
+                rows.append(cells)
+        return rows
+    
+    @staticmethod
+    def _build_column_map(headers: List[str]) -> dict:
+        """
+        Map semantic column names to cell indexes based on table headers
+        
+        Args:
+            headers: List of column headers (lowercase)
             
-        except Exception as e:
-            logger.error(f"Error parsing product page {url}: {e}")
-            return []
+        Returns:
+            Dictionary of column name to cell index
+        """
+        column_map = {}
+        for i, header in enumerate(headers):
+            if 'thumbnail' in header or 'image' in header:
+                column_map['thumbnail'] = i
+            elif 'color' in header and 'stamp' not in header and 'rim' not in header:
+                column_map['color'] = i
+            elif 'stamp' in header and 'foil' in header:
+                column_map['stamp_foil'] = i
+            elif 'rim' in header and 'color' in header:
+                column_map['rim_color'] = i
+            elif 'plastic' in header and 'gateway' in header:
+                column_map['plastic_gateway'] = i
+            elif 'weight' in header and 'scaled' not in header:
+                column_map['weight'] = i
+            elif 'scaled' in header and 'weight' in header:
+                column_map['scaled_weight'] = i
+            elif 'flatness' in header:
+                column_map['flatness'] = i
+            elif 'stiffness' in header:
+                column_map['stiffness'] = i
+            elif 'price' in header:
+                column_map['price'] = i
+            elif 'stock' in header:
+                column_map['stock'] = i
+            elif 'quantity' in header:
+                column_map['quantity'] = i
+        return column_map
+    
+    @staticmethod
+    def _column_text(cell_texts: List[str], column_map: dict, column: str) -> Optional[str]:
+        """Get the text of a named column from a row's cell texts"""
+        index = column_map.get(column)
+        if index is not None and index < len(cell_texts):
+            return cell_texts[index]
+        return None
+    
+    @staticmethod
+    def _parse_price_text(price_text: Optional[str]) -> Optional[Decimal]:
+        """Parse the price column text of a variants table row"""
+        if price_text:
+            price_match = re.search(r'\$(\d+(?:\.\d+)?)', price_text)
+            if price_match:
+                return Decimal(price_match.group(1))
+        return None
+    
+    @staticmethod
+    def _parse_stock_text(stock_text: Optional[str]) -> StockStatus:
+        """Parse the stock column text of a variants table row"""
+        if stock_text:
+            stock_text = stock_text.lower()
+            if 'just 1 left' in stock_text or 'in stock' in stock_text:
+                return StockStatus.IN_STOCK
+            elif 'out of stock' in stock_text:
+                return StockStatus.OUT_OF_STOCK
+            elif 'limited' in stock_text:
+                return StockStatus.LIMITED
+        return StockStatus.UNKNOWN
+    
+    @staticmethod
+    def build_raw_row_text(cell_texts: List[str], column_map: dict) -> Optional[str]:
+        """
+        Build the raw row text used for exact matching on OTB pages
+        
+        This preserves the cell text exactly as it appears on the OTB website,
+        skipping the thumbnail, empty cells, buttons and stock messages.
+        
+        Args:
+            cell_texts: Stripped text of every cell in the row
+            column_map: Column mapping of the variants table
+            
+        Returns:
+            Tab-separated cell texts or None if nothing is left
+        """
+        row_parts = []
+        for i, cell_text in enumerate(cell_texts):
+            # Skip thumbnail/image cells (usually first column)
+            if i == 0 and 'thumbnail' in column_map:
+                continue
+            
+            # Skip cells that contain button text or stock messages
+            lowered = cell_text.lower()
+            if any(skip_text in lowered for skip_text in RAW_ROW_SKIP_PHRASES):
+                continue
+            
+            # Only replace newlines with spaces, preserve tabs and other whitespace
+            cell_text = cell_text.replace('\n', ' ').replace('\r', ' ').strip()
+            if cell_text:
+                row_parts.append(cell_text)
+        
+        # Join with tabs to match OTB's table format
+        return '\t'.join(row_parts) if row_parts else None
+    
+    def get_raw_row_text(self, disc_id: str, product_url: Optional[str] = None) -> Optional[str]:
+        """
+        Look up the raw row text of a disc from the page cache
+        
+        Args:
+            disc_id: Disc.id of a variant
+            product_url: Product page of the disc; fetched if it is not cached
+            
+        Returns:
+            Raw row text or None if the disc is unknown
+        """
+        if product_url:
+            if product_url not in self.page_cache:
+                self.parse_product_page(product_url)
+            urls = [product_url]
+        else:
+            urls = self.page_cache.keys()
+        
+        for url in urls:
+            snapshot = self.page_cache.get(url)
+            if snapshot is None:
+                continue
+            for disc, cell_texts in zip(snapshot.discs, snapshot.row_cells):
+                if disc.id == disc_id:
+                    return self.build_raw_row_text(cell_texts, snapshot.column_map)
+        return None
     
-    def _parse_table_row(self, cells, headers: List[str], brand: str, mold: str, plastic_type: str, product_url: str) -> Optional[Disc]:
+    def refresh_product_page(self, url: str) -> ChangeSet:
+        """
+        Refresh stock and price of a cached product page without reparsing every column
+        
+        The page is re-fetched and only the stock and price cells are read using the
+        cached column plan. If the table layout or row count changed, the page is
+        fully reparsed instead.
+        
+        Args:
+            url: URL of a product page
+            
+        Returns:
+            ChangeSet describing the discs whose stock or price changed
+        """
+        entry = self.page_cache.get_entry(url)
+        if entry is None or not entry[0].column_map:
+            discs = self.parse_product_page(url, use_cache=False)
+            return ChangeSet(product_url=url, rows_checked=len(discs), full_rescrape=True, refreshed_at=time.time())
+        
+        snapshot = entry[0]
+        logger.info("Refreshing stock and price for: %s", url)
+        
+        response = self._get(url)
+        response.raise_for_status()
+        
+        # A body identical to the last parsed one has the same stock and prices
+        digest = self.parse_memo.digest(response.content)
+        memoized = self.parse_memo.get(url, digest)
+        if memoized is not None:
+            new_snapshot = memoized.model_copy(update={'fetched_at': time.time()})
+            self.page_cache.set(url, new_snapshot)
+            return ChangeSet(
+                product_url=url,
+                changes=self._diff_variants(snapshot.discs, new_snapshot.discs),
+                rows_checked=len(new_snapshot.discs),
+                refreshed_at=new_snapshot.fetched_at
+            )
+        
+        # Embedded variation data is decoded without a DOM, so diffing it is cheapest
+        new_snapshot = self._parse_embedded_variations(response.content, url)
+        if new_snapshot is not None:
+            self.parse_memo.set(url, digest, new_snapshot)
+            self.page_cache.set(url, new_snapshot)
+            return ChangeSet(
+                product_url=url,
+                changes=self._diff_variants(snapshot.discs, new_snapshot.discs),
+                rows_checked=len(new_snapshot.discs),
+                full_rescrape=new_snapshot.headers != snapshot.headers,
+                refreshed_at=new_snapshot.fetched_at
+            )
+        
+        # Only the tables are needed to refresh stock and price
+        soup = BeautifulSoup(response.content, 'html.parser', parse_only=SoupStrainer('table'))
+        variants_table, headers = self._find_variants_table(soup)
+        rows = self._variant_rows(variants_table) if variants_table else []
+        
+        # Snapshots without row positions (from embedded data) had one row per disc
+        table_rows = snapshot.table_rows if snapshot.table_rows is not None else len(snapshot.discs)
+        row_indexes = snapshot.row_indexes or list(range(len(snapshot.discs)))
+        if headers != snapshot.headers or len(rows) != table_rows:
+            logger.info("Table layout changed for %s, reparsing full page", url)
+            new_snapshot = self._parse_product_html(response.content, url, use_embedded=False)
+            if new_snapshot is None:
+                self.page_cache.delete(url)
+                return ChangeSet(product_url=url, full_rescrape=True, refreshed_at=time.time())
+            self.parse_memo.set(url, digest, new_snapshot)
+            self.page_cache.set(url, new_snapshot)
+            changes = self._diff_variants(snapshot.discs, new_snapshot.discs)
+            return ChangeSet(
+                product_url=url,
+                changes=changes,
+                rows_checked=len(new_snapshot.discs),
+                full_rescrape=True,
+                refreshed_at=new_snapshot.fetched_at
+            )
+        
+        price_index = snapshot.column_map.get('price')
+        stock_index = snapshot.column_map.get('stock')
+        discs = list(snapshot.discs)
+        row_cells = list(snapshot.row_cells)
+        changes = []
+        for i, row_index in enumerate(row_indexes):
+            cells = rows[row_index]
+            disc = discs[i]
+            price_text = cells[price_index].get_text(strip=True) if price_index is not None and len(cells) > price_index else None
+            stock_text = cells[stock_index].get_text(strip=True) if stock_index is not None and len(cells) > stock_index else None
+            price = self._parse_price_text(price_text)
+            stock = self._parse_stock_text(stock_text)
+            if price != disc.price or stock != disc.stock:
+                discs[i] = disc.model_copy(update={'price': price, 'stock': stock})
+                if i < len(row_cells):
+                    row_cells[i] = list(row_cells[i])
+                    for index, text in ((price_index, price_text), (stock_index, stock_text)):
+                        if index is not None and text is not None and index < len(row_cells[i]):
+                            row_cells[i][index] = text
+                changes.append(DiscChange(
+                    row_index=i,
+                    old_price=disc.price,
+                    new_price=price,
+                    old_stock=disc.stock,
+                    new_stock=stock,
+                    disc=discs[i]
+                ))
+        
+        refreshed_at = time.time()
+        new_snapshot = snapshot.model_copy(update={'discs': discs, 'row_cells': row_cells, 'fetched_at': refreshed_at})
+        # Not memoized: only stock and price were read, so other columns may be out of date for this body
+        self.page_cache.set(url, new_snapshot)
+        
+        logger.info("Refreshed %s rows for %s, %s changed", len(rows), url, len(changes))
+        return ChangeSet(product_url=url, changes=changes, rows_checked=len(rows), refreshed_at=refreshed_at)
+    
+    @staticmethod
+    def _diff_variants(old_discs: List[Disc], new_discs: List[Disc]) -> List[DiscChange]:
+        """
+        Diff two variant lists by their physical attributes
+        
+        Args:
+            old_discs: Previously cached variants
+            new_discs: Freshly parsed variants
+            
+        Returns:
+            List of DiscChange for variants present in both lists whose stock or price changed
+        """
+        def signature(d: Disc) -> tuple:
+            return (d.plastic_color, d.rim_color, d.stamp_foil, d.weight, d.scaled_weight, d.flatness, d.stiffness)
+        
+        old_by_signature = {}
+        for disc in old_discs:
+            old_by_signature.setdefault(signature(disc), disc)
+        
+        changes = []
+        for i, disc in enumerate(new_discs):
+            old = old_by_signature.get(signature(disc))
+            if old is not None and (old.price != disc.price or old.stock != disc.stock):
+                changes.append(DiscChange(
+                    row_index=i,
+                    old_price=old.price,
+                    new_price=disc.price,
+                    old_stock=old.stock,
+                    new_stock=disc.stock,
+                    disc=disc
+                ))
+        return changes
+    
+    def _parse_table_row(self, cells, headers: List[str], brand: str, mold: str, plastic_type: str, product_url: str, column_map: Optional[dict] = None, cell_texts: Optional[List[str]] = None) -> Optional[Disc]:
         """
         Parse a table row from OTB Discs product page into a Disc object using header-based column mapping
         
@@ -204,112 +1026,61 @@ class OTBDiscsScraper:
             mold: Mold name  
             plastic_type: Plastic type
             product_url: URL of the product page
+            column_map: Precomputed column mapping, built from headers if omitted
+            cell_texts: Precomputed stripped cell texts, extracted from cells if omitted
             
         Returns:
             Disc object or None if parsing fails
         """
         try:
             # Create column mapping based on headers
-            column_map = {}
-            for i, header in enumerate(headers):
-                if 'thumbnail' in header or 'image' in header:
-                    column_map['thumbnail'] = i
-                elif 'color' in header and 'stamp' not in header and 'rim' not in header:
-                    column_map['color'] = i
-                elif 'stamp' in header and 'foil' in header:
-                    column_map['stamp_foil'] = i
-                elif 'rim' in header and 'color' in header:
-                    column_map['rim_color'] = i
-                elif 'plastic' in header and 'gateway' in header:
-                    column_map['plastic_gateway'] = i
-                elif 'weight' in header and 'scaled' not in header:
-                    column_map['weight'] = i
-                elif 'scaled' in header and 'weight' in header:
-                    column_map['scaled_weight'] = i
-                elif 'flatness' in header:
-                    column_map['flatness'] = i
-                elif 'stiffness' in header:
-                    column_map['stiffness'] = i
-                elif 'price' in header:
-                    column_map['price'] = i
-                elif 'stock' in header:
-                    column_map['stock'] = i
-                elif 'quantity' in header:
-                    column_map['quantity'] = i
-            
-            # Log column mapping for debugging (only for first few rows)
-            if len(cells) > 0 and cells[0].get_text(strip=True) == '':  # First row check
-                logger.debug(f"Column mapping for {mold}: {column_map}")
-            
-            # Extract values using column mapping
-            plastic_color = cells[column_map.get('color', 1)].get_text(strip=True) if 'color' in column_map and len(cells) > column_map['color'] else None
-            
-            # Log missing columns for debugging
-            missing_columns = []
-            for col in ['stiffness', 'price']:
-                if col not in column_map:
-                    missing_columns.append(col)
-            if missing_columns:
-                logger.warning(f"Missing columns for {mold}: {missing_columns}")
+            if column_map is None:
+                column_map = self._build_column_map(headers)
             
-            # Handle stamp foil
-            stamp_foil = None
-            if 'stamp_foil' in column_map and len(cells) > column_map['stamp_foil']:
-                stamp_foil = cells[column_map['stamp_foil']].get_text(strip=True)
+            # Extract every cell's text once; all columns are parsed from these
+            if cell_texts is None:
+                cell_texts = self._cell_texts(cells)
             
-            # Handle rim color
-            rim_color = cells[column_map.get('rim_color', 0)].get_text(strip=True) if 'rim_color' in column_map and len(cells) > column_map['rim_color'] else None
+            # Extract values using column mapping
+            plastic_color = self._column_text(cell_texts, column_map, 'color')
+            stamp_foil = self._column_text(cell_texts, column_map, 'stamp_foil')
+            rim_color = self._column_text(cell_texts, column_map, 'rim_color')
             
             # Parse weight
             weight = None
-            if 'weight' in column_map and len(cells) > column_map['weight']:
-                weight_text = cells[column_map['weight']].get_text(strip=True)
+            weight_text = self._column_text(cell_texts, column_map, 'weight')
+            if weight_text:
                 weight_match = re.search(r'(\d+)', weight_text)
                 if weight_match:
                     weight = float(weight_match.group(1))
             
             # Parse scaled weight
             scaled_weight = None
-            if 'scaled_weight' in column_map and len(cells) > column_map['scaled_weight']:
-                scaled_weight_text = cells[column_map['scaled_weight']].get_text(strip=True)
+            scaled_weight_text = self._column_text(cell_texts, column_map, 'scaled_weight')
+            if scaled_weight_text:
                 scaled_match = re.search(r'(\d+(?:\.\d+)?)', scaled_weight_text)
                 if scaled_match:
                     scaled_weight = float(scaled_match.group(1))
             
             # Parse flatness
             flatness = None
-            if 'flatness' in column_map and len(cells) > column_map['flatness']:
-                flatness_text = cells[column_map['flatness']].get_text(strip=True)
+            flatness_text = self._column_text(cell_texts, column_map, 'flatness')
+            if flatness_text:
                 flatness_match = re.search(r'\((\d+)\)', flatness_text)
                 if flatness_match:
                     flatness = float(flatness_match.group(1))
             
             # Parse stiffness
             stiffness = None
-            if 'stiffness' in column_map and len(cells) > column_map['stiffness']:
-                stiffness_text = cells[column_map['stiffness']].get_text(strip=True)
+            stiffness_text = self._column_text(cell_texts, column_map, 'stiffness')
+            if stiffness_text:
                 stiffness_match = re.search(r'\((\d+)\)', stiffness_text)
                 if stiffness_match:
                     stiffness = float(stiffness_match.group(1))
             
-            # Parse price
-            price = None
-            if 'price' in column_map and len(cells) > column_map['price']:
-                price_text = cells[column_map['price']].get_text(strip=True)
-                price_match = re.search(r'\$(\d+(?:\.\d+)?)', price_text)
-                if price_match:
-                    price = Decimal(price_match.group(1))
-            
-            # Parse stock status
-            stock_status = StockStatus.UNKNOWN
-            if 'stock' in column_map and len(cells) > column_map['stock']:
-                stock_text = cells[column_map['stock']].get_text(strip=True).lower()
-                if 'just 1 left' in stock_text or 'in stock' in stock_text:
-                    stock_status = StockStatus.IN_STOCK
-                elif 'out of stock' in stock_text:
-                    stock_status = StockStatus.OUT_OF_STOCK
-                elif 'limited' in stock_text:
-                    stock_status = StockStatus.LIMITED
+            # Parse price and stock status
+            price = self._parse_price_text(self._column_text(cell_texts, column_map, 'price'))
+            stock_status = self._parse_stock_text(self._column_text(cell_texts, column_map, 'stock'))
             
             # Get image URL from thumbnail cell
             image_url = None
@@ -318,57 +1089,8 @@ class OTBDiscsScraper:
                 if img_element and img_element.get('src'):
                     image_url = img_element['src']
             
-            # Capture the raw row text for exact matching on OTB pages
-            # This preserves the exact formatting as it appears on the OTB website
-            raw_row_text = None
-            try:
-                # Get the parent row element
-                row_element = cells[0].parent if cells else None
-                if row_element:
-                    # Get the raw HTML of the row to see the exact structure
-                    row_html = str(row_element)
-                    logger.debug(f"Raw row HTML: {row_html}")
-                    
-                    # Extract text from each cell, preserving the order and excluding unwanted elements
-                    row_parts = []
-                    
-                    for i, cell in enumerate(cells):
-                        # Skip thumbnail/image cells (usually first column)
-                        if i == 0 and ('thumbnail' in column_map or 'image' in column_map):
-                            continue
-                        
-                        # Get the cell text, but exclude buttons and stock messages
-                        cell_text = cell.get_text(strip=True)
-                        
-                        # Skip cells that contain button text or stock messages
-                        if any(skip_text in cell_text.lower() for skip_text in [
-                            'add to cart', 'just 1 left', 'in stock', 'out of stock', 
-                            'limited', 'button', 'click', 'buy now'
-                        ]):
-                            continue
-                        
-                        # Skip empty cells
-                        if not cell_text:
-                            continue
-                        
-                        # Clean up the cell text - preserve the exact content
-                        # Only replace newlines with spaces, preserve tabs and other whitespace
-                        cell_text = cell_text.replace('\n', ' ').replace('\r', ' ')
-                        # Remove leading/trailing whitespace but preserve internal formatting
-                        cell_text = cell_text.strip()
-                        
-                        if cell_text:
-                            row_parts.append(cell_text)
-                    
-                    if row_parts:
-                        # Join with tabs to match OTB's table format
-                        raw_row_text = '\t'.join(row_parts)
-                        logger.debug(f"Captured raw row text for {mold}: '{raw_row_text}'")
-                        logger.debug(f"Raw row text repr: {repr(raw_row_text)}")
-                        logger.debug(f"Row parts: {row_parts}")
-                    
-            except Exception as e:
-                logger.warning(f"Could not capture raw row text: {e}")
+            # Cell texts rather than the row Tag, which would keep its whole soup alive in the trace
+            trace_debug(logger, "Row cells: %s", cell_texts)
             
             disc = Disc(
                 brand=brand,
@@ -384,15 +1106,20 @@ class OTBDiscsScraper:
                 price=price,
                 stock=stock_status,
                 product_url=product_url,
-                image_url=image_url,
-                raw_row_text=raw_row_text
+                image_url=image_url
             )
+            disc.id = disc_id(disc)
             
             return disc
             
         except Exception as e:
-            logger.error(f"Error parsing table row: {e}")
+            logger.error("Error parsing table row: %s", e)
             return None
+    
+    @staticmethod
+    def _cell_texts(cells) -> List[str]:
+        """Get the stripped text of every cell in a row"""
+        return [cell.get_text(strip=True) for cell in cells]
 
     def _parse_product(self, product_element) -> Optional[Disc]:
         """
@@ -438,11 +1165,12 @@ class OTBDiscsScraper:
                 price=price,
                 product_url=product_url
             )
+            disc.id = disc_id(disc)
             
             return disc
             
         except Exception as e:
-            logger.error(f"Error parsing product: {e}")
+            logger.error("Error parsing product: %s", e)
             return None
     
     def _parse_product_name(self, name: str) -> tuple:
@@ -455,7 +1183,7 @@ class OTBDiscsScraper:
         Returns:
             Tuple of (brand, mold, plastic_type)
         """
-        logger.debug(f"🔍 Parsing product name: '{name}'")
+        trace_debug(logger, "🔍 Parsing product name: '%s'", name)
         
         name_lower = name.lower()
         
@@ -468,7 +1196,7 @@ class OTBDiscsScraper:
         brand_plastics = db.get_brand_plastics_map()
         
         # First, try to identify by plastic type (which often indicates brand)
-        logger.debug(f"🔍 Checking for plastic types in '{name_lower}'")
+        trace_debug(logger, "🔍 Checking for plastic types in '%s'", name_lower)
         
         # Sort plastics by length (longest first) to prioritize more specific matches
         all_plastics = []
@@ -485,43 +1213,43 @@ class OTBDiscsScraper:
             # Create a pattern that matches the plastic as a complete word
             pattern = r'\b' + re.escape(plastic_lower) + r'\b'
             if re.search(pattern, name_lower):
-                logger.debug(f"✅ Found plastic '{plastic}' for brand '{brand_name}' in '{name}'")
+                trace_debug(logger, "✅ Found plastic '%s' for brand '%s' in '%s'", plastic, brand_name, name)
                 brand = brand_name
                 plastic_type = plastic
                 # Remove both brand and plastic from name to get mold
                 remaining = name.replace(brand_name, '').replace(plastic, '').strip()
-                logger.debug(f"🔍 After removing brand '{brand_name}' and plastic '{plastic}': '{remaining}'")
+                trace_debug(logger, "🔍 After removing brand '%s' and plastic '%s': '%s'", brand_name, plastic, remaining)
                 if remaining:
                     mold = remaining
-                logger.debug(f"📋 Result: brand='{brand}', mold='{mold}', plastic='{plastic_type}'")
+                trace_debug(logger, "📋 Result: brand='%s', mold='%s', plastic='%s'", brand, mold, plastic_type)
                 
                 # Learn this relationship to improve future parsing
                 db.learn_brand_plastic_relationship(brand, plastic_type, 0.1)
                 
                 return brand, mold, plastic_type
         
-        logger.debug(f"🔍 No plastic type found, checking for brand directly in '{name_lower}'")
+        trace_debug(logger, "🔍 No plastic type found, checking for brand directly in '%s'", name_lower)
         # If no plastic found, try to identify brand directly
         all_brands = db.get_all_brands()
         for brand_name in all_brands:
             if brand_name.lower() in name_lower:
-                logger.debug(f"✅ Found brand '{brand_name}' in '{name}'")
+                trace_debug(logger, "✅ Found brand '%s' in '%s'", brand_name, name)
                 brand = brand_name
                 # Remove brand from name for further processing
                 name = name.replace(brand_name, '').strip()
-                logger.debug(f"🔍 After removing brand '{brand_name}': '{name}'")
+                trace_debug(logger, "🔍 After removing brand '%s': '%s'", brand_name, name)
                 break
         
         # Extract mold (usually the last significant word)
         name_parts = [part for part in name.split() if part.lower() not in ['disc', 'golf']]
-        logger.debug(f"🔍 Name parts after filtering: {name_parts}")
+        trace_debug(logger, "🔍 Name parts after filtering: %s", name_parts)
         if name_parts:
             if plastic_type == "Unknown" and brand == "Unknown" and len(name_parts) >= 3:
                 # Format: {Brand} {Plastic} {Mold}
                 brand = name_parts[0]
                 plastic_type = name_parts[1]
                 mold = ' '.join(name_parts[2:])
-                logger.debug(f"📋 Format: Brand Plastic Mold -> brand='{brand}', plastic='{plastic_type}', mold='{mold}'")
+                trace_debug(logger, "📋 Format: Brand Plastic Mold -> brand='%s', plastic='%s', mold='%s'", brand, plastic_type, mold)
                 
                 # Learn this relationship
                 db.learn_brand_plastic_relationship(brand, plastic_type, 0.05)
@@ -529,7 +1257,7 @@ class OTBDiscsScraper:
             elif plastic_type == "Unknown" and len(name_parts) > 1:
                 plastic_type = name_parts[0]
                 mold = ' '.join(name_parts[1:])
-                logger.debug(f"📋 Format: Plastic Mold -> plastic='{plastic_type}', mold='{mold}'")
+                trace_debug(logger, "📋 Format: Plastic Mold -> plastic='%s', mold='%s'", plastic_type, mold)
                 
                 # Try to learn the brand for this plastic
                 learned_brand = db.get_brand_for_plastic(plastic_type)
@@ -539,9 +1267,9 @@ class OTBDiscsScraper:
                 
             else:
                 mold = name_parts[-1]
-                logger.debug(f"📋 Format: Last word -> mold='{mold}'")
+                trace_debug(logger, "📋 Format: Last word -> mold='%s'", mold)
         
-        logger.debug(f"📋 Final result: brand='{brand}', mold='{mold}', plastic='{plastic_type}'")
+        trace_debug(logger, "📋 Final result: brand='%s', mold='%s', plastic='%s'", brand, mold, plastic_type)
         return brand, mold, plastic_type
     
     def _is_relevant_match(self, mold_name: str, search_term: str) -> bool:
@@ -555,36 +1283,9 @@ class OTBDiscsScraper:
         Returns:
             True if the disc is a relevant match, False otherwise
         """
-        if not mold_name or not search_term:
-            return False
-            
-        mold_lower = mold_name.lower().strip()
-        search_lower = search_term.lower().strip()
-        
-        # Split both into words for more precise matching
-        mold_words = mold_lower.split()
-        search_words = search_lower.split()
-        
-        # For single-word searches, look for the word in the mold name
-        if len(search_words) == 1:
-            search_word = search_words[0]
-            
-            # Check if any word in the mold contains or matches the search term
-            for word in mold_words:
-                if (search_word == word or 
-                    word.startswith(search_word) or 
-                    word.endswith(search_word)):
-                    return True
-                    
-        # For multi-word searches, require all words to be present
-        else:
-            mold_text = ' '.join(mold_words)
-            for search_word in search_words:
-                if search_word not in mold_text:
-                    return False
-            return True
-                
-        return False
+        # Exact, prefix and suffix word matches always count; other words must
+        # be close enough by trigram similarity to tolerate misspellings
+        return self.relevance.is_relevant(mold_name, search_term)
     
     def _get_detailed_properties(self, product_url: str) -> dict:
         """
@@ -597,7 +1298,7 @@ class OTBDiscsScraper:
             Dictionary of detailed properties
         """
         try:
-            response = self.session.get(product_url, timeout=10)
+            response = self._get(product_url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -663,7 +1364,7 @@ class OTBDiscsScraper:
             return details
             
         except Exception as e:
-            logger.error(f"Error getting detailed properties from {product_url}: {e}")
+            logger.error("Error getting detailed properties from %s: %s", product_url, e)
             return {}
     
     def display_discs_table(self, discs: List[Disc], max_rows: int = 20, title: str = "Disc Search Results") -> None:
@@ -730,8 +1431,11 @@ class OTBDiscsScraper:
         if brand != "Unknown" and plastic_type != "Unknown":
             # Boost confidence for this brand/plastic combination
             db.learn_brand_plastic_relationship(brand, plastic_type, 0.2)
-            logger.debug(f"📚 Learned from successful parse: {brand} + {plastic_type}")
+            trace_debug(logger, "📚 Learned from successful parse: %s + %s", brand, plastic_type)
     
     def close(self):
         """Close the session"""
+        self._revalidate_executor.shutdown(wait=False)
+        if self.parse_pool is not None:
+            self.parse_pool.close()
         self.session.close()
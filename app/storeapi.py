@@ -0,0 +1,180 @@
+"""
+WooCommerce Store API source for OTB products
+
+OTB runs on WooCommerce, which serves products and their variations as JSON
+through the Store API. Reading it costs a fraction of the bytes and CPU of
+parsing product pages. Variation attributes are fed through the same column
+mapping and row parsing as the HTML variants table, so both sources produce
+identical Disc objects. Products whose variations lack the attributes needed
+for a disc are parsed from their HTML product page instead.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from .identity import disc_id, unique_ids
+from .models import Disc, StockStatus
+from .tracing import bind, trace_debug
+
+logger = logging.getLogger(__name__)
+
+STORE_API_PATH = "/wp-json/wc/store/v1/products"
+
+
+class StoreAPIError(Exception):
+    """Raised when the Store API is unavailable or returns unexpected data"""
+
+
+class StoreAPISource:
+    """Fetches products and variations in bulk from the WooCommerce Store API"""
+
+    def __init__(self, scraper, per_page: int = 100, max_pages: int = 5):
+        self.scraper = scraper
+        self.per_page = per_page
+        self.max_pages = max_pages
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.scraper.base_url}{STORE_API_PATH}"
+
+    def _get_json(self, params: dict) -> tuple:
+        """Get one page of products as (items, total_pages)"""
+        response = self.scraper._get(self.endpoint, params=params)
+        if response.status_code != 200:
+            raise StoreAPIError(f"Store API returned HTTP {response.status_code}")
+        try:
+            items = response.json()
+        except ValueError as e:
+            raise StoreAPIError(f"Store API returned invalid JSON: {e}")
+        if not isinstance(items, list):
+            raise StoreAPIError("Store API returned an unexpected payload")
+        total_pages = int(response.headers.get('X-WP-TotalPages', 1) or 1)
+        return items, total_pages
+
+    def search(self, product_name: str, max_results: int = 50) -> Optional[List[Disc]]:
+        """
+        Search products and return their disc variants
+
+        Args:
+            product_name: Search term
+            max_results: Maximum number of relevant products
+
+        Returns:
+            List of Disc objects, or None if the Store API could not be used
+        """
+        try:
+            products = self._search_products(product_name, max_results)
+            variations = self._fetch_variations(
+                [v['id'] for product in products for v in product.get('variations') or []]
+            )
+        except Exception as e:
+            logger.warning("Store API search for '%s' failed, falling back to HTML: %s", product_name, e)
+            return None
+
+        all_discs = []
+        for product in products:
+            all_discs.extend(self._product_discs(product, variations))
+        logger.info("Store API returned %s discs from %s products for '%s'", len(all_discs), len(products), product_name)
+        return all_discs
+
+    def _search_products(self, product_name: str, max_results: int) -> List[dict]:
+        """Collect relevant products page by page until max_results are found"""
+        relevant = []
+        page, total_pages = 1, 1
+        while page <= min(total_pages, self.max_pages) and len(relevant) < max_results:
+            items, total_pages = self._get_json({
+                'search': product_name, 'per_page': self.per_page, 'page': page
+            })
+            for item in items:
+                _, mold, _ = self.scraper._parse_product_name(item['name'])
+                self.scraper.relevance.add(mold)
+                if self.scraper._is_relevant_match(mold, product_name):
+                    relevant.append(item)
+                    if len(relevant) >= max_results:
+                        break
+            page += 1
+        return relevant
+
+    def _fetch_variations(self, variation_ids: List[int]) -> Dict[int, dict]:
+        """Fetch variations in bulk, one request per page of ids"""
+        if not variation_ids:
+            return {}
+        chunks = [variation_ids[i:i + self.per_page] for i in range(0, len(variation_ids), self.per_page)]
+        variations = {}
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.scraper.max_concurrent_requests)) as executor:
+            pages = executor.map(bind(self._get_json), [
+                {'type': 'variation', 'include': ','.join(str(i) for i in chunk), 'per_page': self.per_page}
+                for chunk in chunks
+            ])
+            for items, _ in pages:
+                for item in items:
+                    variations[item['id']] = item
+        return variations
+
+    @staticmethod
+    def _price(item: dict) -> Optional[Decimal]:
+        prices = item.get('prices') or {}
+        if prices.get('price') in (None, ''):
+            return None
+        return Decimal(prices['price']) / (10 ** int(prices.get('currency_minor_unit', 2)))
+
+    @staticmethod
+    def _stock_text(item: dict) -> str:
+        if not item.get('is_in_stock', False):
+            return 'Out of stock'
+        if item.get('low_stock_remaining') == 1:
+            return 'Just 1 left'
+        return 'In stock'
+
+    @staticmethod
+    def _image_url(item: dict) -> Optional[str]:
+        images = item.get('images') or []
+        return images[0].get('src') if images else None
+
+    def _product_discs(self, product: dict, variations: Dict[int, dict]) -> List[Disc]:
+        """Map a product and its variations to Disc objects"""
+        brand, mold, plastic_type = self.scraper._parse_product_name(product['name'])
+        product_url = product.get('permalink')
+        summary = Disc(
+            brand=brand,
+            mold=mold,
+            plastic_type=plastic_type,
+            price=self._price(product),
+            stock=StockStatus.IN_STOCK if product.get('is_in_stock') else StockStatus.OUT_OF_STOCK,
+            product_url=product_url,
+            image_url=self._image_url(product)
+        )
+        summary.id = disc_id(summary)
+
+        discs = []
+        complete = bool(product.get('variations'))
+        for variation_ref in product.get('variations') or []:
+            variation = variations.get(variation_ref['id'])
+            attributes = variation_ref.get('attributes') or (variation or {}).get('attributes') or []
+            # Present the variation like a variants table row so it is parsed identically
+            headers = [a['name'].lower() for a in attributes] + ['price', 'stock']
+            column_map = self.scraper._build_column_map(headers)
+            if variation is None or 'weight' not in column_map:
+                trace_debug(logger, "Variation %s of %s is missing or has no weight", variation_ref['id'], product_url)
+                complete = False
+                break
+            price = self._price(variation) or summary.price
+            cell_texts = [a['value'] for a in attributes] + [
+                f"${price}" if price is not None else '', self._stock_text(variation)
+            ]
+            disc = self.scraper._parse_table_row(
+                [], headers, brand, mold, plastic_type, product_url,
+                column_map=column_map, cell_texts=cell_texts
+            )
+            if disc:
+                disc.image_url = self._image_url(variation) or summary.image_url
+                discs.append(disc)
+        if complete and discs:
+            return list(unique_ids(discs))
+
+        # Missing variation data: parse the product page like the HTML search does
+        if product_url:
+            logger.info("Store API data incomplete for %s, parsing product page", product_url)
+            return self.scraper._fetch_product_variants(product_url, summary) or [summary]
+        return [summary]
@@ -0,0 +1,161 @@
+"""
+Row-by-row extraction of variants tables from product pages
+
+The page is fed to an incremental HTML tokenizer as it downloads, and each row
+of the variants table is handed out as soon as it is complete. No document
+tree is built, so memory use does not grow with the number of variants on a
+page, unlike parsing the whole page with BeautifulSoup.
+"""
+import codecs
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+
+class StreamedRow(NamedTuple):
+    """Data row of a variants table, with the page context needed to parse it"""
+    title: Optional[str]
+    headers: List[str]
+    cell_texts: List[str]
+    image_url: Optional[str]
+
+
+def _is_variants_header(headers: List[str]) -> bool:
+    return any('weight' in h for h in headers) and any('price' in h for h in headers)
+
+
+class _TableRowTokenizer(HTMLParser):
+    """
+    Collects the rows of the first variants table while HTML is fed to it
+
+    Cell text is built like BeautifulSoup's get_text(strip=True): every text
+    node stripped and joined. Omitted </td> and </tr> tags are closed by the
+    next cell, row or the end of the table.
+    """
+
+    def __init__(self, min_cells: int):
+        super().__init__(convert_charrefs=True)
+        self.min_cells = min_cells
+        self.title: Optional[str] = None
+        self.headers: List[str] = []
+        self.thumbnail: Optional[int] = None
+        self.rows: List[StreamedRow] = []
+        self.done = False
+        self._title_parts: Optional[List[str]] = None
+        # Raw pieces of the current text node; a node can arrive split across feeds
+        self._text: List[str] = []
+        # One entry per open table: whether its first row was checked and whether it is the variants table
+        self._tables: List[dict] = []
+        self._row: Optional[List[tuple]] = None
+        self._cell: Optional[list] = None
+
+    def handle_starttag(self, tag, attrs):
+        self._end_text()
+        if self.done:
+            return
+        if tag == 'h1' and self.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == 'table':
+            self._tables.append({'checked': False, 'variants': False})
+        elif not self._tables:
+            return
+        elif tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._end_cell()
+            self._cell = [tag, [], None]
+        elif tag == 'img' and self._cell is not None and self._cell[2] is None:
+            self._cell[2] = dict(attrs).get('src') or None
+
+    def handle_endtag(self, tag):
+        self._end_text()
+        if self.done:
+            return
+        if tag == 'h1' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts) or None
+            self._title_parts = None
+        elif tag == 'table' and self._tables:
+            self._end_row()
+            if self._tables.pop()['variants']:
+                self.done = True
+        elif tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'tr':
+            self._end_row()
+
+    def handle_data(self, data):
+        if self._title_parts is not None or self._cell is not None:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._end_text()
+
+    def _end_text(self) -> None:
+        if not self._text:
+            return
+        text = ''.join(self._text).strip()
+        self._text.clear()
+        if not text:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        if self._cell is not None:
+            self._cell[1].append(text)
+
+    def _end_cell(self) -> None:
+        if self._cell is not None and self._row is not None:
+            tag, parts, image_url = self._cell
+            self._row.append((tag, ''.join(parts), image_url))
+        self._cell = None
+
+    def _end_row(self) -> None:
+        self._end_cell()
+        row, self._row = self._row, None
+        if row is None or not self._tables:
+            return
+        table = self._tables[-1]
+        if not table['checked']:
+            # First row of a table: is it the variants table header?
+            table['checked'] = True
+            headers = [text.lower() for _, text, _ in row]
+            if not self.headers and _is_variants_header(headers):
+                table['variants'] = True
+                self.headers = headers
+                self.thumbnail = next((i for i, h in enumerate(headers) if 'thumbnail' in h or 'image' in h), None)
+            return
+        if table['variants']:
+            cells = [(text, image_url) for tag, text, image_url in row if tag == 'td']
+            if len(cells) >= self.min_cells:
+                image_url = None
+                if self.thumbnail is not None and self.thumbnail < len(cells):
+                    image_url = cells[self.thumbnail][1]
+                self.rows.append(StreamedRow(self.title, self.headers, [text for text, _ in cells], image_url))
+
+
+def iter_table_rows(chunks: Iterable[bytes], min_cells: int = 8, encoding: str = 'utf-8') -> Iterator[StreamedRow]:
+    """
+    Extract the data rows of the first variants table from an HTML byte stream
+
+    The variants table is the first table whose first row has weight and price
+    headers, as in OTBDiscsScraper._find_variants_table. Reading stops at the
+    end of that table.
+
+    Args:
+        chunks: Page body in chunks, e.g. from Response.iter_content
+        min_cells: Rows with fewer cells are skipped, like the DOM parser does
+        encoding: Encoding of the page
+
+    Yields:
+        StreamedRow for each data row, in page order
+    """
+    tokenizer = _TableRowTokenizer(min_cells)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for chunk in chunks:
+        tokenizer.feed(decoder.decode(chunk))
+        yield from tokenizer.rows
+        tokenizer.rows.clear()
+        if tokenizer.done:
+            return
+    tokenizer.feed(decoder.decode(b'', final=True))
+    tokenizer.close()
+    yield from tokenizer.rows
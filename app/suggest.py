@@ -0,0 +1,124 @@
+"""
+In-memory prefix index for mold, brand and plastic autocomplete
+"""
+import heapq
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Disc, Suggestion
+from .querylog import normalize_term
+
+SUGGEST_KINDS = ('mold', 'brand', 'plastic')
+# Name part the scraper uses when it cannot tell a product's brand, mold or plastic
+UNKNOWN_VALUE = "Unknown"
+
+
+class SuggestIndex:
+    """
+    Sorted array of normalized names searched with bisect
+
+    Every word suffix of a name is indexed ("buzzz ss" and "ss"), so a prefix
+    matches the start of any word. Matches are ranked by how often the name was
+    searched, then by how often it appeared in scraped results. The sorted array
+    is rebuilt lazily after names are added, so lookups never sort.
+    """
+
+    def __init__(self):
+        # (kind, normalized name) -> [display name, seen]
+        self._terms: Dict[Tuple[str, str], list] = {}
+        self._searches: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, str]] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def add(self, name: Optional[str], kind: str, seen: int = 0) -> None:
+        """
+        Add a name to the index
+
+        Args:
+            name: Mold, brand or plastic name
+            kind: One of SUGGEST_KINDS
+            seen: Number of scraped results the name appeared in
+        """
+        normalized = normalize_term(name or '')
+        if not normalized:
+            return
+        with self._lock:
+            term = self._terms.get((kind, normalized))
+            if term is None:
+                self._terms[(kind, normalized)] = [name.strip(), seen]
+                self._dirty = True
+            else:
+                term[1] += seen
+
+    def add_discs(self, discs: Iterable[Disc]) -> None:
+        """Add the molds, brands and plastics of scraped discs, skipping the "Unknown" placeholders"""
+        for disc in discs:
+            for value, kind in ((disc.mold, 'mold'), (disc.brand, 'brand'), (disc.plastic_type, 'plastic')):
+                if value != UNKNOWN_VALUE:
+                    self.add(value, kind, 1)
+
+    def record_searches(self, counts: Dict[str, int]) -> None:
+        """
+        Add search counts per normalized term, used to rank suggestions
+
+        Args:
+            counts: Number of searches per term
+        """
+        with self._lock:
+            for term, count in counts.items():
+                key = normalize_term(term)
+                self._searches[key] = self._searches.get(key, 0) + count
+
+    def _rebuild(self) -> None:
+        pairs = []
+        for kind, normalized in self._terms:
+            words = normalized.split()
+            for i in range(len(words)):
+                pairs.append((' '.join(words[i:]), (kind, normalized)))
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._entries = [entry for _, entry in pairs]
+        self._dirty = False
+
+    def suggest(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Suggestion]:
+        """
+        Get the most popular names with a word starting with prefix
+
+        Args:
+            prefix: Partial name as typed
+            limit: Maximum number of suggestions
+            kind: Only suggest names of this kind
+
+        Returns:
+            Suggestions, most popular first
+        """
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + '\uffff', start)
+            matches = {entry for entry in self._entries[start:end] if kind is None or entry[0] == kind}
+            scored = [
+                (self._searches.get(normalized, 0), self._terms[(entry_kind, normalized)][1], entry_kind, normalized)
+                for entry_kind, normalized in matches
+            ]
+            # Ties go to the shorter, then alphabetically first name
+            top = heapq.nsmallest(limit, scored, key=lambda s: (-s[0], -s[1], len(s[3]), s[3]))
+            return [
+                Suggestion(
+                    value=self._terms[(entry_kind, normalized)][0],
+                    kind=entry_kind,
+                    searches=searches,
+                    seen=seen
+                )
+                for searches, seen, entry_kind, normalized in top
+            ]
+
+    def __len__(self) -> int:
+        return len(self._terms)
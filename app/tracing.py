@@ -0,0 +1,147 @@
+"""
+Low-overhead logging helpers and per-request debug traces
+
+Debug events raised while serving a request are kept unformatted in a small
+ring buffer bound to the request context. The buffer is only formatted and
+written to the log when the request is slow or fails, so the hot scraping
+loops never pay for DEBUG string formatting in normal operation.
+"""
+import contextvars
+import functools
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("otb_request_trace", default=None)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as logfmt-style key=value lines, including `extra` fields"""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage().replace('"', '\\"')
+        parts = [
+            self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            f"level={record.levelname}",
+            f"logger={record.name}",
+            f'msg="{message}"',
+        ]
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                parts.append(f"{key}={value}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+def configure_logging(level: str = "INFO", structured: bool = False) -> None:
+    """
+    Configure root logging for the application
+
+    Args:
+        level: Root log level name
+        structured: Use key=value output instead of the default format
+    """
+    handler = logging.StreamHandler()
+    if structured:
+        handler.setFormatter(StructuredFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+
+class RequestTrace:
+    """Ring buffer of unformatted debug events for one request"""
+
+    def __init__(self, name: str, max_events: int = 500):
+        self.name = name
+        self.started = time.perf_counter()
+        self.events: deque = deque(maxlen=max_events)
+        self.dropped = 0
+
+    def add(self, logger_name: str, msg: str, args: tuple) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append((time.perf_counter(), logger_name, msg, args))
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def dump(self, logger: logging.Logger, reason: str) -> None:
+        """
+        Write the buffered events to a logger
+
+        Args:
+            logger: Logger to write to
+            reason: Why the trace is being dumped (e.g. "slow", "failed")
+        """
+        logger.warning(
+            "Request trace for %s (%s, %.0fms, %d events, %d dropped)",
+            self.name, reason, self.elapsed_ms, len(self.events), self.dropped
+        )
+        for at, logger_name, msg, args in self.events:
+            try:
+                text = msg % args if args else msg
+            except Exception:
+                text = f"{msg} {args!r}"
+            logger.warning("  +%.1fms %s: %s", (at - self.started) * 1000, logger_name, text)
+
+
+def start_trace(name: str, max_events: int = 500) -> contextvars.Token:
+    """Start a trace for the current context and return the token used to end it"""
+    return _current_trace.set(RequestTrace(name, max_events))
+
+
+def end_trace(token: contextvars.Token) -> None:
+    """End the trace started with start_trace"""
+    _current_trace.reset(token)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Get the trace bound to the current context, if any"""
+    return _current_trace.get()
+
+
+def trace_debug(logger: logging.Logger, msg: str, *args: Any) -> None:
+    """
+    Record a debug event without formatting it
+
+    The event goes to the current request trace if there is one, and to the
+    logger if DEBUG is enabled. Arguments are only formatted when emitted.
+
+    Args:
+        logger: Logger the event belongs to
+        msg: %-style message
+        *args: Message arguments
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(logger.name, msg, args)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args)
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Bind a callable to the current context so worker threads see the request trace
+
+    Args:
+        fn: Callable to run in an executor thread
+
+    Returns:
+        Callable that runs fn inside a copy of the current context
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,130 @@
+"""
+Cache warm-up for popular searches
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Optional
+
+from .cache import SQLiteLease
+from .querylog import QueryLog
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Pre-scrapes the most popular searches so their results are cached before traffic arrives
+
+    With a lease, a run only happens in the process holding it, so workers
+    sharing a cache do not each warm it.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        query_log: QueryLog,
+        top_n: int = 10,
+        concurrency: int = 2,
+        interval_seconds: float = 3600.0,
+        default_max_results: int = 3,
+        lease: Optional[SQLiteLease] = None
+    ):
+        self.scraper = scraper
+        self.query_log = query_log
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.interval_seconds = interval_seconds
+        self.default_max_results = default_max_results
+        self.lease = lease
+        self._status: Dict[str, Any] = {
+            "state": "idle", "total": 0, "completed": 0, "failed": 0,
+            "started_at": None, "finished_at": None, "runs": 0
+        }
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def status(self) -> Dict[str, Any]:
+        """Get the progress of the current or last warm-up run"""
+        with self._lock:
+            return dict(self._status)
+
+    def _update(self, **fields) -> None:
+        with self._lock:
+            self._status.update(fields)
+
+    def _increment(self, field: str) -> None:
+        with self._lock:
+            self._status[field] += 1
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Warm the search cache with the top-N searches from the query log
+
+        Returns:
+            Status of the finished run
+        """
+        if self.lease is not None and not self.lease.acquire():
+            logger.info("Cache warm-up skipped, another worker holds the lease")
+            self._update(state="skipped", finished_at=time.time())
+            return self.status()
+        searches = self.query_log.top(self.top_n)
+        self._update(
+            state="running", total=len(searches), completed=0, failed=0,
+            started_at=time.time(), finished_at=None
+        )
+
+        if searches:
+            logger.info("Warming cache for %s popular searches", len(searches))
+            with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as executor:
+                futures = {
+                    executor.submit(
+                        self.scraper.search_result_set, term, max_results or self.default_max_results
+                    ): term
+                    for term, max_results in searches
+                }
+                for future in as_completed(futures):
+                    if self._stop_event.is_set():
+                        break
+                    try:
+                        future.result()
+                        self._increment("completed")
+                    except Exception as e:
+                        logger.warning("Warm-up search for '%s' failed: %s", futures[future], e)
+                        self._increment("failed")
+
+        with self._lock:
+            self._status.update(state="done", finished_at=time.time())
+            self._status["runs"] += 1
+            status = dict(self._status)
+        logger.info("Cache warm-up finished: %s/%s searches", status["completed"], status["total"])
+        return status
+
+    def start(self) -> None:
+        """Run a warm-up now in a background thread and then every interval_seconds (0 runs once)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="otb-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.lease is not None:
+            self.lease.release()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Cache warm-up failed: %s", e)
+                self._update(state="failed", finished_at=time.time())
+            if self.interval_seconds <= 0 or self._stop_event.wait(self.interval_seconds):
+                break
@@ -0,0 +1,211 @@
+"""
+Local stand-in for otbdiscs.com used by the load test
+
+Serves search result pages and product pages for any query, either generated
+or from a recorded product page, with configurable latency, jitter and error
+rate. Requests are counted by kind so a run can report how much upstream
+traffic the app generated.
+
+Run on its own to point a development server at it:
+
+    python benchmarks/fake_otb.py --port 8900 --latency-ms 150
+"""
+import argparse
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+PLASTICS = ["Star", "Champion", "DX", "GStar", "Halo Star", "Blizzard Champion", "Metal Flake Champion", "R-Pro"]
+COLORS = ["Blue", "Red", "Yellow", "Orange", "Pink", "Green", "Purple", "White", "Black", "Teal"]
+FOILS = ["Silver", "Gold", "Rainbow", "Black", "Holographic", "Jelly Bean"]
+FLATNESS = ["Puddle (1)", "Flat (3)", "Dome (5)"]
+STIFFNESS = ["Soft (2)", "Medium (5)", "Stiff (7)"]
+STOCK = ["In stock", "In stock", "In stock", "Just 1 left", "Out of stock"]
+
+_PAGE_PATH = re.compile(r'^/page/(\d+)/?$')
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def search_page(query: str, page: int, products_per_page: int, pages: int) -> str:
+    """Render one page of search results for a query"""
+    mold = query.strip().title() or "Destroyer"
+    items = []
+    for i in range(products_per_page):
+        plastic = PLASTICS[((page - 1) * products_per_page + i) % len(PLASTICS)]
+        title = f"Innova {plastic} {mold}"
+        slug = f"{_slug(title)}-{page}-{i}"
+        items.append(
+            f'<li class="product"><a href="/product/{slug}/">'
+            f'<h2 class="woocommerce-loop-product__title">{title}</h2></a>'
+            f'<span class="price"><span class="woocommerce-Price-amount amount">$17.99</span></span></li>'
+        )
+    pagination = ''.join(f'<a class="page-numbers" href="/page/{n}/">{n}</a>' for n in range(2, pages + 1))
+    return (
+        f'<html><body><ul class="products">{"".join(items)}</ul>'
+        f'<nav class="woocommerce-pagination">{pagination}</nav></body></html>'
+    )
+
+
+def product_page(slug: str, variants: int) -> str:
+    """Render a product page with a variants table, deterministic per slug"""
+    rng = random.Random(slug)
+    words = slug.split('-')
+    title = ' '.join(word.title() for word in words if not word.isdigit())
+    rows = []
+    for i in range(variants):
+        rows.append(
+            '<tr class="variation-row">'
+            f'<td class="thumbnail"><img src="/img/{slug}-{i}.jpg" alt="" /></td>'
+            f'<td>{rng.choice(COLORS)}</td><td>{rng.choice(FOILS)}</td><td>{rng.randint(160, 175)}g</td>'
+            f'<td>{rng.choice(["4.5", "5.0", "5.5", "6.0"])}</td>'
+            f'<td>{rng.choice(FLATNESS)}</td><td>{rng.choice(STIFFNESS)}</td>'
+            f'<td><span class="woocommerce-Price-amount amount">${rng.choice(["16.99", "17.99", "18.99", "24.99"])}</span></td>'
+            f'<td class="stock">{rng.choice(STOCK)}</td>'
+            '</tr>'
+        )
+    return (
+        f'<html><body><h1 class="product_title entry-title">{title}</h1>'
+        '<table class="variations-table"><tr>'
+        '<th>Thumbnail</th><th>Color</th><th>Stamp Foil</th><th>Weight</th><th>Scaled Weight</th>'
+        '<th>Flatness</th><th>Stiffness</th><th>Price</th><th>Stock</th>'
+        f'</tr>{"".join(rows)}</table></body></html>'
+    )
+
+
+class FakeOTBServer:
+    """
+    Threaded HTTP server imitating the OTB search and product pages
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        latency_ms: Base delay before each response
+        jitter_ms: Random extra delay of up to this much
+        error_rate: Fraction of requests answered with 503
+        products_per_page: Products listed on each search page
+        pages: Number of search result pages per query
+        variants: Variant rows on each generated product page
+        recorded_product_page: HTML file served for every product page instead of a generated one
+    """
+
+    def __init__(self, port: int = 0, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 products_per_page: int = 6, pages: int = 2, variants: int = 12,
+                 recorded_product_page: Optional[str] = None, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.products_per_page = products_per_page
+        self.pages = pages
+        self.variants = variants
+        self.recorded = None
+        if recorded_product_page:
+            with open(recorded_product_page, 'rb') as f:
+                self.recorded = f.read()
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeOTBServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def request_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+    def _delay_and_fail(self) -> bool:
+        with self._lock:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000)
+        return fail
+
+    def _respond(self, path: str) -> tuple:
+        parsed = urlparse(path)
+        params = parse_qs(parsed.query)
+
+        if parsed.path.startswith('/product/'):
+            slug = parsed.path.strip('/').split('/')[-1]
+            body = self.recorded or product_page(slug, self.variants).encode('utf-8')
+            return 'product', 200, body
+
+        page_match = _PAGE_PATH.match(parsed.path)
+        if 's' in params:
+            page = int(page_match.group(1)) if page_match else 1
+            if page > self.pages:
+                return 'search', 404, b'<html><body></body></html>'
+            html = search_page(params['s'][0], page, self.products_per_page, self.pages)
+            return 'search', 200, html.encode('utf-8')
+
+        return 'other', 404, b'<html><body></body></html>'
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                kind, status, body = server._respond(self.path)
+                if server._delay_and_fail():
+                    status, body = 503, b'Service Unavailable'
+                with server._lock:
+                    server.counts[kind] += 1
+                    if status >= 500:
+                        server.counts['errors'] += 1
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=UTF-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--recorded-product-page', help='HTML file served for every product page')
+    args = parser.parse_args()
+
+    server = FakeOTBServer(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           error_rate=args.error_rate, recorded_product_page=args.recorded_product_page)
+    print(f"Fake OTB listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
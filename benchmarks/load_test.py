@@ -0,0 +1,129 @@
+"""
+Load test /api/search against a local fake OTB upstream
+
+Starts benchmarks/fake_otb.py in-process, points the app's scraper at it and
+drives the FastAPI app through an in-process ASGI client at a fixed
+concurrency. Reports throughput, latency percentiles, upstream requests and
+peak memory, so engine, cache and concurrency changes can be compared on the
+same workload.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py --requests 500 --concurrency 20 --distinct 10
+    python benchmarks/load_test.py --latency-ms 200 --jitter-ms 100 --error-rate 0.05 --no-cache
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_otb import FakeOTBServer  # noqa: E402
+
+MOLDS = ["Destroyer", "Wraith", "Teebird", "Leopard", "Aviar", "Roc", "Firebird", "Thunderbird",
+         "Mako", "Buzzz", "Zone", "Envy", "Hex", "Reactor", "Berg", "Judge", "Pd", "Felon"]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def queries(distinct):
+    names = MOLDS[:distinct]
+    while len(names) < distinct:
+        names.append(f"{MOLDS[len(names) % len(MOLDS)]}{len(names)}")
+    return names
+
+
+async def run(app, args, names):
+    import httpx
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    statuses = {}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest",
+                                 timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                payload = {"product_name": names[i % len(names)], "max_results": args.max_results,
+                           "deadline_ms": args.deadline_ms}
+                start = time.perf_counter()
+                response = await client.post("/api/search", json=payload)
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/search against a fake OTB upstream")
+    parser.add_argument("--requests", type=int, default=200, help="Total search requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    parser.add_argument("--distinct", type=int, default=10, help="Distinct search terms, cycled")
+    parser.add_argument("--max-results", type=int, default=50)
+    parser.add_argument("--deadline-ms", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="Disable the search and page caches")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Upstream base latency")
+    parser.add_argument("--jitter-ms", type=float, default=25, help="Upstream random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream 503s")
+    parser.add_argument("--products-per-page", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=2, help="Search result pages per query")
+    parser.add_argument("--variants", type=int, default=12, help="Variant rows per product page")
+    parser.add_argument("--recorded-product-page", help="HTML file served for every product page")
+    args = parser.parse_args()
+
+    upstream = FakeOTBServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                             products_per_page=args.products_per_page, pages=args.pages,
+                             variants=args.variants, recorded_product_page=args.recorded_product_page).start()
+
+    # Keep the app's files out of the working tree and its background jobs quiet
+    workdir = tempfile.mkdtemp(prefix="otb-load-")
+    os.environ.update({
+        "OTB_BASE_URL": upstream.url,
+        "HISTORY_DB_PATH": os.path.join(workdir, "history.db"),
+        "BRAND_DB_PATH": os.path.join(workdir, "brands.db"),
+        "QUERY_LOG_PATH": os.path.join(workdir, "query_log.jsonl"),
+        "WARMUP_TOP_N": "0",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    })
+    if args.no_cache:
+        os.environ.update({"SEARCH_CACHE_TTL": "0", "SEARCH_STALE_TTL": "0", "PAGE_CACHE_TTL": "0"})
+
+    from app.main import app, scraper
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        elapsed, latencies, statuses = asyncio.run(run(app, args, queries(args.distinct)))
+    finally:
+        scraper.close()
+        upstream.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    counts = upstream.request_counts()
+    print(f"requests     {args.requests} at concurrency {args.concurrency}, {args.distinct} distinct terms")
+    print(f"throughput   {args.requests / elapsed:.1f} req/s over {elapsed:.2f}s")
+    print(f"latency ms   p50 {percentile(latencies, 0.5):.1f}  p90 {percentile(latencies, 0.9):.1f}  "
+          f"p99 {percentile(latencies, 0.99):.1f}  max {max(latencies):.1f}  mean {statistics.mean(latencies):.1f}")
+    print(f"status       {', '.join(f'{code}: {n}' for code, n in sorted(statuses.items()))}")
+    print(f"upstream     search {counts.get('search', 0)}  product {counts.get('product', 0)}  "
+          f"errors {counts.get('errors', 0)}  ({sum(counts.get(k, 0) for k in ('search', 'product', 'other')) / args.requests:.2f} per request)")
+    # ru_maxrss is in KiB on Linux
+    print(f"memory       peak RSS {rss_after / 1024:.1f} MiB (+{(rss_after - rss_before) / 1024:.1f} MiB during run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure multi-page search throughput with product pages parsed in threads or worker processes
+
+Starts the fake OTB upstream without latency, so a search is dominated by
+parsing, and runs concurrent multi-page searches with increasing numbers of
+parse workers (0 parses in the request threads under the GIL).
+
+Run from the repository root:
+
+    python benchmarks/parse_pool_benchmark.py --searches 8 --variants 60
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.scraper import OTBDiscsScraper  # noqa: E402
+from benchmarks.fake_otb import FakeOTBServer  # noqa: E402
+from benchmarks.load_test import MOLDS  # noqa: E402
+
+
+def measure(upstream, workers, args):
+    scraper = OTBDiscsScraper(max_concurrent_requests=args.concurrency, max_search_pages=args.pages,
+                              base_url=upstream.url, parse_workers=workers)
+    try:
+        names = [MOLDS[i % len(MOLDS)] for i in range(args.searches)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.searches) as executor:
+            discs = sum(len(result) for result in executor.map(
+                lambda name: scraper.search_discs(name, max_results=200), names))
+        elapsed = time.perf_counter() - start
+    finally:
+        scraper.close()
+    pages = args.searches * args.pages * args.products_per_page
+    label = f"{workers} workers" if workers else "threads"
+    print(f"{label:<11} {pages / elapsed:8.1f} pages/s  {elapsed:6.2f}s  ({discs} discs)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare parse throughput across worker counts")
+    parser.add_argument("--searches", type=int, default=8, help="Concurrent searches")
+    parser.add_argument("--pages", type=int, default=3, help="Search result pages per search")
+    parser.add_argument("--products-per-page", type=int, default=8)
+    parser.add_argument("--variants", type=int, default=60, help="Variant rows per product page")
+    parser.add_argument("--concurrency", type=int, default=16, help="Upstream request budget")
+    parser.add_argument("--workers", type=int, nargs="*", help="Worker counts to try (default 0, 1, 2, 4 ... CPUs)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    counts = args.workers or [0] + [n for n in (1, 2, 4, 8, 16, 32) if n <= cpus] + ([cpus] if cpus not in (1, 2, 4, 8, 16, 32) else [])
+    print(f"{cpus} CPUs, {args.searches} searches x {args.pages} pages x {args.products_per_page} products, "
+          f"{args.variants} variants per product")
+
+    upstream = FakeOTBServer(products_per_page=args.products_per_page, pages=args.pages, variants=args.variants).start()
+    try:
+        baseline = None
+        for workers in counts:
+            elapsed = measure(upstream, workers, args)
+            baseline = baseline or elapsed
+            if workers:
+                print(f"{'':<11} {baseline / elapsed:.2f}x vs threads")
+    finally:
+        upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare product page parsing throughput of the embedded-JSON and table paths
+
+Run from the repository root:
+
+    python benchmarks/product_page_benchmark.py
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.scraper import OTBDiscsScraper  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "product_page_variations.html")
+URL = "https://otbdiscs.com/product/innova-star-destroyer/"
+
+
+def measure(name, parse, rounds=200):
+    parse()  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        snapshot = parse()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {rounds / elapsed:8.0f} pages/s  {elapsed / rounds * 1000:6.2f}ms per page  "
+          f"({len(snapshot.discs)} discs)")
+    return elapsed
+
+
+def main():
+    with open(FIXTURE, "rb") as f:
+        content = f.read()
+    scraper = OTBDiscsScraper()
+
+    embedded = measure("embedded", lambda: scraper._parse_product_html(content, URL))
+    table = measure("table", lambda: scraper._parse_product_html(content, URL, use_embedded=False))
+    print(f"embedded JSON path is {table / embedded:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
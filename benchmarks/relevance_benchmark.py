@@ -0,0 +1,98 @@
+"""
+Benchmark the trigram mold matcher against the previous word matcher
+
+Run from the repository root:
+
+    python benchmarks/relevance_benchmark.py
+
+Each query in the corpus is paired with the mold the user meant. Recall is the
+share of queries for which that mold is judged relevant, false positives count
+other molds judged relevant. Fuzzy matching trades some precision for recall:
+most of the trigram matcher's extra false positives are close relatives of the
+intended mold (Star Destroyer for "destoyer", Teebird3 for "tebird").
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.relevance import MoldMatcher  # noqa: E402
+
+MOLDS = [
+    "Destroyer", "Wraith", "Thunderbird", "Firebird", "Teebird", "Teebird3", "Leopard",
+    "Leopard3", "Roc", "Roc3", "Aviar", "Mako3", "Shryke", "Boss", "Valkyrie", "Sidewinder",
+    "Buzzz", "Buzzz SS", "Zone", "Luna", "Force", "Nuke", "Undertaker", "Heat", "Stalker",
+    "Predator", "Avenger SS", "Machete", "Vulture", "Crank", "Drone", "Athena", "Passion",
+    "Judge", "Truth", "Maverick", "Felon", "Warden", "Berg", "Hatchet", "Mamba", "Grace",
+    "Emperor", "Raptor", "Anax", "Zeus", "Heat", "Tern", "Corvette", "Star Destroyer",
+]
+
+# (query as typed, intended mold)
+QUERIES = [
+    ("destroyer", "Destroyer"), ("destoyer", "Destroyer"), ("destroer", "Destroyer"),
+    ("dest", "Destroyer"), ("wraith", "Wraith"), ("wrath", "Wraith"), ("wriath", "Wraith"),
+    ("thunderbird", "Thunderbird"), ("thunder bird", "Thunderbird"), ("tbird", "Thunderbird"),
+    ("firebird", "Firebird"), ("firebrd", "Firebird"), ("fire bird", "Firebird"),
+    ("teebird", "Teebird"), ("tebird", "Teebird"), ("leopard", "Leopard"), ("leapord", "Leopard"),
+    ("leopard3", "Leopard3"), ("aviar", "Aviar"), ("avair", "Aviar"), ("buzzz", "Buzzz"),
+    ("buzz", "Buzzz"), ("buz", "Buzzz"), ("buzzz ss", "Buzzz SS"), ("zone", "Zone"),
+    ("zonee", "Zone"), ("luna", "Luna"), ("force", "Force"), ("forse", "Force"),
+    ("nuke", "Nuke"), ("undertaker", "Undertaker"), ("undertacker", "Undertaker"),
+    ("predator", "Predator"), ("preditor", "Predator"), ("machete", "Machete"),
+    ("machette", "Machete"), ("valkyrie", "Valkyrie"), ("valkrie", "Valkyrie"),
+    ("valkyre", "Valkyrie"), ("sidewinder", "Sidewinder"), ("side winder", "Sidewinder"),
+    ("athena", "Athena"), ("athina", "Athena"), ("maverick", "Maverick"), ("maverik", "Maverick"),
+    ("emperor", "Emperor"), ("emporer", "Emperor"), ("raptor", "Raptor"), ("raptr", "Raptor"),
+    ("hatchet", "Hatchet"), ("hatchett", "Hatchet"), ("corvette", "Corvette"), ("corvet", "Corvette"),
+]
+
+
+def legacy_match(mold_name, search_term):
+    """Word matcher used before the trigram index"""
+    if not mold_name or not search_term:
+        return False
+    mold_words = mold_name.lower().strip().split()
+    search_words = search_term.lower().strip().split()
+    if len(search_words) == 1:
+        search_word = search_words[0]
+        return any(
+            search_word == word or word.startswith(search_word) or word.endswith(search_word)
+            for word in mold_words
+        )
+    mold_text = ' '.join(mold_words)
+    return all(search_word in mold_text for search_word in search_words)
+
+
+def evaluate(name, match, rounds=20):
+    hits = false_positives = 0
+    for query, intended in QUERIES:
+        hits += bool(match(intended, query))
+        false_positives += sum(1 for mold in MOLDS if mold != intended and match(mold, query))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query, _ in QUERIES:
+            for mold in MOLDS:
+                match(mold, query)
+    per_check_us = (time.perf_counter() - start) / (rounds * len(QUERIES) * len(MOLDS)) * 1e6
+
+    print(f"{name:<10} recall {hits}/{len(QUERIES)} ({hits / len(QUERIES):.0%})  "
+          f"false positives {false_positives}  {per_check_us:.2f}us per check")
+
+
+def main():
+    matcher = MoldMatcher(MOLDS)
+    evaluate("legacy", legacy_match)
+    evaluate("trigram", matcher.is_relevant)
+
+    rewritten = sum(1 for query, intended in QUERIES if matcher.rewrite(query) == intended.lower())
+    start = time.perf_counter()
+    for query, _ in QUERIES:
+        matcher.rewrite(query)
+    rewrite_us = (time.perf_counter() - start) / len(QUERIES) * 1e6
+    print(f"rewrite    exact mold {rewritten}/{len(QUERIES)}  {rewrite_us:.1f}us per query")
+
+
+if __name__ == "__main__":
+    main()
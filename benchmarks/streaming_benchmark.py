@@ -0,0 +1,59 @@
+"""
+Compare peak memory of full-page parsing and streaming row extraction as pages grow
+
+Peak Python allocations are measured with tracemalloc while each page is
+parsed; streamed discs are counted and dropped, as an export would.
+
+Run from the repository root:
+
+    python benchmarks/streaming_benchmark.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import streaming  # noqa: E402
+from app.scraper import OTBDiscsScraper  # noqa: E402
+from benchmarks.fake_otb import product_page  # noqa: E402
+
+URL = "https://otbdiscs.com/product/innova-star-destroyer/"
+
+
+def measure(parse):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = parse()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak / 1024 / 1024, elapsed * 1000
+
+
+def main():
+    scraper = OTBDiscsScraper()
+
+    def stream(content):
+        chunks = (content[i:i + 16384] for i in range(0, len(content), 16384))
+        count = 0
+        for row in streaming.iter_table_rows(chunks):
+            disc = scraper._parse_table_row([], row.headers, "Innova", "Destroyer", "Star", URL,
+                                            scraper._build_column_map(row.headers), row.cell_texts)
+            count += disc is not None
+        return count
+
+    print(f"{'variants':>8}  {'page KiB':>8}  {'full parse':>20}  {'streaming':>20}")
+    for variants in (50, 200, 1000, 5000):
+        content = product_page("innova-star-destroyer", variants).encode("utf-8")
+        full = measure(lambda: len(scraper._parse_product_html(content, URL, use_embedded=False).discs))
+        streamed = measure(lambda: stream(content))
+        print(f"{variants:>8}  {len(content) / 1024:>8.0f}  "
+              f"{full[1]:>7.1f} MiB {full[2]:>7.0f}ms  {streamed[1]:>7.1f} MiB {streamed[2]:>7.0f}ms")
+    scraper.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -27,8 +27,8 @@ function saveCart() {
 }
 
 function addToCart(disc) {
-    // Create a unique identifier for the disc
-    const discId = `${disc.mold}-${disc.plastic_type}-${disc.plastic_color}-${disc.weight}-${disc.stamp_foil}`;
+    // Stable ID from the server; the attribute string is only for discs without one
+    const discId = disc.id || `${disc.mold}-${disc.plastic_type}-${disc.plastic_color}-${disc.weight}-${disc.stamp_foil}`;
     
     // Check if disc is already in cart
     const existingItem = cart.find(item => item.id === discId);
@@ -39,8 +39,9 @@ function addToCart(disc) {
     
     // Add to cart
     const cartItem = {
-        id: discId,
         ...disc,
+        id: discId,
+        disc_id: disc.id,
         addedAt: new Date().toISOString()
     };
     
@@ -180,7 +181,7 @@ function updateCartDisplay() {
     }
 }
 
-function checkoutToOTB() {
+async function checkoutToOTB() {
     if (cart.length === 0) {
         showNotification('Your cart is empty!', 'error');
         return;
@@ -195,6 +196,12 @@ function checkoutToOTB() {
         return;
     }
     
+    // Check that prices and stock are still current before sending the user to OTB
+    await verifyCartItems(itemsWithUrls);
+    
+    // Raw row text is not sent with search results; fetch it for the quick find strings
+    await fetchRawRowTexts(itemsWithUrls);
+    
     // Create a message with cart contents
     const cartSummary = cart.map(item => 
         `${item.plastic_type} ${item.mold} - ${item.plastic_color || 'N/A'} (${item.weight ? item.weight + 'g' : 'N/A'}) - $${item.price || 'N/A'}`
@@ -207,6 +214,69 @@ function checkoutToOTB() {
     showCheckoutInstructions(itemsWithUrls, itemsWithoutUrls, cartSummary);
 }
 
+async function verifyCartItems(items) {
+    const cartFields = ['disc_id', 'product_url', 'plastic_color', 'rim_color', 'stamp_foil', 'weight',
+        'scaled_weight', 'flatness', 'stiffness', 'price', 'stock'];
+    try {
+        const response = await fetch('/api/cart/verify', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                items: items.map(item => Object.fromEntries(cartFields.map(field => [field, item[field] ?? null])))
+            })
+        });
+        if (!response.ok) return;
+        const data = await response.json();
+        
+        const unavailable = [];
+        const repriced = [];
+        data.items.forEach(status => {
+            const item = items[status.index];
+            if (!status.found || !status.available) {
+                if (!data.failed_pages.includes(status.product_url)) {
+                    unavailable.push(item);
+                    item.stock = 'out_of_stock';
+                }
+                return;
+            }
+            if (status.price_changed) repriced.push(`${item.mold} $${status.old_price} → $${status.price}`);
+            item.disc_id = status.disc_id;
+            item.price = status.price;
+            item.stock = status.stock;
+        });
+        saveCart();
+        
+        if (unavailable.length > 0) {
+            showNotification(`No longer available: ${unavailable.map(item => `${item.plastic_type} ${item.mold}`).join(', ')}`, 'error');
+        }
+        if (repriced.length > 0) {
+            showNotification(`Price changed: ${repriced.join(', ')}`, 'info');
+        }
+    } catch (e) {
+        console.error('Error verifying cart:', e);
+    }
+}
+
+async function fetchRawRowTexts(items) {
+    const missing = items.filter(item => item.disc_id && !item.raw_row_text);
+    if (missing.length === 0) return;
+    
+    await Promise.all(missing.map(async item => {
+        try {
+            const params = new URLSearchParams({ product_url: item.product_url });
+            const response = await fetch(`/api/disc/${encodeURIComponent(item.disc_id)}/raw?${params}`);
+            if (response.ok) {
+                const data = await response.json();
+                item.raw_row_text = data.raw_row_text;
+            }
+        } catch (e) {
+            console.error('Error fetching raw row text:', e);
+        }
+    }));
+    
+    saveCart();
+}
+
 function showCheckoutInstructions(itemsWithUrls, itemsWithoutUrls, cartSummary) {
     // Create modal overlay
     const modal = document.createElement('div');
@@ -463,15 +533,18 @@ function _checkTextFilter(value, filterValue) {
 }
 
 // Function to populate filter dropdowns with available values
-function populateFilterDropdowns(discs) {
+function populateFilterDropdowns(discs, facets = null) {
     if (!discs || discs.length === 0) return;
     
-    // Extract unique values for each filter field
+    // Use the server-side facets when available, otherwise extract unique values
+    const facetValues = fieldName => facets && facets.values && facets.values[fieldName]
+        ? facets.values[fieldName].map(f => f.value)
+        : [...new Set(discs.map(d => d[fieldName]).filter(Boolean))].sort();
     const filterValues = {
-        mold: [...new Set(discs.map(d => d.mold).filter(Boolean))].sort(),
-        plastic_type: [...new Set(discs.map(d => d.plastic_type).filter(Boolean))].sort(),
-        plastic_color: [...new Set(discs.map(d => d.plastic_color).filter(Boolean))].sort(),
-        stamp_foil: [...new Set(discs.map(d => d.stamp_foil).filter(Boolean))].sort()
+        mold: facetValues('mold'),
+        plastic_type: facetValues('plastic_type'),
+        plastic_color: facetValues('plastic_color'),
+        stamp_foil: facetValues('stamp_foil')
     };
     
     // Populate each dropdown checklist
@@ -480,7 +553,7 @@ function populateFilterDropdowns(discs) {
     });
     
     // Update range filter placeholders with available ranges
-    updateRangeFilterPlaceholders(discs);
+    updateRangeFilterPlaceholders(discs, facets);
     
     console.log('🔧 Populated filter dropdown checklists with available values');
 }
@@ -661,59 +734,61 @@ function updateDropdownText(fieldName) {
 }
 
 // Function to update range filter placeholders with available ranges
-function updateRangeFilterPlaceholders(discs) {
+function updateRangeFilterPlaceholders(discs, facets = null) {
+    // Use the server-side range facets when available, otherwise scan the discs
+    const fieldRange = fieldName => {
+        const facet = facets && facets.ranges && facets.ranges[fieldName];
+        if (facet) {
+            return facet.count > 0 ? { min: facet.min, max: facet.max } : null;
+        }
+        const values = discs.map(d => parseFloat(d[fieldName])).filter(v => !isNaN(v));
+        return values.length > 0 ? { min: Math.min(...values), max: Math.max(...values) } : null;
+    };
+    
     // Get flatness range
-    const flatnessValues = discs.map(d => d.flatness).filter(v => v !== null && v !== undefined);
-    if (flatnessValues.length > 0) {
-        const minFlatness = Math.min(...flatnessValues);
-        const maxFlatness = Math.max(...flatnessValues);
+    const flatnessRange = fieldRange('flatness');
+    if (flatnessRange) {
         const flatnessMinInput = document.querySelector('input[name="flatness_min"]');
         const flatnessMaxInput = document.querySelector('input[name="flatness_max"]');
         
-        if (flatnessMinInput) flatnessMinInput.placeholder = `Min (${minFlatness.toFixed(1)})`;
-        if (flatnessMaxInput) flatnessMaxInput.placeholder = `Max (${maxFlatness.toFixed(1)})`;
+        if (flatnessMinInput) flatnessMinInput.placeholder = `Min (${flatnessRange.min.toFixed(1)})`;
+        if (flatnessMaxInput) flatnessMaxInput.placeholder = `Max (${flatnessRange.max.toFixed(1)})`;
     }
     
     // Get stiffness range
-    const stiffnessValues = discs.map(d => d.stiffness).filter(v => v !== null && v !== undefined);
-    if (stiffnessValues.length > 0) {
-        const minStiffness = Math.min(...stiffnessValues);
-        const maxStiffness = Math.max(...stiffnessValues);
+    const stiffnessRange = fieldRange('stiffness');
+    if (stiffnessRange) {
         const stiffnessMinInput = document.querySelector('input[name="stiffness_min"]');
         const stiffnessMaxInput = document.querySelector('input[name="stiffness_max"]');
         
-        if (stiffnessMinInput) stiffnessMinInput.placeholder = `Min (${minStiffness.toFixed(1)})`;
-        if (stiffnessMaxInput) stiffnessMaxInput.placeholder = `Max (${maxStiffness.toFixed(1)})`;
+        if (stiffnessMinInput) stiffnessMinInput.placeholder = `Min (${stiffnessRange.min.toFixed(1)})`;
+        if (stiffnessMaxInput) stiffnessMaxInput.placeholder = `Max (${stiffnessRange.max.toFixed(1)})`;
     }
     
     // Get weight range
-    const weightValues = discs.map(d => d.weight).filter(v => v !== null && v !== undefined);
-    if (weightValues.length > 0) {
-        const minWeight = Math.min(...weightValues);
-        const maxWeight = Math.max(...weightValues);
+    const weightRange = fieldRange('weight');
+    if (weightRange) {
         const weightMinInput = document.querySelector('input[name="weight_min"]');
         const weightMaxInput = document.querySelector('input[name="weight_max"]');
         
-        if (weightMinInput) weightMinInput.placeholder = `Min (${minWeight}g)`;
-        if (weightMaxInput) weightMaxInput.placeholder = `Max (${maxWeight}g)`;
+        if (weightMinInput) weightMinInput.placeholder = `Min (${weightRange.min}g)`;
+        if (weightMaxInput) weightMaxInput.placeholder = `Max (${weightRange.max}g)`;
         
         // Update range visualization
-        updateRangeVisualization('weight', minWeight, maxWeight, 0, 0);
+        updateRangeVisualization('weight', weightRange.min, weightRange.max, 0, 0);
     }
     
     // Get price range (show exact decimal range)
-    const priceValues = allDiscs.map(d => parseFloat(d.price)).filter(v => !isNaN(v));
-    if (priceValues.length > 0) {
-        const minPrice = Math.min(...priceValues);
-        const maxPrice = Math.max(...priceValues);
+    const priceRange = fieldRange('price');
+    if (priceRange) {
         const priceMinInput = document.querySelector('input[name="price_min"]');
         const priceMaxInput = document.querySelector('input[name="price_max"]');
         
-        if (priceMinInput) priceMinInput.placeholder = `Min ($${minPrice.toFixed(2)})`;
-        if (priceMaxInput) priceMaxInput.placeholder = `Max ($${maxPrice.toFixed(2)})`;
+        if (priceMinInput) priceMinInput.placeholder = `Min ($${priceRange.min.toFixed(2)})`;
+        if (priceMaxInput) priceMaxInput.placeholder = `Max ($${priceRange.max.toFixed(2)})`;
         
         // Update range visualization
-        updateRangeVisualization('price', minPrice, maxPrice, 0, 0);
+        updateRangeVisualization('price', priceRange.min, priceRange.max, 0, 0);
     }
 }
 
@@ -1278,6 +1353,37 @@ function resetMoldSpecificFilters() {
 }
 
 // Disc search functionality
+// Function to fill the search box datalist from /api/suggest as the user types
+function setupMoldSuggestions() {
+    const input = document.getElementById('productName');
+    const datalist = document.getElementById('moldSuggestions');
+    if (!input || !datalist) return;
+    
+    let debounceId = null;
+    let lastQuery = '';
+    input.addEventListener('input', () => {
+        clearTimeout(debounceId);
+        debounceId = setTimeout(async () => {
+            const query = input.value.trim();
+            if (query.length < 2 || query === lastQuery) return;
+            lastQuery = query;
+            try {
+                const response = await fetch(`/api/suggest?kind=mold&limit=8&q=${encodeURIComponent(query)}`);
+                if (!response.ok) return;
+                const data = await response.json();
+                datalist.innerHTML = '';
+                data.suggestions.forEach(suggestion => {
+                    const option = document.createElement('option');
+                    option.value = suggestion.value;
+                    datalist.appendChild(option);
+                });
+            } catch (error) {
+                console.warn('Could not load suggestions:', error);
+            }
+        }, 150);
+    });
+}
+
 async function searchDiscs(formData) {
     const loadingIndicator = document.getElementById('loadingIndicator');
     const searchResults = document.getElementById('searchResults');
@@ -1297,7 +1403,10 @@ async function searchDiscs(formData) {
         const searchRequest = {
             product_name: formData.get('productName'),
             max_results: 3,
-            filters: {}
+            filters: {},
+            include_facets: true,
+            // Answer before the 30 second client timeout, with partial results if needed
+            deadline_ms: 25000
         };
         
         // Since we reset all filters, we don't include any filters in the search request
@@ -1320,6 +1429,12 @@ async function searchDiscs(formData) {
         
         clearTimeout(timeoutId);
         
+        if (response.status === 503) {
+            loadingIndicator.classList.add('hidden');
+            showNotification('OTB Discs is currently unavailable. Please try again in a moment.', 'error');
+            return;
+        }
+        
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -1333,11 +1448,20 @@ async function searchDiscs(formData) {
         allDiscs = data.results;
         
         // Populate filter dropdowns with available values
-        populateFilterDropdowns(allDiscs);
+        populateFilterDropdowns(allDiscs, data.facets);
         
         // Show results
         displaySearchResults(data);
         
+        if (data.corrected_query) {
+            showNotification(`No results for "${data.query}"; showing results for "${data.corrected_query}".`, 'info');
+        }
+        if (data.partial) {
+            showNotification(`Some product pages took too long; ${data.incomplete_pages.length} shown as summaries.`, 'info');
+        } else if (data.stale) {
+            showNotification('Showing recently cached results while they are refreshed.', 'info');
+        }
+        
     } catch (error) {
         console.error('Search error:', error);
         loadingIndicator.classList.add('hidden');
@@ -1683,6 +1807,9 @@ document.addEventListener('DOMContentLoaded', function() {
         mainContent.classList.add('fade-in');
     }
     
+    // Suggest mold names while typing
+    setupMoldSuggestions();
+    
     // Handle search form submission
     const searchForm = document.getElementById('searchForm');
     if (searchForm) {
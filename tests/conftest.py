@@ -0,0 +1,33 @@
+"""
+Shared test fixtures
+
+Many tests drive the module-level app in app.main, whose query log, price
+history and brand database default to files in the working directory. Each
+test points them at its own tmp_path instead, so test searches never end up
+in the popularity data that cache warm-up reads. Parse pool workers are
+separate processes and read their brand database path from the environment.
+"""
+from collections import Counter
+
+import pytest
+
+from app import main
+from app.database import db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def worker_brand_db(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("BRAND_DB_PATH", str(tmp_path_factory.mktemp("workers") / "brand_plastics.db"))
+        yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_app_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.query_log, "path", str(tmp_path / "query_log.jsonl"))
+    monkeypatch.setattr(main.query_log, "_counts", Counter())
+    monkeypatch.setattr(main.query_log, "_loaded", False)
+    monkeypatch.setattr(main.history_store, "db_path", str(tmp_path / "price_history.db"))
+    monkeypatch.setattr(main.history_store, "_initialized", False)
+    monkeypatch.setattr(db, "db_path", str(tmp_path / "brand_plastics.db"))
+    monkeypatch.setattr(db, "_initialized", False)
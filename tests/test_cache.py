@@ -0,0 +1,106 @@
+import time
+from app.cache import TTLCache, SQLiteCache, SQLiteLease, TieredCache, build_cache
+from app.models import Disc
+
+
+def test_ttl_cache_expiry_and_lru():
+    """Entries expire after their TTL and the least recently used entry is evicted"""
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    
+    cache.set("short", 4, ttl_seconds=-1)
+    assert cache.get("short") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Two cache objects on one file (as in two workers) see each other's writes"""
+    path = str(tmp_path / "cache.db")
+    writer = SQLiteCache(path, namespace="pages")
+    reader = SQLiteCache(path, namespace="pages")
+    other_namespace = SQLiteCache(path, namespace="searches")
+    
+    disc = Disc(brand="Innova", mold="Destroyer", plastic_type="Star")
+    writer.set("https://otbdiscs.com/product/destroyer/", [disc])
+    
+    assert reader.get("https://otbdiscs.com/product/destroyer/")[0].mold == "Destroyer"
+    assert other_namespace.get("https://otbdiscs.com/product/destroyer/") is None
+    
+    writer.set("expired", 1, ttl_seconds=-1)
+    assert reader.get("expired") is None
+
+
+def test_sqlite_cache_evicts_oldest(tmp_path):
+    """The shared cache stays within max_entries and max_bytes"""
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=3)
+    for i in range(5):
+        cache.set(f"key{i}", i)
+        time.sleep(0.001)
+    assert sorted(cache.keys()) == ["key2", "key3", "key4"]
+    
+    cache = SQLiteCache(str(tmp_path / "bytes.db"), max_bytes=250)
+    for i in range(3):
+        cache.set(f"key{i}", "x" * 100)
+        time.sleep(0.001)
+    assert sorted(cache.keys()) == ["key1", "key2"]
+
+
+def test_tiered_cache_reads_through(tmp_path):
+    """A miss in the local tier is served from the shared tier and copied locally"""
+    path = str(tmp_path / "cache.db")
+    build_cache("pages", 10, 60, path).set("url", "page")
+    
+    cache = build_cache("pages", 10, 60, path)
+    assert isinstance(cache, TieredCache)
+    assert "url" not in cache.local
+    assert cache.get("url") == "page"
+    assert cache.local.get("url") == "page"
+    assert isinstance(build_cache("pages", 10, 60), TTLCache)
+
+
+def test_tiered_cache_is_bounded_and_lists_local_keys(tmp_path):
+    """The shared tier gets its size limit, and keys() covers what this process served"""
+    path = str(tmp_path / "cache.db")
+    other = build_cache("pages", 10, 60, path, shared_max_bytes=1000)
+    assert other.shared.max_bytes == 1000
+    other.set("other-url", "page")
+    
+    cache = build_cache("pages", 10, 60, path)
+    cache.set("url", "page")
+    assert cache.keys() == ["url"]
+    assert sorted(cache.shared.keys()) == ["other-url", "url"]
+
+
+def test_lease_is_held_by_one_owner(tmp_path):
+    """Only one process holds a lease until it is released or expires"""
+    path = str(tmp_path / "cache.db")
+    first = SQLiteLease(path, "warmup", ttl_seconds=60)
+    second = SQLiteLease(path, "warmup", ttl_seconds=60)
+    assert first.acquire() and first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    
+    expired = SQLiteLease(path, "refresh", ttl_seconds=0)
+    assert expired.acquire()
+    assert SQLiteLease(path, "refresh").acquire()
+
+
+def test_tiered_cache_local_copy_keeps_shared_expiry(tmp_path):
+    """Entries copied from the shared tier expire with it and keep their store time"""
+    path = str(tmp_path / "cache.db")
+    writer = build_cache("pages", 10, 600, path, local_ttl_seconds=600)
+    writer.shared.set("url", "page", ttl_seconds=5)
+    stored_at = writer.shared.get_entry("url")[1]
+    
+    reader = build_cache("pages", 10, 600, path, local_ttl_seconds=600)
+    assert reader.get_entry("url") == ("page", stored_at)
+    _, local_stored_at, local_expires_at = reader.local._entries["url"]
+    assert local_stored_at == stored_at
+    assert local_expires_at <= stored_at + 5 + 0.01
+
@@ -0,0 +1,120 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import requests
+from fastapi.testclient import TestClient
+
+from app.cart import verify_cart
+from app.main import app, scraper as app_scraper
+from app.models import CartItem, StockStatus
+from app.scraper import OTBDiscsScraper
+from tests.test_scraper import _product_page_response
+
+ENVY = "https://otbdiscs.com/product/envy/"
+DESTROYER = "https://otbdiscs.com/product/destroyer/"
+
+client = TestClient(app)
+
+
+def _cart_items(discs):
+    return [CartItem(**disc.model_dump(include=set(CartItem.model_fields) - {'disc_id'}), disc_id=disc.id)
+            for disc in discs]
+
+
+class TestVerifyCart:
+
+    def setup_method(self):
+        self.scraper = OTBDiscsScraper()
+
+    def teardown_method(self):
+        self.scraper.close()
+
+    def test_reports_stock_and_price_changes(self):
+        with patch.object(self.scraper.session, 'get', return_value=_product_page_response()):
+            discs = self.scraper.parse_product_page(ENVY)
+        items = _cart_items(discs)
+
+        with patch.object(self.scraper.session, 'get',
+                          return_value=_product_page_response(stock_1='Out of stock', price_2='$15.99')) as get:
+            result = verify_cart(self.scraper, items, max_age_seconds=0)
+
+        assert get.call_count == 1
+        assert result.pages_checked == 1
+        first, second = result.items
+        assert first.found and not first.available
+        assert first.stock == StockStatus.OUT_OF_STOCK
+        assert second.available and second.price_changed
+        assert (second.old_price, second.price) == (Decimal("17.99"), Decimal("15.99"))
+
+    def test_recent_pages_come_from_cache(self):
+        with patch.object(self.scraper.session, 'get', return_value=_product_page_response()):
+            discs = self.scraper.parse_product_page(ENVY)
+
+        with patch.object(self.scraper.session, 'get') as get:
+            result = verify_cart(self.scraper, _cart_items(discs), max_age_seconds=60)
+
+        get.assert_not_called()
+        assert all(status.available and not status.price_changed for status in result.items)
+
+    def test_matches_by_variant_without_disc_id(self):
+        item = CartItem(product_url=ENVY, plastic_color="Red", stamp_foil="Gold", weight=172.0,
+                        scaled_weight=4.5, flatness=5.0, stiffness=2.0, price=Decimal("17.99"))
+        missing = CartItem(product_url=ENVY, plastic_color="Green", weight=170.0)
+
+        with patch.object(self.scraper.session, 'get', return_value=_product_page_response()):
+            result = verify_cart(self.scraper, [item, missing])
+
+        assert result.items[0].found and result.items[0].disc_id
+        assert not result.items[1].found
+
+    def test_failed_pages_are_reported(self):
+        def get(url, **kwargs):
+            if url == DESTROYER:
+                raise requests.ConnectionError("reset")
+            return _product_page_response()
+
+        items = [CartItem(product_url=ENVY, plastic_color="Blue"), CartItem(product_url=DESTROYER)]
+        with patch.object(self.scraper.session, 'get', side_effect=get):
+            result = verify_cart(self.scraper, items)
+
+        assert result.failed_pages == [DESTROYER]
+        assert result.pages_checked == 1
+        assert not result.items[1].found
+
+    def test_pages_off_site_are_not_fetched(self):
+        elsewhere = "https://example.com/product/envy/"
+        with patch.object(self.scraper.session, 'get', return_value=_product_page_response()) as get:
+            result = verify_cart(self.scraper, [CartItem(product_url=elsewhere), CartItem(product_url=ENVY)])
+
+        assert [call.args[0] for call in get.call_args_list] == [ENVY]
+        assert result.failed_pages == [elsewhere]
+        assert self.scraper.breaker.snapshot()["state"] == "closed"
+
+    def test_site_urls(self):
+        assert self.scraper.is_site_url(ENVY)
+        assert self.scraper.is_site_url("http://www.otbdiscs.com/product/envy/")
+        assert not self.scraper.is_site_url("https://otbdiscs.com.example.com/product/envy/")
+        assert not self.scraper.is_site_url("https://otbdiscs.com:8443/product/envy/")
+        assert not self.scraper.is_site_url("file:///etc/passwd")
+
+
+def test_urls_off_site_are_rejected():
+    with patch.object(app_scraper.session, 'get') as get:
+        assert client.post("/api/refresh", json={"url": "http://10.0.0.1/slow"}).status_code == 400
+        assert client.get("/api/export/page", params={"url": "http://10.0.0.1/slow"}).status_code == 400
+        assert client.get("/api/disc/abc/raw", params={"product_url": "http://10.0.0.1/slow"}).status_code == 400
+    get.assert_not_called()
+
+
+def test_cart_verify_endpoint():
+    with patch.object(app_scraper.session, 'get', return_value=_product_page_response()):
+        response = client.post("/api/cart/verify", json={
+            "items": [{"product_url": ENVY, "plastic_color": "Blue", "stamp_foil": "Silver", "weight": 174,
+                       "scaled_weight": 5.5, "flatness": 3, "stiffness": 7}],
+            "max_age_seconds": 0
+        })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"][0]["found"] is True
+    assert data["items"][0]["stock"] == "in_stock"
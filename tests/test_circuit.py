@@ -0,0 +1,103 @@
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.main import app, scraper as app_scraper
+from app.models import Disc
+from app.scraper import OTBDiscsScraper
+
+client = TestClient(app)
+
+
+def test_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    # Only one trial call while half-open
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+@patch('app.scraper.requests.Session.get')
+def test_failing_upstream_is_not_called_while_open(mock_get):
+    mock_get.side_effect = requests.ConnectionError("down")
+    scraper = OTBDiscsScraper(circuit_failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            scraper._get("https://otbdiscs.com/")
+    with pytest.raises(CircuitOpenError):
+        scraper._get("https://otbdiscs.com/")
+    assert mock_get.call_count == 2
+
+    # Searches without cached results fail fast instead of returning nothing
+    with pytest.raises(CircuitOpenError):
+        scraper.search_result_set("Destroyer")
+    scraper.close()
+
+
+def test_stale_results_are_served_and_revalidated():
+    scraper = OTBDiscsScraper(search_cache_ttl=0.05)
+    old = [Disc(brand="Innova", mold="Destroyer", plastic_type="Star", price=Decimal("18.99"))]
+    new = [Disc(brand="Innova", mold="Destroyer", plastic_type="Star", price=Decimal("16.99"))]
+
+    with patch.object(scraper, 'search_discs', return_value=old):
+        first = scraper.search_result_set("Destroyer")
+    assert not first.stale
+
+    time.sleep(0.06)
+    with patch.object(scraper, 'search_discs', return_value=new) as search:
+        stale = scraper.search_result_set("Destroyer")
+        assert stale.stale and stale.discs == old
+        deadline = time.time() + 2
+        while scraper._revalidating and time.time() < deadline:
+            time.sleep(0.005)
+        assert search.call_count == 1
+
+    fresh = scraper.search_result_set("Destroyer")
+    assert not fresh.stale and fresh.discs == new
+    scraper.close()
+
+
+def test_stale_results_are_served_without_revalidating_while_open():
+    scraper = OTBDiscsScraper(search_cache_ttl=0.01)
+    with patch.object(scraper, 'search_discs', return_value=[Disc(brand="Innova", mold="Wraith", plastic_type="Star")]):
+        scraper.search_result_set("Wraith")
+    time.sleep(0.02)
+    for _ in range(scraper.breaker.failure_threshold):
+        scraper.breaker.record_failure()
+
+    with patch.object(scraper, 'search_discs') as search:
+        assert scraper.search_result_set("Wraith").stale
+    search.assert_not_called()
+    scraper.close()
+
+
+def test_search_endpoint_returns_503_while_open():
+    app_scraper.search_cache.clear()
+    for _ in range(app_scraper.breaker.failure_threshold):
+        app_scraper.breaker.record_failure()
+    try:
+        response = client.post("/api/search", json={"product_name": "Circuit test"})
+        assert response.status_code == 503
+        assert client.get("/health").json()["upstream"]["state"] == OPEN
+    finally:
+        app_scraper.breaker.record_success()
@@ -0,0 +1,24 @@
+import os
+from unittest.mock import patch
+from app.database import BrandPlasticDatabase
+
+
+def test_database_is_initialized_lazily(tmp_path):
+    """Creating the database object does not touch the file"""
+    db_path = str(tmp_path / "brands.db")
+    database = BrandPlasticDatabase(db_path)
+    assert not os.path.exists(db_path)
+    
+    assert "Innova" in database.get_all_brands()
+    assert database.schema_version == BrandPlasticDatabase.MIGRATIONS[-1][0]
+
+
+def test_seeding_runs_once_per_file(tmp_path):
+    """A second instance on the same file does not seed again"""
+    db_path = str(tmp_path / "brands.db")
+    BrandPlasticDatabase(db_path).get_all_brands()
+    
+    database = BrandPlasticDatabase(db_path)
+    with patch.object(BrandPlasticDatabase, '_seed_initial_data') as mock_seed:
+        assert "MVP" in database.get_all_brands()
+        mock_seed.assert_not_called()
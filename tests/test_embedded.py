@@ -0,0 +1,82 @@
+import os
+from unittest.mock import patch
+
+from app import embedded
+from app.scraper import OTBDiscsScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+URL = "https://otbdiscs.com/product/innova-star-destroyer/"
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def _comparable(discs):
+    return [d.model_dump(exclude={"raw_row_text"}) for d in discs]
+
+
+def test_find_variations():
+    variations = embedded.find_variations(_fixture("product_page_variations.html"))
+    assert len(variations) == 12
+    assert variations[0]["attributes"]["attribute_color"] == "Blue"
+
+    # WooCommerce writes "false" when variations are loaded over AJAX
+    assert embedded.find_variations(_fixture("product_page_table.html")) is None
+
+
+def test_find_variations_in_inline_script():
+    content = b'<script>var product_variations = [{"attributes": {"attribute_weight": "175g"}}];</script>'
+    assert embedded.find_variations(content) == [{"attributes": {"attribute_weight": "175g"}}]
+
+
+def test_attribute_header():
+    assert embedded.attribute_header("attribute_pa_stamp-foil") == "stamp foil"
+    assert embedded.attribute_header("attribute_scaled_weight") == "scaled weight"
+
+
+def test_embedded_and_table_paths_agree():
+    scraper = OTBDiscsScraper()
+    content = _fixture("product_page_variations.html")
+
+    fast = scraper._parse_embedded_variations(content, URL)
+    table = scraper._parse_product_html(content, URL, use_embedded=False)
+
+    assert fast is not None and len(fast.discs) == 12
+    assert _comparable(fast.discs) == _comparable(table.discs)
+    assert [d.stock.value for d in fast.discs[:5]] == ["in_stock"] * 4 + ["out_of_stock"]
+    assert scraper.get_raw_row_text(fast.discs[0].id) is None  # not cached yet
+
+
+def test_taxonomy_attribute_slugs_map_to_term_names():
+    scraper = OTBDiscsScraper()
+    content = _fixture("product_page_variations_slugs.html")
+
+    terms = embedded.find_attribute_terms(content)
+    assert terms["attribute_pa_flatness"]["flat-3"] == "Flat (3)"
+    assert terms["attribute_pa_scaled-weight"]["4-5"] == "4.5"
+
+    fast = scraper._parse_embedded_variations(content, URL)
+    table = scraper._parse_product_html(content, URL, use_embedded=False)
+    assert fast is not None
+    assert _comparable(fast.discs) == _comparable(table.discs)
+    assert (fast.discs[0].flatness, fast.discs[0].stiffness) == (3.0, 7.0)
+
+    # Without the attribute selects the slugs cannot be read, so the table is parsed
+    without_terms = content.replace(b'name="attribute_pa_', b'name="x_attribute_pa_')
+    assert scraper._parse_embedded_variations(without_terms, URL) is None
+
+
+def test_parse_falls_back_to_table_without_embedded_json():
+    scraper = OTBDiscsScraper()
+    content = _fixture("product_page_table.html")
+
+    with patch.object(scraper, "_parse_embedded_variations", wraps=scraper._parse_embedded_variations) as fast:
+        snapshot = scraper._parse_product_html(content, URL)
+
+    assert fast.call_count == 1
+    assert len(snapshot.discs) == 12
+    assert _comparable(snapshot.discs) == _comparable(
+        scraper._parse_product_html(_fixture("product_page_variations.html"), URL).discs
+    )
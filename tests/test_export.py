@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.export import EXPORT_FIELDS, iter_csv, iter_jsonl, iter_parquet
+from app.main import app, scraper as app_scraper
+from app.models import Disc, StockStatus
+from app.results import ResultSet
+
+client = TestClient(app)
+
+
+def _discs(n=3):
+    return [
+        Disc(id=f"d{i}", brand="Innova", mold="Destroyer", plastic_type="Star", plastic_color=f"Color {i}",
+             weight=170.0 + i, price=Decimal("17.99") + i, stock=StockStatus.IN_STOCK,
+             product_url="https://otbdiscs.com/product/destroyer/", raw_row_text="not exported")
+        for i in range(n)
+    ]
+
+
+def test_csv_is_streamed_in_batches():
+    chunks = list(iter_csv(_discs(5), batch_size=2))
+
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert [row["plastic_color"] for row in rows] == [f"Color {i}" for i in range(5)]
+    assert rows[0]["price"] == "17.99"
+    assert rows[0]["stock"] == "in_stock"
+    assert "raw_row_text" not in rows[0]
+
+
+def test_csv_without_discs_has_header():
+    assert b"".join(iter_csv([])).decode("utf-8").strip() == ",".join(EXPORT_FIELDS)
+
+
+def test_jsonl_round_trips():
+    lines = b"".join(iter_jsonl(_discs(), batch_size=2)).decode("utf-8").splitlines()
+
+    assert [Disc(**json.loads(line)).id for line in lines] == ["d0", "d1", "d2"]
+    assert "raw_row_text" not in json.loads(lines[0])
+
+
+def test_parquet_round_trips():
+    pq = pytest.importorskip("pyarrow.parquet")
+    pa = pytest.importorskip("pyarrow")
+
+    data = b"".join(iter_parquet(_discs(5), batch_size=2))
+    table = pq.read_table(pa.BufferReader(data))
+
+    assert table.num_rows == 5
+    assert table.column("weight").to_pylist() == [170.0, 171.0, 172.0, 173.0, 174.0]
+
+
+def test_export_endpoint_filters_and_names_file():
+    with patch.object(app_scraper, "search_result_set", return_value=ResultSet("destroyer", _discs())) as search:
+        response = client.post("/api/export?format=jsonl", json={
+            "product_name": "Star Destroyer",
+            "filters": {"weight_min": 171}
+        })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="star-destroyer.jsonl"' in response.headers["content-disposition"]
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["d1", "d2"]
+    search.assert_called_once()
+
+
+def test_export_endpoint_rejects_unknown_format():
+    response = client.post("/api/export?format=xlsx", json={"product_name": "Destroyer"})
+    assert response.status_code == 400
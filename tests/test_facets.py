@@ -0,0 +1,60 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.facets import compute_facets
+from app.main import app, scraper
+from app.models import Disc
+from app.results import ResultSet
+
+client = TestClient(app)
+
+
+def _discs():
+    return [
+        Disc(brand="Innova", mold="Destroyer", plastic_type="Star", weight=175.0, price=Decimal("18.99")),
+        Disc(brand="Innova", mold="Destroyer", plastic_type="Champion", weight=170.0, price=Decimal("19.99")),
+        Disc(brand="Innova", mold="Wraith", plastic_type="Star", weight=165.0, price=Decimal("17.99")),
+    ]
+
+
+def test_compute_facets_counts_and_ranges():
+    facets = compute_facets(_discs(), bins=2)
+
+    molds = {f.value: f.count for f in facets.values["mold"]}
+    assert molds == {"Destroyer": 2, "Wraith": 1}
+    assert [f.value for f in facets.values["plastic_type"]] == ["Champion", "Star"]
+
+    weight = facets.ranges["weight"]
+    assert (weight.min, weight.max, weight.count) == (165.0, 175.0, 3)
+    assert [b.count for b in weight.histogram] == [1, 2]
+    assert facets.ranges["flatness"].count == 0
+
+
+def test_result_set_computes_facets_once():
+    result_set = ResultSet("destroyer", _discs())
+    assert result_set.facets is result_set.facets
+    assert len(result_set) == 3
+
+
+@patch('app.main.scraper.search_discs')
+def test_search_returns_facets_of_unfiltered_results(mock_search):
+    mock_search.return_value = _discs()
+    scraper.search_cache.clear()
+
+    response = client.post("/api/search", json={
+        "product_name": "Facet test",
+        "include_facets": True,
+        "filters": {"mold": "Wraith"}
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_found"] == 1
+    molds = {f["value"]: f["count"] for f in data["facets"]["values"]["mold"]}
+    assert molds == {"Destroyer": 2, "Wraith": 1}
+
+    # Repeated searches are served from the cached result set
+    client.post("/api/search", json={"product_name": "Facet test"})
+    assert mock_search.call_count == 1
+    scraper.search_cache.clear()
@@ -0,0 +1,124 @@
+import sqlite3
+import time
+from decimal import Decimal
+from app.history import PriceHistoryStore
+from app.identity import disc_id, unique_ids, variant_key
+from app.models import Disc, StockStatus
+
+URL = "https://otbdiscs.com/product/destroyer/"
+
+
+def make_disc(price="18.99", stock=StockStatus.IN_STOCK, color="Blue"):
+    return Disc(
+        brand="Innova",
+        mold="Destroyer",
+        plastic_type="Star",
+        plastic_color=color,
+        weight=175.0,
+        price=Decimal(price),
+        stock=stock,
+        product_url=URL
+    )
+
+
+def test_variant_key_ignores_price_and_stock():
+    """The variant key identifies the physical disc, not its current offer"""
+    assert variant_key(make_disc()) == variant_key(make_disc(price="12.00", stock=StockStatus.OUT_OF_STOCK))
+    assert variant_key(make_disc()) != variant_key(make_disc(color="Red"))
+
+
+def test_records_only_transitions(tmp_path):
+    """Unchanged observations do not append history rows"""
+    store = PriceHistoryStore(str(tmp_path / "history.db"))
+    now = time.time()
+    
+    assert store.record_discs([make_disc()], timestamp=now - 300) == 1
+    assert store.record_discs([make_disc()], timestamp=now - 200) == 0
+    assert store.record_discs([make_disc(price="15.99")], timestamp=now - 100) == 1
+    assert store.record_discs([make_disc(price="15.99", stock=StockStatus.OUT_OF_STOCK)], timestamp=now) == 1
+    
+    # Summary discs without row attributes are not variants
+    assert store.record_discs([Disc(brand="Innova", mold="Destroyer", plastic_type="Star", product_url=URL)]) == 0
+    
+    series = store.get_series(mold="destroyer")
+    assert len(series) == 1
+    assert [p.price for p in series[0].points] == [Decimal("18.99"), Decimal("15.99"), Decimal("15.99")]
+    assert series[0].points[-1].stock == StockStatus.OUT_OF_STOCK
+    
+    # Downsampling keeps the last transition per bucket
+    bucketed = store.get_series(disc_id=series[0].disc_id, bucket_seconds=10 ** 9)
+    assert len(bucketed[0].points) == 1
+    assert store.change_count(URL) == 3
+
+
+def test_identical_rows_keep_separate_series(tmp_path):
+    """Identical rows are keyed by their disc IDs, also when only some of them are recorded"""
+    store = PriceHistoryStore(str(tmp_path / "history.db"))
+    now = time.time()
+    first, second = unique_ids([make_disc(), make_disc()])
+    assert store.record_discs([first, second], timestamp=now - 100) == 2
+    
+    # A change set holding only the second row
+    changed = second.model_copy(update={'price': Decimal("15.99")})
+    assert store.record_discs([changed], timestamp=now) == 1
+    
+    series = store.get_series(product_url=URL)
+    assert [s.disc_id for s in series] == [first.id, second.id]
+    assert [p.price for p in series[0].points] == [Decimal("18.99")]
+    assert [p.price for p in series[1].points] == [Decimal("18.99"), Decimal("15.99")]
+
+
+def test_retention_keeps_latest_state(tmp_path):
+    """Expired transitions are removed but the latest state survives"""
+    store = PriceHistoryStore(str(tmp_path / "history.db"))
+    day = 86400
+    now = time.time()
+    store.record_discs([make_disc(price="20.00")], timestamp=now - 400 * day)
+    store.record_discs([make_disc(price="19.00")], timestamp=now - 399 * day)
+    store.record_discs([make_disc(price="18.00")], timestamp=now - 1 * day)
+    
+    assert store.apply_retention(max_age_days=365) == 2
+    assert [p.price for p in store.get_series(product_url=URL)[0].points] == [Decimal("18.00")]
+
+
+def test_transitions_in_the_same_second_are_all_kept(tmp_path):
+    """Several changes within one second each get their own event"""
+    store = PriceHistoryStore(str(tmp_path / "history.db"), max_cached_states=1)
+    now = int(time.time())
+    assert store.record_discs([make_disc(price="18.99")], timestamp=now) == 1
+    assert store.record_discs([make_disc(color="Red")], timestamp=now) == 1
+    assert store.record_discs([make_disc(price="15.99")], timestamp=now) == 1
+    
+    assert len(store._last_state) == 1
+    points = store.get_series(disc_id=disc_id(make_disc()))[0].points
+    assert [p.price for p in points] == [Decimal("18.99"), Decimal("15.99")]
+
+
+def test_older_history_files_are_migrated(tmp_path):
+    """Files from before per-event keys and disc IDs keep their transitions"""
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE variants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, product_url TEXT NOT NULL, variant_key TEXT NOT NULL,
+            mold TEXT, plastic_type TEXT, plastic_color TEXT, weight REAL, UNIQUE(product_url, variant_key)
+        );
+        CREATE TABLE variant_events (
+            variant_id INTEGER NOT NULL, ts INTEGER NOT NULL, price_cents INTEGER, stock INTEGER NOT NULL,
+            PRIMARY KEY (variant_id, ts)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("INSERT INTO variants (product_url, variant_key, mold) VALUES (?, ?, 'Destroyer')",
+                 (URL, variant_key(make_disc())))
+    conn.execute("INSERT INTO variant_events VALUES (1, 100, 1899, 1)")
+    conn.commit()
+    conn.close()
+    
+    store = PriceHistoryStore(path)
+    assert store.record_discs([make_disc(price="18.99")], timestamp=100) == 0
+    assert store.record_discs([make_disc(price="15.99")], timestamp=100) == 1
+    series = store.get_series(product_url=URL)
+    assert [p.price for p in series[0].points] == [Decimal("18.99"), Decimal("15.99")]
+    # Variants keyed by variant key are looked up by their disc ID
+    assert series[0].disc_id == disc_id(make_disc())
+
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from app.identity import dedupe_discs, disc_id, unique_ids
+from app.models import Disc
+
+URL = "https://otbdiscs.com/product/destroyer/"
+
+
+def _variant(color="Blue", weight=175.0, url=URL, price="17.99"):
+    disc = Disc(brand="Innova", mold="Destroyer", plastic_type="Star", plastic_color=color,
+                weight=weight, price=Decimal(price), product_url=url)
+    disc.id = disc_id(disc)
+    return disc
+
+
+def _summary(url=URL):
+    disc = Disc(brand="Innova", mold="Destroyer", plastic_type="Star", product_url=url)
+    disc.id = disc_id(disc)
+    return disc
+
+
+def test_id_ignores_price_and_stock():
+    assert _variant(price="17.99").id == _variant(price="15.99").id
+    assert _variant(color="Blue").id != _variant(color="Red").id
+    assert _variant(url=URL).id != _variant(url=URL + "?v=2").id
+
+
+def test_summaries_have_ids():
+    assert _summary().id and _summary().id != _variant().id
+    without_url = Disc(brand="Innova", mold="Wraith", plastic_type="Star")
+    assert disc_id(without_url) != disc_id(Disc(brand="Innova", mold="Destroyer", plastic_type="Star"))
+
+
+def test_identical_rows_get_distinct_ids():
+    discs = list(unique_ids([_variant(), _variant(), _variant(color="Red"), _variant()]))
+
+    assert len({d.id for d in discs}) == 4
+    assert discs[0].id == _variant().id
+    # Numbering is deterministic across scrapes
+    assert [d.id for d in unique_ids([_variant(), _variant()])] == [d.id for d in discs[:2] if d.plastic_color == "Blue"]
+
+
+def test_dedupe_drops_repeats_and_covered_summaries():
+    blue, red = _variant(), _variant(color="Red")
+    other_summary = _summary(url="https://otbdiscs.com/product/wraith/")
+
+    unique = dedupe_discs([blue, _summary(), red, _variant(), other_summary, other_summary])
+
+    assert unique == [blue, red, other_summary]
@@ -3,7 +3,8 @@ from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.main import app
 from app.models import Disc, DiscFilter, SearchRequest, StockStatus
-from app.filters import DiscFilterService
+from app.filters import DiscFilterService, filter_hash, filter_narrows
+from app.results import FilteredResultCache, ResultSet
 from decimal import Decimal
 
 client = TestClient(app)
@@ -21,6 +22,7 @@ def test_health_check():
     data = response.json()
     assert data["status"] == "healthy"
     assert "message" in data
+    assert data["warmup"]["state"] in ("idle", "running", "done", "failed")
 
 def test_get_info():
     """Test the info endpoint"""
@@ -172,3 +174,81 @@ def test_range_filter_matching():
     assert DiscFilterService._check_range_filter(175.0, None, None) == True
     assert DiscFilterService._check_range_filter(None, None, None) == True
     assert DiscFilterService._check_range_filter(None, 170.0, 180.0) == False
+
+def test_multi_key_sort_and_top_k():
+    """Sort specs with several keys, nulls placement and limited results"""
+    discs = [
+        Disc(brand="Innova", mold="Destroyer", plastic_type="Star", weight=175.0, price=Decimal("17.99")),
+        Disc(brand="Innova", mold="Wraith", plastic_type="Star", weight=171.0, price=Decimal("17.99")),
+        Disc(brand="Innova", mold="Teebird", plastic_type="DX", weight=None, price=Decimal("9.99")),
+        Disc(brand="Innova", mold="Aviar", plastic_type="DX", weight=168.0, price=None),
+    ]
+    
+    filtered = DiscFilterService.apply_filters(discs, DiscFilter(sort_by="price asc, weight desc"))
+    assert [d.mold for d in filtered] == ["Teebird", "Destroyer", "Wraith", "Aviar"]
+    
+    filtered = DiscFilterService.apply_filters(discs, DiscFilter(sort_by="weight", nulls="first"))
+    assert [d.mold for d in filtered] == ["Teebird", "Aviar", "Wraith", "Destroyer"]
+    
+    filtered = DiscFilterService.apply_filters(discs, DiscFilter(sort_by="plastic_type desc, mold", limit=2))
+    assert [d.mold for d in filtered] == ["Destroyer", "Wraith"]
+    
+    # Top-k selection returns the same discs as a full sort
+    many = [Disc(brand="Innova", mold=f"Mold {i}", plastic_type="Star", weight=float(150 + (i * 7) % 30)) for i in range(100)]
+    full = DiscFilterService.apply_filters(many, DiscFilter(sort_by="weight desc, mold"))
+    assert DiscFilterService.apply_filters(many, DiscFilter(sort_by="weight desc, mold", limit=10)) == full[:10]
+    
+    with pytest.raises(ValueError):
+        DiscFilter(sort_by="price sideways")
+
+
+def test_compiled_filter_plans():
+    """Filters compile to their active clauses and plans are shared by equal filters"""
+    discs = [
+        Disc(brand="Innova", mold="Destroyer", plastic_type="Star", weight=175.0, price=Decimal("17.99"), stock=StockStatus.IN_STOCK),
+        Disc(brand="Innova", mold="Wraith", plastic_type="Champion", weight=171.0, price=Decimal("19.99"), stock=StockStatus.IN_STOCK),
+        Disc(brand="Innova", mold="Destroyer", plastic_type="DX", weight=None, price=Decimal("9.99"), stock=StockStatus.OUT_OF_STOCK),
+    ]
+    filters = DiscFilter(mold="destroyer", weight_min=170, stock=[StockStatus.IN_STOCK])
+    
+    plan = DiscFilterService.compile(filters)
+    assert [clause.field for clause in plan.clauses] == ["mold", "stock", "weight"]
+    assert plan.filter(discs) == [discs[0]]
+    assert [DiscFilterService._matches_filters(disc, filters) for disc in discs] == [True, False, False]
+    
+    # Equal filters share a plan; sorting does not change the predicates
+    same = DiscFilter(stock=[StockStatus.IN_STOCK], weight_min=170.0, mold="destroyer", sort_by="weight desc")
+    assert filter_hash(same, include_sort=False) == filter_hash(filters, include_sort=False)
+    assert filter_hash(same) != filter_hash(filters)
+    assert DiscFilterService.compile(same) is plan
+    
+    assert len(DiscFilterService.compile(DiscFilter())) == 0
+
+
+def test_filtered_result_cache():
+    """Filtered results are reused per result set version and narrowed incrementally"""
+    discs = [
+        Disc(brand="Innova", mold=f"Destroyer {i}", plastic_type="Star" if i % 2 else "DX", weight=float(160 + i))
+        for i in range(16)
+    ]
+    result_set = ResultSet("destroyer", discs)
+    cache = FilteredResultCache()
+    
+    wide = DiscFilter(weight_min=165, sort_by="weight desc")
+    narrow = DiscFilter(weight_min=170, weight_max=174, plastic_type="star", sort_by="weight desc")
+    assert filter_narrows(narrow, wide) and not filter_narrows(wide, narrow)
+    assert not filter_narrows(DiscFilter(plastic_type="st"), DiscFilter(plastic_type="star"))
+    
+    for filters in (wide, wide, narrow, DiscFilter(weight_min=170, weight_max=174, plastic_type="star", limit=1)):
+        assert cache.apply(result_set, filters)[0] == DiscFilterService.apply_filters(discs, filters)
+    # The total counts matches beyond the limit, also when served from the cache
+    limited = DiscFilter(weight_min=165, sort_by="weight desc", limit=3)
+    assert [len(cache.apply(result_set, limited)[0]), cache.apply(result_set, limited)[1]] == [3, 11]
+    stats = cache.stats()
+    assert (stats["hits"], stats["refined"], stats["misses"]) == (2, 3, 1)
+    
+    # A refreshed search has a new version and never gets the old positions
+    refreshed = ResultSet("destroyer", discs[:4])
+    assert cache.apply(refreshed, wide) == ([], 0)
+    assert cache.stats()["misses"] == 2
+
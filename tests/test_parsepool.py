@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from app.parsepool import ParsePool
+from app.scraper import OTBDiscsScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+URL = "https://otbdiscs.com/product/innova-star-destroyer/"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ParsePool(workers=1, chunk_size=2)
+    yield pool
+    pool.close()
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_worker_parse_matches_in_process_parse(pool):
+    scraper = OTBDiscsScraper()
+    try:
+        for name in ("product_page_table.html", "product_page_variations.html"):
+            content = _fixture(name)
+            expected = scraper._parse_product_html(content, URL)
+            snapshot = pool.parse(content, URL)
+
+            assert snapshot.discs == expected.discs
+            assert snapshot.row_cells == expected.row_cells
+            assert snapshot.column_map == expected.column_map
+    finally:
+        scraper.close()
+
+
+def test_parse_many_keeps_page_order(pool):
+    pages = [(_fixture("product_page_table.html"), f"{URL}?v={i}") for i in range(5)]
+    pages.append((b"<html><body>No title</body></html>", URL))
+
+    snapshots = pool.parse_many(pages)
+
+    assert [s.url for s in snapshots[:5]] == [url for _, url in pages[:5]]
+    assert snapshots[5] is None
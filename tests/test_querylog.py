@@ -0,0 +1,72 @@
+import os
+
+from app.cache import SQLiteLease
+from app.querylog import QueryLog, normalize_term
+from app.warmup import CacheWarmer
+
+
+class FakeScraper:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.searched = []
+
+    def search_result_set(self, product_name, max_results=50):
+        self.searched.append((product_name, max_results))
+        if product_name in self.failing:
+            raise RuntimeError("upstream error")
+        return []
+
+
+def test_normalize_term():
+    assert normalize_term("  Destroyer   STAR ") == "destroyer star"
+
+
+def test_query_log_counts_survive_restart(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path)
+    log.record("Destroyer", 3)
+    log.record(" destroyer ", 3, {"weight_min": 170})
+    log.record("Buzzz", 3)
+
+    reloaded = QueryLog(path)
+    assert reloaded.top(1) == [("destroyer", 3)]
+    assert reloaded.counts() == {"destroyer": 2, "buzzz": 1}
+
+
+def test_query_log_rotates(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path, max_bytes=100, backup_count=1)
+    for _ in range(10):
+        log.record("Destroyer", 3)
+
+    assert os.path.exists(path + ".1")
+    assert not os.path.exists(path + ".2")
+    assert os.path.getsize(path) < 200
+
+
+def test_cache_warmer_reports_progress():
+    log = QueryLog()
+    for term in ["Destroyer", "Destroyer", "Buzzz", "Wraith"]:
+        log.record(term, 3)
+    scraper = FakeScraper(failing={"buzzz"})
+
+    warmer = CacheWarmer(scraper, log, top_n=2, concurrency=2)
+    status = warmer.run_once()
+
+    assert sorted(scraper.searched) == [("buzzz", 3), ("destroyer", 3)]
+    assert status["state"] == "done"
+    assert (status["total"], status["completed"], status["failed"]) == (2, 1, 1)
+    assert warmer.status()["runs"] == 1
+
+
+def test_cache_warmer_runs_only_with_the_lease(tmp_path):
+    log = QueryLog()
+    log.record("Destroyer", 3)
+    path = str(tmp_path / "cache.db")
+    holder = CacheWarmer(FakeScraper(), log, lease=SQLiteLease(path, "warmup"))
+    other_scraper = FakeScraper()
+    other = CacheWarmer(other_scraper, log, lease=SQLiteLease(path, "warmup"))
+
+    assert holder.run_once()["state"] == "done"
+    assert other.run_once()["state"] == "skipped"
+    assert other_scraper.searched == []
@@ -0,0 +1,51 @@
+from app.relevance import MoldMatcher, similarity
+from app.scraper import OTBDiscsScraper
+
+MOLDS = ["Destroyer", "Buzzz", "Buzzz SS", "Wraith", "Firebird", "Teebird", "Teebird3"]
+
+
+def test_similarity():
+    assert similarity("destroyer", "destroyer") == 1.0
+    assert similarity("destoyer", "destroyer") > 0.5
+    assert similarity("xyz", "destroyer") == 0.0
+
+
+def test_exact_prefix_and_suffix_matches_still_count():
+    matcher = MoldMatcher(MOLDS)
+    assert matcher.score("Destroyer", "destroyer") == 1.0
+    assert matcher.is_relevant("Destroyer", "dest")
+    assert matcher.is_relevant("Buzzz SS", "buzzz ss")
+    assert not matcher.is_relevant("Buzzz SS", "buzzz os")
+
+
+def test_misspellings_are_relevant_and_rewritten():
+    matcher = MoldMatcher(MOLDS)
+    assert matcher.is_relevant("Destroyer", "destoyer")
+    assert not matcher.is_relevant("Wraith", "destoyer")
+    assert matcher.rewrite("Destoyer") == "destroyer"
+    assert matcher.rewrite("firebrd") == "firebird"
+    # Known words and prefixes of known words are left alone
+    assert matcher.rewrite("Buzz") == "buzz"
+    assert matcher.rewrite("zzyzx") == "zzyzx"
+
+
+def test_short_words_need_a_closer_match():
+    matcher = MoldMatcher(["Heat", "Zone"])
+    assert not matcher.is_relevant("Heat", "heal")
+    assert matcher.rewrite("heal") == "heal"
+    assert matcher.is_relevant("Zone", "zonee")
+    # The same similarity is enough for longer words
+    assert MoldMatcher(short_word_length=3).is_relevant("Heat", "heal")
+
+
+def test_candidates_are_scored():
+    candidates = MoldMatcher(MOLDS).candidates("tebird")
+    assert candidates[0][0] == "Teebird"
+    assert all(a[1] >= b[1] for a, b in zip(candidates, candidates[1:]))
+
+
+def test_scraper_learns_molds():
+    scraper = OTBDiscsScraper()
+    scraper.relevance.add("Destroyer")
+    assert scraper._is_relevant_match("Destroyer", "destoyer")
+    assert not scraper._is_relevant_match(None, "destroyer")
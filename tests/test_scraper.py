@@ -1,6 +1,9 @@
 import pytest
+import time
+import requests
+from urllib.parse import parse_qs, urlparse
 from unittest.mock import Mock, patch
-from app.scraper import OTBDiscsScraper
+from app.scraper import OTBDiscsScraper, UpstreamBusyError
 from app.models import Disc, StockStatus
 
 class TestOTBDiscsScraper:
@@ -130,3 +133,358 @@ class TestOTBDiscsScraper:
         """Test scraper cleanup"""
         # Should not raise any exceptions
         self.scraper.close()
+
+
+PRODUCT_PAGE_TEMPLATE = '''
+<html>
+    <body>
+        <h1>MVP Neutron Envy</h1>
+        <table>
+            <tr>
+                <th>Thumbnail</th><th>Color</th><th>Stamp Foil</th><th>Weight</th>
+                <th>Scaled Weight</th><th>Flatness</th><th>Stiffness</th><th>Price</th><th>Stock</th>
+            </tr>
+            <tr>
+                <td><img src="/img/1.jpg" /></td><td>Blue</td><td>Silver</td><td>174g</td>
+                <td>5.5</td><td>Flat (3)</td><td>Stiff (7)</td><td>$17.99</td><td>{stock_1}</td>
+            </tr>
+            <tr>
+                <td><img src="/img/2.jpg" /></td><td>Red</td><td>Gold</td><td>172g</td>
+                <td>4.5</td><td>Dome (5)</td><td>Soft (2)</td><td>{price_2}</td><td>In stock</td>
+            </tr>
+        </table>
+    </body>
+</html>
+'''
+
+
+def _product_page_response(stock_1='In stock', price_2='$17.99'):
+    response = Mock()
+    response.content = PRODUCT_PAGE_TEMPLATE.format(stock_1=stock_1, price_2=price_2).encode('utf-8')
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestProductPageRefresh:
+    """Test the product page cache and incremental stock/price refresh"""
+    
+    def setup_method(self):
+        self.scraper = OTBDiscsScraper()
+        self.url = "https://otbdiscs.com/product/envy/"
+    
+    def teardown_method(self):
+        self.scraper.close()
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_parse_product_page_uses_cache(self, mock_get):
+        """Second parse of the same page is served from the page cache"""
+        mock_get.return_value = _product_page_response()
+        
+        first = self.scraper.parse_product_page(self.url)
+        second = self.scraper.parse_product_page(self.url)
+        
+        assert len(first) == 2
+        assert [d.price for d in second] == [d.price for d in first]
+        assert mock_get.call_count == 1
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_refresh_reports_only_changed_discs(self, mock_get):
+        """Refresh diffs stock and price against the cached variants"""
+        mock_get.return_value = _product_page_response()
+        self.scraper.parse_product_page(self.url)
+        
+        mock_get.return_value = _product_page_response(stock_1='Out of stock', price_2='$15.99')
+        change_set = self.scraper.refresh_product_page(self.url)
+        
+        assert not change_set.full_rescrape
+        assert change_set.rows_checked == 2
+        assert [c.row_index for c in change_set.changes] == [0, 1]
+        assert change_set.changes[0].new_stock == StockStatus.OUT_OF_STOCK
+        assert str(change_set.changes[1].new_price) == "15.99"
+        
+        cached = self.scraper.parse_product_page(self.url)
+        assert cached[0].stock == StockStatus.OUT_OF_STOCK
+        assert cached[0].plastic_color == "Blue"
+        
+        # Nothing changed since the last refresh
+        assert self.scraper.refresh_product_page(self.url).changes == []
+        
+        # The patched snapshot is not memoized, so a forced parse reads every column again
+        with patch.object(self.scraper, '_parse_product_html', wraps=self.scraper._parse_product_html) as parse:
+            self.scraper.parse_product_page(self.url, use_cache=False)
+            assert parse.call_count == 1
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_refresh_updates_cells_and_tolerates_short_rows(self, mock_get):
+        """Refresh keeps cached cell texts current and skips cells a row does not have"""
+        mock_get.return_value = _product_page_response()
+        self.scraper.parse_product_page(self.url)
+        
+        mock_get.return_value = _product_page_response(stock_1='Out of stock')
+        self.scraper.refresh_product_page(self.url)
+        assert self.scraper.page_cache.get(self.url).row_cells[0][8] == 'Out of stock'
+        
+        # First row lost its stock cell but still has enough cells to be a variant row
+        short = _product_page_response()
+        short.content = short.content.replace(b'<td>In stock</td>', b'', 1)
+        mock_get.return_value = short
+        change_set = self.scraper.refresh_product_page(self.url)
+        assert change_set.changes[0].new_stock == StockStatus.UNKNOWN
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_refresh_skips_rows_that_did_not_parse(self, mock_get):
+        """A row that never parsed does not force a full reparse or shift later rows"""
+        def with_unparsed_row(response):
+            response.content = response.content.replace(b'<tr>\n                <td><img src="/img/1.jpg" />', (
+                b'<tr><td></td><td>Broken</td><td></td><td></td><td></td><td></td><td></td><td></td><td></td></tr>\n'
+                b'            <tr>\n                <td><img src="/img/1.jpg" />'
+            ), 1)
+            return response
+        
+        parse_row = self.scraper._parse_table_row
+        def skip_broken(cells, *args):
+            return None if cells[1].get_text(strip=True) == 'Broken' else parse_row(cells, *args)
+        
+        with patch.object(self.scraper, '_parse_table_row', side_effect=skip_broken):
+            mock_get.return_value = with_unparsed_row(_product_page_response())
+            assert len(self.scraper.parse_product_page(self.url)) == 2
+            
+            mock_get.return_value = with_unparsed_row(_product_page_response(price_2='$15.99'))
+            change_set = self.scraper.refresh_product_page(self.url)
+        
+        assert not change_set.full_rescrape
+        assert [c.row_index for c in change_set.changes] == [1]
+        assert change_set.changes[0].disc.plastic_color == "Red"
+        assert str(change_set.changes[0].new_price) == "15.99"
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_unchanged_body_is_not_parsed_again(self, mock_get):
+        """A refetched page with an identical body reuses the memoized parse"""
+        mock_get.return_value = _product_page_response()
+        
+        with patch.object(self.scraper, '_parse_product_html', wraps=self.scraper._parse_product_html) as parse:
+            first = self.scraper.parse_product_page(self.url, use_cache=False)
+            second = self.scraper.parse_product_page(self.url, use_cache=False)
+            assert parse.call_count == 1
+            
+            mock_get.return_value = _product_page_response(price_2='$15.99')
+            third = self.scraper.parse_product_page(self.url, use_cache=False)
+            assert parse.call_count == 2
+        
+        assert second == first
+        assert str(third[1].price) == "15.99"
+        stats = self.scraper.parse_memo.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        
+        # Refresh of an unchanged body finds no changes without reading the table
+        assert self.scraper.refresh_product_page(self.url).changes == []
+        assert self.scraper.parse_memo.stats()["hits"] == 2
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_raw_row_text_is_built_on_demand(self, mock_get):
+        """Raw row text is derived from cached cell texts only when requested"""
+        mock_get.return_value = _product_page_response()
+        discs = self.scraper.parse_product_page(self.url)
+        
+        assert discs[0].raw_row_text is None
+        assert discs[0].id and discs[0].id != discs[1].id
+        assert self.scraper.get_raw_row_text(discs[0].id) == "Blue\tSilver\t174g\t5.5\tFlat (3)\tStiff (7)\t$17.99"
+        assert self.scraper.get_raw_row_text("unknown") is None
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_scheduler_prefers_popular_pages(self, mock_get):
+        """Popular pages are refreshed before equally old unpopular ones"""
+        from app.refresh import RefreshScheduler
+        
+        mock_get.return_value = _product_page_response()
+        other_url = "https://otbdiscs.com/product/other/"
+        self.scraper.parse_product_page(self.url)
+        self.scraper.parse_product_page(other_url)
+        
+        scheduler = RefreshScheduler(self.scraper, batch_size=1, min_age_seconds=0)
+        scheduler.record_pages([other_url])
+        
+        # Both pages are equally old when looked at far enough in the future
+        assert scheduler.select_pages(now=time.time() + 1000) == [other_url]
+
+
+def _search_page_response(slugs, page_count=3):
+    items = ''.join(
+        f'<li class="product"><a href="/product/{slug}/">'
+        f'<h2 class="woocommerce-loop-product__title">Innova Star {slug.title()}</h2></a></li>'
+        for slug in slugs
+    )
+    pagination = ''.join(f'<a class="page-numbers" href="/page/{n}/">{n}</a>' for n in range(2, page_count + 1))
+    response = Mock()
+    response.content = (
+        f'<html><body><ul class="products">{items}</ul>'
+        f'<nav class="woocommerce-pagination">{pagination}</nav></body></html>'
+    ).encode('utf-8')
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestSearchPagination:
+    """Test fetching of further search result pages"""
+    
+    def setup_method(self):
+        self.scraper = OTBDiscsScraper()
+        self.pages = {
+            1: ['destroyer', 'wraith'],
+            2: ['destroyer-dx', 'teebird'],
+            3: ['destroyer-gstar'],
+        }
+    
+    def teardown_method(self):
+        self.scraper.close()
+    
+    def _fake_get(self, url, **kwargs):
+        page = int(url.split('/page/')[1].split('/')[0]) if '/page/' in url else 1
+        return _search_page_response(self.pages[page])
+    
+    def test_page_count_and_urls(self):
+        """Pagination links give the page count and later pages use /page/N/"""
+        from bs4 import BeautifulSoup
+        
+        soup = BeautifulSoup(_search_page_response([], page_count=4).content, 'html.parser')
+        assert self.scraper._search_page_count(soup) == 4
+        assert self.scraper._search_page_url("star destroyer", 2) == \
+            "https://otbdiscs.com/page/2/?s=star+destroyer&post_type=product"
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_search_collects_relevant_products_from_all_pages(self, mock_get):
+        """Relevant products on later result pages are found"""
+        mock_get.side_effect = self._fake_get
+        
+        with patch.object(self.scraper, '_fetch_product_variants', side_effect=lambda url, product: [product]):
+            results = self.scraper.search_discs("Destroyer", max_results=10)
+        
+        assert sorted(d.product_url.split('/')[-2] for d in results) == ['destroyer', 'destroyer-dx', 'destroyer-gstar']
+        assert mock_get.call_count == 3
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_search_stops_at_max_results(self, mock_get):
+        """No further pages are fetched once max_results relevant products are collected"""
+        mock_get.side_effect = self._fake_get
+        
+        with patch.object(self.scraper, '_fetch_product_variants', side_effect=lambda url, product: [product]):
+            results = self.scraper.search_discs("Destroyer", max_results=1)
+        
+        assert len(results) == 1
+        assert mock_get.call_count == 1
+
+
+class TestSearchCorrection:
+    """Test retrying searches that found nothing with a corrected term"""
+    
+    def setup_method(self):
+        self.scraper = OTBDiscsScraper()
+        self.scraper.relevance.add_many(["Wrath", "Teebird", "Destroyer"])
+        self.results = {'wraith': ['wraith'], 'teebird3': ['teebird3'], 'destroyer': ['destroyer']}
+    
+    def teardown_method(self):
+        self.scraper.close()
+    
+    def _fake_get(self, url, **kwargs):
+        term = parse_qs(urlparse(url).query)['s'][0].lower()
+        return _search_page_response(self.results.get(term, []), page_count=1)
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_molds_missing_from_the_index_are_searched_as_typed(self, mock_get):
+        """Real molds the matcher has not seen are not replaced by similar known ones"""
+        mock_get.side_effect = self._fake_get
+        
+        with patch.object(self.scraper, '_fetch_product_variants', side_effect=lambda url, product: [product]):
+            wraith = self.scraper.search_result_set("Wraith")
+            teebird3 = self.scraper.search_result_set("Teebird3")
+        
+        assert [d.product_url.split('/')[-2] for d in wraith.discs] == ['wraith']
+        assert [d.product_url.split('/')[-2] for d in teebird3.discs] == ['teebird3']
+        assert wraith.corrected_query is None and teebird3.corrected_query is None
+        assert mock_get.call_count == 2
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_misspelled_search_without_results_is_corrected(self, mock_get):
+        """A term that finds nothing is searched again as the closest known mold"""
+        mock_get.side_effect = self._fake_get
+        
+        with patch.object(self.scraper, '_fetch_product_variants', side_effect=lambda url, product: [product]):
+            result_set = self.scraper.search_result_set("Destoyer")
+        
+        assert result_set.query == "Destoyer"
+        assert result_set.corrected_query == "destroyer"
+        assert [d.product_url.split('/')[-2] for d in result_set.discs] == ['destroyer']
+
+
+class TestSearchDeadline:
+    """Test partial search results when the latency budget runs out"""
+    
+    def setup_method(self):
+        self.scraper = OTBDiscsScraper()
+    
+    def teardown_method(self):
+        self.scraper.close()
+    
+    def _fake_get(self, url, timeout=None, **kwargs):
+        if '/product/destroyer-slow/' in url:
+            time.sleep(min(timeout, 1.0))
+            raise requests.Timeout("slow page")
+        if '/product/' in url:
+            return _product_page_response()
+        return _search_page_response(['destroyer', 'destroyer-slow'], page_count=1)
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_slow_pages_are_summarized_when_deadline_passes(self, mock_get):
+        """Completed pages are returned, pending ones as summary discs"""
+        mock_get.side_effect = self._fake_get
+        
+        start = time.time()
+        result_set = self.scraper.search_result_set("Destroyer", 10, deadline_ms=300)
+        elapsed = time.time() - start
+        
+        assert elapsed < 0.9
+        assert result_set.incomplete_pages == ["https://otbdiscs.com/product/destroyer-slow/"]
+        summaries = [d for d in result_set.discs if d.product_url.endswith('/destroyer-slow/')]
+        assert len(summaries) == 1 and summaries[0].weight is None
+        assert len(result_set.discs) == 3
+        # Partial results are not cached and timeouts we caused do not trip the breaker
+        assert len(self.scraper.search_cache) == 0
+        assert self.scraper.breaker.snapshot()["consecutive_failures"] == 0
+    
+    @patch('app.scraper.requests.Session.get')
+    def test_no_deadline_waits_for_all_pages(self, mock_get):
+        """Without a deadline every page is fetched"""
+        mock_get.side_effect = lambda url, **kwargs: (
+            _product_page_response() if '/product/' in url
+            else _search_page_response(['destroyer', 'destroyer-dx'], page_count=1)
+        )
+        
+        result_set = self.scraper.search_result_set("Destroyer", 10)
+        
+        assert result_set.incomplete_pages == []
+        assert len(result_set.discs) == 4
+    
+    def test_busy_upstream_without_deadline_falls_back_to_summaries(self):
+        """With every upstream slot held and no deadline, busy pages are summarized"""
+        get = self.scraper._get
+        def short_get(url, **kwargs):
+            if '/product/' not in url:
+                return _search_page_response(['destroyer', 'destroyer-dx'], page_count=1)
+            return get(url, timeout=0.05)
+        
+        for _ in range(self.scraper.max_concurrent_requests):
+            self.scraper._upstream.acquire()
+        try:
+            with pytest.raises(UpstreamBusyError):
+                get("https://otbdiscs.com/product/destroyer/", timeout=0.05)
+            
+            with patch.object(self.scraper, '_get', side_effect=short_get):
+                results = self.scraper.search_discs("Destroyer", 10)
+            assert len(results) == 2 and all(d.weight is None for d in results)
+            
+            # The first search page being busy is an ordinary failed search
+            with patch.object(self.scraper, '_get', side_effect=lambda url, **kwargs: get(url, timeout=0.05)):
+                assert self.scraper.search_discs("Destroyer", 10) == []
+        finally:
+            for _ in range(self.scraper.max_concurrent_requests):
+                self.scraper._upstream.release()
@@ -0,0 +1,141 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.models import StockStatus
+from app.scraper import OTBDiscsScraper
+from tests.test_scraper import PRODUCT_PAGE_TEMPLATE
+
+
+def _variation_ref(variation_id, color, weight):
+    return {"id": variation_id, "attributes": [
+        {"name": "Color", "value": color},
+        {"name": "Weight", "value": weight},
+        {"name": "Flatness", "value": "Flat (3)"},
+    ]}
+
+
+PRODUCTS = [
+    {
+        "id": 1, "name": "Innova Star Destroyer", "type": "variable",
+        "permalink": "{base}/product/star-destroyer/",
+        "prices": {"price": "1899", "currency_minor_unit": 2}, "is_in_stock": True,
+        "images": [{"src": "https://img/destroyer.jpg"}],
+        "variations": [_variation_ref(11, "Blue", "175g"), _variation_ref(12, "Red", "172g")],
+    },
+    {
+        # Variations without a weight attribute are parsed from the product page
+        "id": 2, "name": "Innova Champion Destroyer", "type": "variable",
+        "permalink": "{base}/product/champion-destroyer/",
+        "prices": {"price": "1999", "currency_minor_unit": 2}, "is_in_stock": True,
+        "variations": [{"id": 21, "attributes": [{"name": "Color", "value": "Green"}]}],
+    },
+    {
+        "id": 3, "name": "Innova Star Wraith", "type": "variable",
+        "permalink": "{base}/product/star-wraith/",
+        "prices": {"price": "1899", "currency_minor_unit": 2}, "is_in_stock": True,
+        "variations": [],
+    },
+]
+
+VARIATIONS = {
+    11: {"id": 11, "prices": {"price": "1799", "currency_minor_unit": 2}, "is_in_stock": True},
+    12: {"id": 12, "prices": {"price": "1899", "currency_minor_unit": 2}, "is_in_stock": False},
+    21: {"id": 21, "prices": {"price": "1999", "currency_minor_unit": 2}, "is_in_stock": True},
+}
+
+
+class StubStoreHandler(BaseHTTPRequestHandler):
+    """Serves a small WooCommerce Store API and product pages"""
+
+    api_enabled = True
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if content_type == "application/json":
+            self.send_header("X-WP-TotalPages", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        type(self).requests.append(self.path)
+        base = f"http://{self.headers['Host']}"
+
+        if parsed.path == "/wp-json/wc/store/v1/products":
+            if not self.api_enabled:
+                return self._send(404, '{"code": "rest_no_route"}', "application/json")
+            if params.get("type") == ["variation"]:
+                ids = [int(i) for i in params["include"][0].split(",")]
+                items = [VARIATIONS[i] for i in ids if i in VARIATIONS]
+            else:
+                items = [dict(p, permalink=p["permalink"].format(base=base)) for p in PRODUCTS]
+            return self._send(200, json.dumps(items), "application/json")
+
+        if parsed.path.startswith("/product/"):
+            return self._send(200, PRODUCT_PAGE_TEMPLATE.format(stock_1="In stock", price_2="$17.99"), "text/html")
+
+        self._send(200, "<html><body></body></html>", "text/html")
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubStoreHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubStoreHandler.api_enabled = True
+    StubStoreHandler.requests = []
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraper(stub_server):
+    scraper = OTBDiscsScraper(use_store_api=True)
+    scraper.base_url = stub_server
+    yield scraper
+    scraper.close()
+
+
+def test_store_api_maps_variations_to_discs(scraper):
+    discs = scraper.search_discs("Destroyer")
+
+    from_api = [d for d in discs if d.product_url.endswith("/star-destroyer/")]
+    assert [(d.plastic_color, d.weight, d.flatness) for d in from_api] == [("Blue", 175.0, 3.0), ("Red", 172.0, 3.0)]
+    assert [str(d.price) for d in from_api] == ["17.99", "18.99"]
+    assert [d.stock for d in from_api] == [StockStatus.IN_STOCK, StockStatus.OUT_OF_STOCK]
+    assert from_api[0].image_url == "https://img/destroyer.jpg"
+    assert from_api[0].id and from_api[0].id != from_api[1].id
+
+    # Wraith is not relevant and its variations are never requested
+    assert not any("star-wraith" in (d.product_url or "") for d in discs)
+    variation_requests = [r for r in StubStoreHandler.requests if "type=variation" in r]
+    assert len(variation_requests) == 1
+
+
+def test_incomplete_variations_fall_back_to_product_page(scraper):
+    discs = scraper.search_discs("Destroyer")
+
+    from_html = [d for d in discs if d.product_url.endswith("/champion-destroyer/")]
+    assert len(from_html) == 2
+    assert any(r.startswith("/product/champion-destroyer/") for r in StubStoreHandler.requests)
+
+
+def test_unavailable_store_api_falls_back_to_html_search(scraper):
+    StubStoreHandler.api_enabled = False
+
+    assert scraper.store_api.search("Destroyer") is None
+    assert scraper.search_discs("Destroyer") == []
+    assert any(r.startswith("/?s=Destroyer") for r in StubStoreHandler.requests)
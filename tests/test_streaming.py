@@ -0,0 +1,73 @@
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, history_store, scraper as app_scraper
+from app.scraper import OTBDiscsScraper
+from app.streaming import iter_table_rows
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+URL = "https://otbdiscs.com/product/innova-star-destroyer/"
+
+client = TestClient(app)
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def _chunks(content, size):
+    return (content[i:i + size] for i in range(0, len(content), size))
+
+
+def _streamed_response(content, chunk_size=64):
+    response = Mock()
+    response.status_code = 200
+    response.content = content
+    response.raise_for_status.return_value = None
+    response.iter_content = lambda n: _chunks(content, chunk_size)
+    return response
+
+
+def test_rows_are_read_from_the_first_variants_table():
+    page = (
+        b"<html><body><h1>MVP Neutron Envy</h1>"
+        b"<table><tr><th>Shipping</th><th>Price</th></tr><tr><td>US</td><td>$5</td></tr></table>"
+        b"<table><tr><th>Color</th><th>Weight</th><th>Price</th></tr>"
+        + b"".join(b"<tr>" + b"<td>Blue</td><td>174g</td><td>$17.99</td>" * 3 + b"</tr>" for _ in range(3))
+        + b"</table><table><tr><th>Weight</th><th>Price</th></tr></table></body></html>"
+    )
+
+    rows = list(iter_table_rows(_chunks(page, 7)))
+
+    assert len(rows) == 3
+    assert rows[0].title == "MVP Neutron Envy"
+    assert rows[0].headers == ["color", "weight", "price"]
+    assert rows[0].cell_texts[:3] == ["Blue", "174g", "$17.99"]
+
+
+@pytest.mark.parametrize("fixture", ["product_page_table.html", "product_page_variations.html"])
+def test_streamed_discs_match_full_parse(fixture):
+    content = _fixture(fixture)
+    scraper = OTBDiscsScraper()
+    try:
+        with patch.object(scraper.session, "get", return_value=_streamed_response(content)):
+            streamed = list(scraper.iter_product_page(URL))
+        assert streamed == scraper._parse_product_html(content, URL, use_embedded=False).discs
+    finally:
+        scraper.close()
+
+
+def test_page_export_streams_and_records_history():
+    content = _fixture("product_page_table.html")
+    with patch.object(app_scraper.session, "get", return_value=_streamed_response(content)), \
+            patch.object(history_store, "record_discs") as record:
+        response = client.get("/api/export/page", params={"url": URL, "format": "csv"})
+
+    assert response.status_code == 200
+    assert 'filename="innova-star-destroyer.csv"' in response.headers["content-disposition"]
+    assert len(response.text.strip().splitlines()) == 13
+    assert sum(len(call.args[0]) for call in record.call_args_list) == 12
@@ -0,0 +1,70 @@
+import time
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from app.main import app, suggest_index
+from app.models import Disc
+from app.suggest import SuggestIndex
+
+client = TestClient(app)
+
+
+def _index():
+    index = SuggestIndex()
+    index.add("Destroyer", "mold", 5)
+    index.add("Destiny", "mold", 1)
+    index.add("Buzzz SS", "mold", 2)
+    index.add("Buzzz", "mold", 3)
+    index.add("Star", "plastic")
+    return index
+
+
+def test_suggest_matches_prefix_and_ranks_by_seen():
+    values = [s.value for s in _index().suggest("dest")]
+    assert values == ["Destroyer", "Destiny"]
+
+
+def test_suggest_ranks_searches_before_seen():
+    index = _index()
+    index.record_searches({"destiny": 2})
+    assert [s.value for s in index.suggest("DEST")] == ["Destiny", "Destroyer"]
+
+
+def test_suggest_matches_any_word_and_filters_kind():
+    index = _index()
+    assert [s.value for s in index.suggest("ss")] == ["Buzzz SS"]
+    assert [s.value for s in index.suggest("s", kind="plastic")] == ["Star"]
+    assert index.suggest("   ") == []
+
+
+def test_suggest_is_fast():
+    index = SuggestIndex()
+    for i in range(5000):
+        index.add(f"Mold {i:04d}", "mold", i % 7)
+    index.suggest("mold")  # builds the sorted array
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.suggest("mold 12", limit=10)
+    # Generous bound for shared CI machines; a lookup takes well under 1ms
+    assert (time.perf_counter() - start) / 100 < 0.01
+
+
+def test_unknown_placeholders_are_not_suggested():
+    index = SuggestIndex()
+    index.add_discs([Disc(brand="Unknown", mold="Teebird", plastic_type="Unknown"),
+                     Disc(brand="Innova", mold="Unknown", plastic_type="Star")])
+    assert index.suggest("unkn") == []
+    assert [s.value for s in index.suggest("teeb")] == ["Teebird"]
+
+
+def test_suggest_endpoint():
+    suggest_index.add_discs([Disc(brand="Innova", mold="Teebird", plastic_type="Star", price=Decimal("15.99"))])
+    response = client.get("/api/suggest?q=teeb")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["suggestions"][0]["value"] == "Teebird"
+    assert data["suggestions"][0]["kind"] == "mold"
+
+    assert client.get("/api/suggest?q=teeb&kind=color").status_code == 400
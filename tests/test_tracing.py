@@ -0,0 +1,55 @@
+import logging
+from app import tracing
+
+
+class CountingPayload:
+    """Object that records how often it is formatted"""
+    
+    def __init__(self):
+        self.formatted = 0
+    
+    def __str__(self):
+        self.formatted += 1
+        return "payload"
+
+
+def test_trace_debug_is_lazy():
+    """Debug payloads are not formatted unless DEBUG is on or a trace is dumped"""
+    logger = logging.getLogger("tests.tracing.lazy")
+    logger.setLevel(logging.INFO)
+    payload = CountingPayload()
+    
+    tracing.trace_debug(logger, "Row: %s", payload)
+    
+    token = tracing.start_trace("GET /api/search")
+    try:
+        tracing.trace_debug(logger, "Row: %s", payload)
+        trace = tracing.current_trace()
+    finally:
+        tracing.end_trace(token)
+    
+    assert payload.formatted == 0
+    assert len(trace.events) == 1
+
+
+def test_trace_dump_and_thread_binding(caplog):
+    """Events from bound worker threads land in the request trace"""
+    from concurrent.futures import ThreadPoolExecutor
+    logger = logging.getLogger("tests.tracing.dump")
+    logger.setLevel(logging.INFO)
+    
+    token = tracing.start_trace("GET /api/search", max_events=2)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for i in range(3):
+                executor.submit(tracing.bind(tracing.trace_debug), logger, "event %d", i).result()
+        trace = tracing.current_trace()
+    finally:
+        tracing.end_trace(token)
+    
+    with caplog.at_level(logging.WARNING):
+        trace.dump(logger, "slow")
+    
+    assert trace.dropped == 1
+    assert "event 2" in caplog.text
+    assert "event 0" not in caplog.text